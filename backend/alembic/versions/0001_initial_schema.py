@@ -0,0 +1,87 @@
+"""Initial schema (tables as previously created by Base.metadata.create_all)
+
+Databases created before migrations existed already have these tables:
+mark them with `alembic stamp 0001` and then `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("timezone", sa.String(), nullable=True),
+        sa.Column("google_access_token", sa.String(), nullable=True),
+        sa.Column("google_refresh_token", sa.String(), nullable=True),
+        sa.Column("plaid_access_token", sa.String(), nullable=True),
+        sa.Column("caregiver_email", sa.String(), nullable=True),
+        sa.Column("caregiver_phone", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "medications",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("dosage", sa.String(), nullable=True),
+        sa.Column("frequency", sa.String(), nullable=True),
+        sa.Column("times", sa.JSON(), nullable=True),
+        sa.Column("image_url", sa.String(), nullable=True),
+        sa.Column("notes", sa.String(), nullable=True),
+        sa.Column("active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_medications_id", "medications", ["id"])
+    op.create_index("ix_medications_user_id", "medications", ["user_id"])
+
+    op.create_table(
+        "medication_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("medication_id", sa.Integer(), sa.ForeignKey("medications.id"), nullable=False),
+        sa.Column("taken_at", sa.DateTime(), nullable=True),
+        sa.Column("confirmed_by", sa.String(), nullable=True),
+        sa.Column("notes", sa.String(), nullable=True),
+    )
+    op.create_index("ix_medication_logs_id", "medication_logs", ["id"])
+    op.create_index("ix_medication_logs_user_id", "medication_logs", ["user_id"])
+    op.create_index("ix_medication_logs_taken_at", "medication_logs", ["taken_at"])
+
+    op.create_table(
+        "approved_contacts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("relationship", sa.String(), nullable=True),
+        sa.Column("photo_url", sa.String(), nullable=True),
+        sa.Column("can_receive_messages", sa.Boolean(), nullable=True),
+        sa.Column("can_receive_calls", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_approved_contacts_id", "approved_contacts", ["id"])
+
+
+def downgrade():
+    op.drop_table("approved_contacts")
+    op.drop_table("medication_logs")
+    op.drop_table("medications")
+    op.drop_table("users")
@@ -0,0 +1,47 @@
+"""Composite indexes matching the hot queries
+
+- medications: WHERE user_id = ? AND active        -> (user_id, active)
+- medication_logs: per user / per medication by time -> (user_id, taken_at), (medication_id, taken_at)
+- approved_contacts: WHERE user_id = ?              -> (user_id)
+
+The single-column user_id indexes on medications and medication_logs are
+prefixes of the new composites and are dropped.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_medications_user_id_active", "medications", ["user_id", "active"])
+    op.drop_index("ix_medications_user_id", table_name="medications")
+
+    op.create_index(
+        "ix_medication_logs_user_id_taken_at", "medication_logs", ["user_id", "taken_at"]
+    )
+    op.create_index(
+        "ix_medication_logs_medication_id_taken_at",
+        "medication_logs",
+        ["medication_id", "taken_at"],
+    )
+    op.drop_index("ix_medication_logs_user_id", table_name="medication_logs")
+
+    op.create_index("ix_approved_contacts_user_id", "approved_contacts", ["user_id"])
+
+
+def downgrade():
+    op.drop_index("ix_approved_contacts_user_id", table_name="approved_contacts")
+
+    op.create_index("ix_medication_logs_user_id", "medication_logs", ["user_id"])
+    op.drop_index("ix_medication_logs_medication_id_taken_at", table_name="medication_logs")
+    op.drop_index("ix_medication_logs_user_id_taken_at", table_name="medication_logs")
+
+    op.create_index("ix_medications_user_id", "medications", ["user_id"])
+    op.drop_index("ix_medications_user_id_active", table_name="medications")
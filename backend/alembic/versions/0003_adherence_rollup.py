@@ -0,0 +1,46 @@
+"""Daily medication adherence rollup
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "medication_adherence_daily",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("medication_id", sa.Integer(), sa.ForeignKey("medications.id"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("scheduled", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("taken", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint(
+            "user_id", "day", "medication_id", name="uq_adherence_user_day_medication"
+        ),
+    )
+
+    # Backfill from existing logs. Days are UTC here - logs written from now on
+    # are bucketed in the user's timezone.
+    op.execute(
+        """
+        INSERT INTO medication_adherence_daily (user_id, medication_id, day, scheduled, taken)
+        SELECT l.user_id, l.medication_id, DATE(l.taken_at),
+               COALESCE(MAX(json_array_length(m.times)), 0), COUNT(*)
+        FROM medication_logs l
+        JOIN medications m ON m.id = l.medication_id
+        WHERE l.taken_at IS NOT NULL
+        GROUP BY l.user_id, l.medication_id, DATE(l.taken_at)
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("medication_adherence_daily")
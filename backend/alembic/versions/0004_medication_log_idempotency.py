@@ -0,0 +1,31 @@
+"""Medication log status and client idempotency keys
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("medication_logs") as batch:
+        batch.add_column(
+            sa.Column("status", sa.String(), nullable=False, server_default="taken")
+        )
+        batch.add_column(sa.Column("idempotency_key", sa.String(), nullable=True))
+        batch.create_unique_constraint(
+            "uq_medication_logs_user_idempotency_key", ["user_id", "idempotency_key"]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("medication_logs") as batch:
+        batch.drop_constraint("uq_medication_logs_user_idempotency_key", type_="unique")
+        batch.drop_column("idempotency_key")
+        batch.drop_column("status")
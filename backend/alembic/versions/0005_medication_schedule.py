@@ -0,0 +1,95 @@
+"""Normalized medication schedule
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import json
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def _offset_minutes(zone_name, now):
+    try:
+        zone = ZoneInfo(zone_name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        zone = ZoneInfo("UTC")
+    return int(now.astimezone(zone).utcoffset().total_seconds() // 60), zone
+
+
+def _minute_of_day(value):
+    try:
+        hours, minutes = value.split(":")[:2]
+        minute = int(hours) * 60 + int(minutes)
+    except (AttributeError, ValueError):
+        return None
+    return minute if 0 <= minute < 24 * 60 else None
+
+
+def upgrade():
+    schedule = op.create_table(
+        "medication_schedule",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("medication_id", sa.Integer(), sa.ForeignKey("medications.id"), nullable=False),
+        sa.Column("local_minute", sa.Integer(), nullable=False),
+        sa.Column("days_of_week", sa.Integer(), nullable=False, server_default="127"),
+        sa.Column("timezone", sa.String(), nullable=False, server_default="UTC"),
+        sa.Column("utc_offset", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("utc_minute", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_medication_schedule_utc_minute", "medication_schedule", ["utc_minute"])
+    op.create_index("ix_medication_schedule_medication_id", "medication_schedule", ["medication_id"])
+
+    # Backfill from active medications (times are parsed in Python - they are JSON)
+    now = datetime.now(timezone.utc)
+    medications = op.get_bind().execute(
+        sa.text(
+            """
+            SELECT m.id, m.user_id, m.times, m.frequency, m.created_at, u.timezone
+            FROM medications m
+            JOIN users u ON u.id = m.user_id
+            WHERE m.active
+            """
+        )
+    )
+
+    rows = []
+    for med_id, user_id, times, frequency, created_at, zone_name in medications:
+        if isinstance(times, str):
+            times = json.loads(times)
+        offset, zone = _offset_minutes(zone_name, now)
+        days = 127
+        if (frequency or "").lower() == "weekly" and created_at:
+            if isinstance(created_at, str):
+                created_at = datetime.fromisoformat(created_at)
+            days = 1 << created_at.replace(tzinfo=timezone.utc).astimezone(zone).weekday()
+
+        for minute in sorted({_minute_of_day(t) for t in times or []} - {None}):
+            rows.append(
+                {
+                    "user_id": user_id,
+                    "medication_id": med_id,
+                    "local_minute": minute,
+                    "days_of_week": days,
+                    "timezone": zone_name or "UTC",
+                    "utc_offset": offset,
+                    "utc_minute": (minute - offset) % (24 * 60),
+                }
+            )
+
+    if rows:
+        op.bulk_insert(schedule, rows)
+
+
+def downgrade():
+    op.drop_index("ix_medication_schedule_medication_id", table_name="medication_schedule")
+    op.drop_index("ix_medication_schedule_utc_minute", table_name="medication_schedule")
+    op.drop_table("medication_schedule")
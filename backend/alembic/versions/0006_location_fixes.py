@@ -0,0 +1,34 @@
+"""Location fixes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "location_fixes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        sa.Column("accuracy", sa.Float(), nullable=True),
+        sa.Column("recorded_at", sa.DateTime(), nullable=False),
+        sa.Column("received_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "ix_location_fixes_user_id_recorded_at", "location_fixes", ["user_id", "recorded_at"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_location_fixes_user_id_recorded_at", table_name="location_fixes")
+    op.drop_table("location_fixes")
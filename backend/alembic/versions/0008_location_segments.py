@@ -0,0 +1,34 @@
+"""Compacted location history segments
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "location_segments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("start_at", sa.DateTime(), nullable=False),
+        sa.Column("end_at", sa.DateTime(), nullable=False),
+        sa.Column("point_count", sa.Integer(), nullable=False),
+        sa.Column("raw_count", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+    )
+    op.create_index(
+        "ix_location_segments_user_id_start_at", "location_segments", ["user_id", "start_at"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_location_segments_user_id_start_at", table_name="location_segments")
+    op.drop_table("location_segments")
@@ -0,0 +1,38 @@
+"""Fired medication reminders (durable pending queue and per-dose claim)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "medication_reminders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("medication_id", sa.Integer(), sa.ForeignKey("medications.id"), nullable=False),
+        sa.Column("due_at", sa.DateTime(), nullable=False),
+        sa.Column("local_time", sa.String(), nullable=False),
+        sa.Column("timezone", sa.String(), nullable=False),
+        sa.Column("fired_at", sa.DateTime(), nullable=False),
+        sa.Column("collected_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("medication_id", "due_at", name="uq_medication_reminders_medication_due"),
+    )
+    op.create_index(
+        "ix_medication_reminders_user_id_collected_at",
+        "medication_reminders",
+        ["user_id", "collected_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_medication_reminders_user_id_collected_at", table_name="medication_reminders")
+    op.drop_table("medication_reminders")
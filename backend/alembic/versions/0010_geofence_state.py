@@ -0,0 +1,22 @@
+"""Persisted inside/outside state per geofence
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("geofences", sa.Column("inside", sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("geofences") as batch:
+        batch.drop_column("inside")
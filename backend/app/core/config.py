@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -12,6 +12,12 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    AUTO_CREATE_TABLES: bool = True  # Dev convenience - use `alembic upgrade head` in production
+    DB_POOL_SIZE: int = 5  # Per worker process
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 10.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Replace connections older than this (seconds, -1 = never)
+    DB_POOL_PRE_PING: bool = False  # Extra round trip per checkout; enable if the DB drops idle connections
 
     # Security
     SECRET_KEY: str
@@ -21,6 +27,97 @@ class Settings(BaseSettings):
     # AI Services
     ANTHROPIC_API_KEY: str
     OPENAI_API_KEY: Optional[str] = None
+    ANTHROPIC_BASE_URL: Optional[str] = None  # Override for local stub servers
+
+    # Claude HTTP client (shared connection pool)
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_HTTP2: bool = True
+    LLM_TIMEOUT: float = 60.0
+    LLM_CONNECT_TIMEOUT: float = 5.0
+    LLM_MAX_RETRIES: int = 2
+    LLM_MAX_CONCURRENCY: int = 16  # In-flight Claude calls per process
+
+    # Optional JSON file overriding the intent/keyword tables in app/core/intents.py
+    INTENTS_FILE: Optional[str] = None
+
+    # Context providers (seconds before a provider is left out of the chat context)
+    CONTEXT_DEFAULT_TIMEOUT: float = 1.5
+    CONTEXT_PROVIDER_TIMEOUTS: Dict[str, float] = {}  # e.g. {"calendar": 2.0}
+
+    # Medication schedule index (users kept in memory per process)
+    SCHEDULE_INDEX_MAX_USERS: int = 50000
+    SCHEDULE_INDEX_TTL: int = 60  # Seconds before a cached schedule is re-read from the database
+
+    # Batched medication-log ingestion (events per request)
+    MEDICATION_LOG_BATCH_MAX: int = 500
+
+    # Medication reminders (background scheduler - enable on one worker per deployment)
+    REMINDERS_ENABLED: bool = True
+    REMINDER_HORIZON_MINUTES: int = 30  # Doses loaded into memory ahead of time
+    REMINDER_MAX_SLEEP: float = 30.0  # Longest sleep between clock checks (bounds drift)
+    REMINDER_LATE_GRACE: int = 300  # Seconds late before a missed reminder is dropped
+    REMINDER_PENDING_PER_USER: int = 5  # Most recent fired reminders returned to the app per poll
+    REMINDER_RETENTION_HOURS: int = 48  # Fired reminders (collected or not) kept this long
+
+    # Adherence rollups (scheduled rows materialized ahead of logged doses)
+    ADHERENCE_MATERIALIZE_INTERVAL: int = 60 * 60  # Seconds between runs
+    ADHERENCE_BACKFILL_DAYS: int = 7  # Days filled in on startup (covers downtime)
+
+    # Location ingestion (in-memory recent fixes, batched database writes)
+    LOCATION_RING_SIZE: int = 120  # Recent fixes kept per user
+    LOCATION_MAX_USERS: int = 50000  # Users with recent fixes kept in memory
+    LOCATION_FLUSH_BATCH: int = 1000  # Fixes per bulk insert
+    LOCATION_FLUSH_INTERVAL: float = 2.0  # Seconds between flushes of a partial batch
+    LOCATION_MAX_BUFFERED: int = 100000  # Unwritten fixes kept while the database is down
+    LOCATION_COMPACT_AFTER: int = 60 * 60  # Seconds before raw fixes are compacted into segments
+    LOCATION_COMPACT_INTERVAL: int = 10 * 60  # Seconds between compaction runs
+    LOCATION_COMPACT_BATCH: int = 50000  # Raw fixes read per compaction pass
+    LOCATION_SIMPLIFY_TOLERANCE_M: float = 10.0  # Douglas-Peucker tolerance for stored tracks
+    LOCATION_HISTORY_MAX_POINTS: int = 2000  # Upper bound for a requested track budget
+
+    # Geofences (arrival/departure detection)
+    GEOFENCE_CELL_DEGREES: float = 0.01  # Spatial index grid cell (~1km)
+    GEOFENCE_HYSTERESIS_M: float = 50.0  # Extra distance beyond the radius before an exit
+    GEOFENCE_MAX_ACCURACY_M: float = 200.0  # Fixes less accurate than this don't change state
+    GEOFENCE_MAX_USERS: int = 50000  # Users with geofences kept in memory
+    GEOFENCE_STATE_TTL: int = 60  # Seconds before fences and inside/outside state are re-read
+
+    # Vision image preprocessing (before photos are sent to Claude)
+    VISION_MAX_LONG_EDGE: int = 1568  # Pixels - larger images are downscaled by the API anyway
+    VISION_JPEG_QUALITY: int = 85
+    VISION_MIN_BRIGHTNESS: float = 40.0  # Mean gray level (0-255) below which a photo is too dark
+    VISION_MIN_SHARPNESS: float = 60.0  # Laplacian variance below which a photo is too blurry
+    VISION_PREPROCESS_WORKERS: int = 2  # Processes for decoding/resizing
+    VISION_UPLOAD_MAX_BYTES: int = 15 * 1024 * 1024  # Largest multipart photo accepted
+    VISION_STRUCTURED_OUTPUT: bool = True  # Tool-call JSON result instead of scraping the text
+
+    # Drug interactions (local index, then Claude for unseen pairs)
+    DRUG_INTERACTIONS_FILE: Optional[str] = None  # Defaults to app/data/drug_interactions.json
+    INTERACTION_MEMO_MAX: int = 10000  # Model verdicts remembered per process
+
+    # Vision result cache (same photo, same analysis, same medications)
+    VISION_CACHE_TTL: int = 24 * 60 * 60  # Seconds
+    VISION_CACHE_MAX_ENTRIES: int = 5000
+    VISION_CACHE_MAX_DISTANCE: int = 6  # Differing perceptual-hash bits still treated as the same photo
+    VISION_CACHE_TEXT_MAX_DISTANCE: int = 0  # Same, for notes/documents - different text hashes close
+    VISION_CACHE_LABEL_MAX_DISTANCE: int = 3  # Medication labels, only if OCR shows the same drug and strength
+
+    # Conversation history (server-side)
+    CONVERSATION_RECENT_TURNS: int = 6  # Max exchanges kept verbatim (the older half is summarized once full)
+    CONVERSATION_TOKEN_BUDGET: int = 2000  # Max history tokens sent per turn
+    CONVERSATION_SESSION_TTL: int = 12 * 60 * 60  # Seconds of inactivity before reset
+    CONVERSATION_MAX_SESSIONS: int = 10000
+    CONVERSATION_SUMMARY_MODEL: str = "claude-haiku-4-5"
+    CONVERSATION_SUMMARY_MAX_TOKENS: int = 300
+
+    # Repeat-question answer cache
+    ANSWER_CACHE_TTL: int = 10 * 60  # Seconds
+    ANSWER_CACHE_PHRASINGS: int = 3  # Distinct answers collected before serving from cache
+    ANSWER_CACHE_MAX_ENTRIES_PER_USER: int = 50
+    ANSWER_CACHE_MAX_USERS: int = 10000
+    ANSWER_CACHE_MIN_WORDS: int = 3  # Shorter messages ("okay", "yes please") are never cached
 
     # Google APIs
     GOOGLE_CLIENT_ID: str
@@ -43,6 +140,8 @@ class Settings(BaseSettings):
     # Caregiver
     CAREGIVER_EMAIL: Optional[str] = None
     CAREGIVER_PHONE: Optional[str] = None
+    EMERGENCY_RESPONSE_TIMEOUT: float = 3.0  # Seconds to wait for Claude before a fixed reply
+    EMERGENCY_ALERT_COOLDOWN: int = 5 * 60  # Seconds before the same user's caregiver is paged again
 
     class Config:
         env_file = ".env"
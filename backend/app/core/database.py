@@ -1,23 +1,79 @@
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import time
 from app.core.config import settings
+from app.core.metrics import POOL_OVERFLOWS, POOL_TIMEOUTS, POOL_WAIT, instrument_engine
+
+# Async drivers for the configured database (asyncpg for Postgres, aiosqlite for SQLite)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Rewrite a sync DATABASE_URL to use the matching async driver"""
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout wait time, overflow connections and timeouts"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        overflow_before = self.overflow()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started)
+            if self.overflow() > max(overflow_before, 0):
+                POOL_OVERFLOWS.inc()
+
+
+def engine_options(url: str) -> dict:
+    """Pool settings from config (SQLite keeps SQLAlchemy's default pool)"""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if not url.startswith("sqlite"):
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    return options
+
 
 # Create database engine
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+DATABASE_URL = async_database_url(settings.DATABASE_URL)
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+instrument_engine(engine.sync_engine)
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(
+    bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 # Base class for models
 Base = declarative_base()
 
 
+async def create_tables():
+    """Create any missing tables (run at startup)"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
 # Dependency for FastAPI routes
-def get_db():
+async def get_db():
     """Database session dependency"""
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
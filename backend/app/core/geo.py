@@ -0,0 +1,182 @@
+from collections import defaultdict
+from typing import Dict, Generic, List, Tuple, TypeVar
+import heapq
+import math
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEGREE_LAT = 111320.0
+
+T = TypeVar("T")
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def meters_per_degree_lon(latitude: float) -> float:
+    return METERS_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 1e-6)
+
+
+class GridIndex(Generic[T]):
+    """
+    Fixed lat/lon grid for circles (geofences)
+    Each circle is registered in every cell its bounding box touches, so a point
+    lookup is one dict get and the candidates are only circles near that cell
+    """
+
+    def __init__(self, cell_degrees: float = 0.01):
+        self.cell_degrees = cell_degrees
+        self.cells: Dict[Tuple[int, int], List[T]] = defaultdict(list)
+
+    def cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (
+            math.floor(latitude / self.cell_degrees),
+            math.floor(longitude / self.cell_degrees),
+        )
+
+    def insert(self, item: T, latitude: float, longitude: float, radius_m: float):
+        dlat = radius_m / METERS_PER_DEGREE_LAT
+        dlon = radius_m / meters_per_degree_lon(latitude)
+        lat_lo, lon_lo = self.cell(latitude - dlat, longitude - dlon)
+        lat_hi, lon_hi = self.cell(latitude + dlat, longitude + dlon)
+        for i in range(lat_lo, lat_hi + 1):
+            for j in range(lon_lo, lon_hi + 1):
+                self.cells[(i, j)].append(item)
+
+    def candidates(self, latitude: float, longitude: float) -> List[T]:
+        return self.cells.get(self.cell(latitude, longitude), [])
+
+
+# Track points are (seconds, latitude, longitude)
+TrackPoint = Tuple[float, float, float]
+
+COORDINATE_SCALE = 100000  # 1e-5 degrees (~1m) per encoded unit
+
+
+def _offset_m(origin: TrackPoint, point: TrackPoint) -> Tuple[float, float]:
+    """Local equirectangular (x, y) meters of point from origin - fine at track scale"""
+    return (
+        (point[2] - origin[2]) * meters_per_degree_lon(origin[1]),
+        (point[1] - origin[1]) * METERS_PER_DEGREE_LAT,
+    )
+
+
+def _deviation_m(start: TrackPoint, end: TrackPoint, point: TrackPoint) -> float:
+    """Distance in meters from point to the segment start-end"""
+    ex, ey = _offset_m(start, end)
+    px, py = _offset_m(start, point)
+    length_sq = ex * ex + ey * ey
+    if length_sq == 0:
+        return math.hypot(px, py)
+    t = max(0.0, min(1.0, (px * ex + py * ey) / length_sq))
+    return math.hypot(px - t * ex, py - t * ey)
+
+
+def _farthest(points: List[TrackPoint], first: int, last: int) -> Tuple[float, int]:
+    worst, index = -1.0, first
+    for i in range(first + 1, last):
+        deviation = _deviation_m(points[first], points[last], points[i])
+        if deviation > worst:
+            worst, index = deviation, i
+    return worst, index
+
+
+def douglas_peucker(points: List[TrackPoint], tolerance_m: float) -> List[TrackPoint]:
+    """Drop points within tolerance_m of the simplified line (iterative, no recursion limit)"""
+    if len(points) < 3:
+        return list(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        worst, index = _farthest(points, first, last)
+        if worst > tolerance_m:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, kept in zip(points, keep) if kept]
+
+
+def simplify_to_budget(points: List[TrackPoint], max_points: int) -> List[TrackPoint]:
+    """
+    At most max_points, keeping the most significant turns
+    Top-down Douglas-Peucker: repeatedly split the span with the largest deviation
+    until the budget is spent
+    """
+    if len(points) <= max_points:
+        return list(points)
+    if max_points < 2:
+        return [points[-1]] if max_points == 1 else []
+
+    keep = {0, len(points) - 1}
+    heap: List[Tuple[float, int, int, int]] = []
+
+    def push(first: int, last: int):
+        if last - first >= 2:
+            worst, index = _farthest(points, first, last)
+            heapq.heappush(heap, (-worst, index, first, last))
+
+    push(0, len(points) - 1)
+    while heap and len(keep) < max_points:
+        _, index, first, last = heapq.heappop(heap)
+        keep.add(index)
+        push(first, index)
+        push(index, last)
+    return [points[i] for i in sorted(keep)]
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_track(points: List[TrackPoint]) -> bytes:
+    """Delta + zigzag varint encoding: whole seconds and 1e-5 degree coordinates"""
+    out = bytearray()
+    previous = (0, 0, 0)
+    for seconds, latitude, longitude in points:
+        current = (
+            int(round(seconds)),
+            int(round(latitude * COORDINATE_SCALE)),
+            int(round(longitude * COORDINATE_SCALE)),
+        )
+        for value, before in zip(current, previous):
+            _write_varint(out, _zigzag(value - before))
+        previous = current
+    return bytes(out)
+
+
+def decode_track(data: bytes) -> List[TrackPoint]:
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append((value >> 1) ^ -(value & 1))
+        value = shift = 0
+
+    points = []
+    seconds = latitude = longitude = 0
+    for i in range(0, len(values) - 2, 3):
+        seconds += values[i]
+        latitude += values[i + 1]
+        longitude += values[i + 2]
+        points.append((seconds, latitude / COORDINATE_SCALE, longitude / COORDINATE_SCALE))
+    return points
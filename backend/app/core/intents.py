@@ -0,0 +1,177 @@
+from typing import Dict, List, Optional, Set, Tuple
+import json
+import re
+from app.core.config import settings
+
+# Phrase tables, in priority order. A trailing "*" matches any word ending
+# ("appointment*" matches "appointments"); everything else is a whole-word match.
+ACTION_INTENTS: List[Tuple[str, List[str]]] = [
+    ("send_message", ["text", "texts", "texting", "send a message", "send message", "message*"]),
+    ("make_call", ["call", "calls", "calling", "phone*"]),
+    ("create_reminder", ["schedule*", "appointment*", "remind me"]),
+    (
+        "emergency_alert",
+        ["help*", "emergency", "emergencies", "hurt*", "fall", "falls", "falling", "fallen", "fell", "scared"],
+    ),
+]
+
+# Emergencies clear enough to page the caregiver without asking. The broader
+# emergency_alert words above ("help", "scared") only offer to contact them
+URGENT_PHRASES = [
+    "i fell",
+    "fell down",
+    "fell over",
+    "i've fallen",
+    "i have fallen",
+    "i'm falling",
+    "i am falling",
+    "had a fall",
+    "can't get up",
+    "cant get up",
+    "cannot get up",
+    "chest pain*",
+    "can't breathe",
+    "cant breathe",
+    "cannot breathe",
+    "heart attack",
+    "bleeding",
+    "call 911",
+    "ambulance",
+    "emergency",
+]
+
+WARNING_PHRASES = [
+    "warning*",
+    "caution*",
+    "do not",
+    "danger*",
+    "interaction*",
+    "contraindicat*",
+    "allerg*",
+    "side effect*",
+]
+
+SUGGESTION_PHRASES = [
+    "what to do",
+    "recommend*",
+    "suggest*",
+    "should",
+    "consider*",
+    "next step*",
+]
+
+MEDICATION_FIELDS: List[Tuple[str, List[str]]] = [
+    ("name", ["medication name", "drug name", "what it is"]),
+    ("dosage", ["dosage", "dose", "strength"]),
+    ("frequency", ["frequency", "how often", "take"]),
+    ("instructions", ["instructions", "how to take"]),
+]
+
+
+def _fold(text: str) -> str:
+    """Lowercase, with typographic apostrophes (phone keyboards) as plain ones - same length"""
+    return text.lower().replace("\u2019", "'")
+
+
+def _phrase_pattern(phrase: str) -> str:
+    """Regex for one phrase: whole words, any whitespace between them"""
+    words = [re.escape(w) for w in phrase.rstrip("*").split()]
+    return r"\s+".join(words) + (r"\w*" if phrase.endswith("*") else r"\b")
+
+
+class IntentMatcher:
+    """
+    All phrases of all intents compiled into one regex, built once
+    The text is lowercased (and apostrophes folded) once and scanned once. The alternation is kept flat
+    (no per-intent groups or IGNORECASE) so the regex engine can skip ahead
+    quickly; the few hits are mapped back to their intent afterwards.
+    """
+
+    def __init__(self, intents: List[Tuple[str, List[str]]]):
+        self.names = [name for name, _ in intents]
+        self.exact: Dict[str, int] = {}
+        self.prefixes: List[Tuple[str, int]] = []
+
+        phrases = []
+        for i, (_, intent_phrases) in enumerate(intents):
+            for phrase in intent_phrases:
+                phrase = phrase.lower()
+                phrases.append(phrase)
+                if phrase.endswith("*"):
+                    self.prefixes.append((" ".join(phrase.rstrip("*").split()), i))
+                else:
+                    self.exact.setdefault(" ".join(phrase.split()), i)
+
+        # Longest phrases first so "send message" wins over "message"
+        phrases.sort(key=len, reverse=True)
+        self.pattern = re.compile("|".join(_phrase_pattern(p) for p in phrases))
+
+    def _hits(self, lowered: str):
+        for m in self.pattern.finditer(lowered):
+            start = m.start()
+            # Leading word boundary ("call" must not match inside "recall")
+            if start and (lowered[start - 1].isalnum() or lowered[start - 1] == "_"):
+                continue
+            yield m
+
+    def _indexes(self, text: str) -> Set[int]:
+        found: Set[int] = set()
+        for m in self._hits(_fold(text)):
+            matched = " ".join(m.group().split())
+            index = self.exact.get(matched)
+            if index is None:
+                index = next(i for prefix, i in self.prefixes if matched.startswith(prefix))
+            found.add(index)
+        return found
+
+    def matches(self, text: str) -> Set[str]:
+        """Every intent that appears in the text"""
+        return {self.names[i] for i in self._indexes(text)}
+
+    def first(self, text: str) -> Optional[str]:
+        """Highest-priority intent that appears in the text"""
+        indexes = self._indexes(text)
+        return self.names[min(indexes)] if indexes else None
+
+    def search(self, text: str) -> bool:
+        """True if any phrase appears in the text"""
+        return next(self._hits(_fold(text)), None) is not None
+
+    def lines(self, text: str) -> List[str]:
+        """Lines of the text containing any phrase, found with a single scan"""
+        lowered = _fold(text)
+        if len(lowered) != len(text):
+            # Lowercasing changed offsets (rare non-ASCII case) - go line by line
+            return [line for line in text.split("\n") if self.search(line)]
+
+        found = []
+        line_end = -1
+        for m in self._hits(lowered):
+            if m.start() <= line_end:
+                continue  # Already have this line
+            line_start = lowered.rfind("\n", 0, m.start()) + 1
+            line_end = lowered.find("\n", m.start())
+            if line_end == -1:
+                line_end = len(text)
+            found.append(text[line_start:line_end])
+        return found
+
+
+def _load_overrides() -> Dict:
+    if not settings.INTENTS_FILE:
+        return {}
+    with open(settings.INTENTS_FILE) as f:
+        return json.load(f)
+
+
+def load_matcher(table: str, default) -> IntentMatcher:
+    """
+    Build a matcher from a default table or its override in INTENTS_FILE
+    Tables are either an ordered {intent: [phrases]} mapping or a flat phrase list
+    """
+    intents = _load_overrides().get(table, default)
+    if isinstance(intents, dict):
+        intents = list(intents.items())
+    elif intents and isinstance(intents[0], str):
+        intents = [(table, intents)]
+    return IntentMatcher(intents)
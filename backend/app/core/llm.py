@@ -0,0 +1,174 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List
+import httpx
+from anthropic import AsyncAnthropic
+from app.core.config import settings
+from app.core.metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY, record_usage
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Build the shared, keep-alive HTTP connection pool for Claude calls"""
+    limits = httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        settings.LLM_TIMEOUT,
+        connect=settings.LLM_CONNECT_TIMEOUT,
+    )
+
+    try:
+        return httpx.AsyncClient(
+            http2=settings.LLM_HTTP2, limits=limits, timeout=timeout
+        )
+    except ImportError:
+        # HTTP/2 needs the optional 'h2' package - fall back to HTTP/1.1
+        print("h2 not installed, using HTTP/1.1 for Claude API")
+        return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+# Shortest prefix Claude caches for Sonnet/Opus (Haiku needs 2048) - a breakpoint on a
+# shorter prefix is accepted but never creates or reads a cache entry
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+
+def cached_text(text: str) -> Dict:
+    """
+    Text content block marked as a prompt-cache breakpoint
+    Only useful if everything up to and including it is at least PROMPT_CACHE_MIN_TOKENS
+    """
+    return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
+
+
+def mark_cached_prefix(messages: List[Dict]) -> List[Dict]:
+    """
+    Mark the last message of a stable conversation prefix as cacheable
+    Returns a copy - the caller's messages are not modified
+    """
+    if not messages:
+        return []
+
+    messages = list(messages)
+    last = dict(messages[-1])
+    content = last.get("content")
+
+    if isinstance(content, str):
+        last["content"] = [cached_text(content)]
+    elif isinstance(content, list) and content:
+        blocks = list(content)
+        blocks[-1] = {**blocks[-1], "cache_control": {"type": "ephemeral"}}
+        last["content"] = blocks
+
+    messages[-1] = last
+    return messages
+
+
+def usage_to_dict(usage) -> Dict[str, int]:
+    """Token usage including prompt-cache reads and writes"""
+    return {
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+        "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", None)
+        or 0,
+    }
+
+
+class PromptCacheStats:
+    """Aggregate prompt-cache effectiveness across all Claude calls"""
+
+    def __init__(self):
+        self.requests = 0
+        self.cache_hits = 0
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+
+    def record(self, usage: Dict[str, int]):
+        self.requests += 1
+        self.input_tokens += usage["input_tokens"]
+        self.cache_read_tokens += usage["cache_read_input_tokens"]
+        self.cache_write_tokens += usage["cache_creation_input_tokens"]
+        if usage["cache_read_input_tokens"]:
+            self.cache_hits += 1
+
+    def snapshot(self) -> Dict:
+        total_prompt = self.input_tokens + self.cache_read_tokens + self.cache_write_tokens
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "request_hit_rate": self.cache_hits / self.requests if self.requests else 0.0,
+            "input_tokens": self.input_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "token_hit_rate": self.cache_read_tokens / total_prompt if total_prompt else 0.0,
+        }
+
+
+class LLMClient:
+    """
+    Shared async Claude client
+    One connection pool and one concurrency cap for every service in the process
+    """
+
+    def __init__(self):
+        self.http_client = _build_http_client()
+        self.client = AsyncAnthropic(
+            api_key=settings.ANTHROPIC_API_KEY,
+            base_url=settings.ANTHROPIC_BASE_URL,
+            max_retries=settings.LLM_MAX_RETRIES,
+            http_client=self.http_client,
+        )
+        self._semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        self.cache_stats = PromptCacheStats()
+
+    async def create_message(self, provider: str = "llm", **kwargs):
+        """
+        Call messages.create without blocking the event loop
+        provider labels the upstream latency metric (e.g. "llm", "vision")
+        """
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                response = await self.client.messages.create(**kwargs)
+            except Exception:
+                UPSTREAM_ERRORS.inc(provider)
+                raise
+            finally:
+                UPSTREAM_LATENCY.observe(time.perf_counter() - started, provider)
+
+        self._record_usage(response.usage)
+        return response
+
+    @asynccontextmanager
+    async def stream_message(self, provider: str = "llm", **kwargs):
+        """Open a messages.stream() and hold a concurrency slot until it closes"""
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                async with self.client.messages.stream(**kwargs) as stream:
+                    yield stream
+                    final_message = await stream.get_final_message()
+            except Exception:
+                UPSTREAM_ERRORS.inc(provider)
+                raise
+            finally:
+                UPSTREAM_LATENCY.observe(time.perf_counter() - started, provider)
+
+        self._record_usage(final_message.usage)
+
+    def _record_usage(self, usage):
+        usage = usage_to_dict(usage)
+        self.cache_stats.record(usage)
+        record_usage(usage)
+
+    async def close(self):
+        """Close pooled connections (called on app shutdown)"""
+        await self.client.close()
+
+
+# Singleton instance
+llm_client = LLMClient()
@@ -0,0 +1,219 @@
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+import bisect
+import time
+from sqlalchemy import event
+
+# Default latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# ASGI scope of the request being handled, so deep code (e.g. the LLM client)
+# can attribute tokens to an endpoint without threading it through every call
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+_registry: List["_Metric"] = []
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.series: Dict[Tuple[str, ...], object] = {}
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter - a dict increment per call"""
+
+    kind = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1):
+        self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for values, total in self.series.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Point-in-time value, read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, read: Callable[[], float]):
+        super().__init__(name, description)
+        self.read = read
+
+    def render(self) -> List[str]:
+        return super().render() + [f"{self.name} {self.read()}"]
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram - one bisect and three increments per observation"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *label_values: str):
+        series = self.series.get(label_values)
+        if series is None:
+            # Per-bucket counts (non-cumulative), then sum and count
+            series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for values, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                labels = _format_labels(self.labels, values, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {series[-2]}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("route", "method")
+)
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status", ("route", "status"))
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds", "Latency of upstream calls by provider", ("provider",)
+)
+UPSTREAM_ERRORS = Counter("upstream_errors_total", "Failed upstream calls by provider", ("provider",))
+TOKENS = Counter("llm_tokens_total", "Claude tokens by endpoint and kind", ("endpoint", "kind"))
+ERRORS = Counter("app_errors_total", "Handled application errors by source", ("source",))
+
+# Database connection pool
+POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool")
+POOL_OVERFLOWS = Counter("db_pool_overflow_total", "Checkouts that opened an overflow connection")
+POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that timed out waiting for a connection")
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+CONNECTION_AGE = Histogram(
+    "db_connection_age_seconds",
+    "Age of connections at checkout",
+    buckets=(1, 10, 60, 300, 900, 1800, 3600, 7200),
+)
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format"""
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _route_paths(app) -> Dict:
+    paths = getattr(app.state, "metrics_route_paths", None)
+    if paths is None:
+        paths = {r.endpoint: r.path for r in app.routes if hasattr(r, "endpoint")}
+        app.state.metrics_route_paths = paths
+    return paths
+
+
+def route_label(scope: Optional[dict]) -> str:
+    """Route template (e.g. /api/medications/{user_id}) - bounded label cardinality"""
+    if not scope or "endpoint" not in scope:
+        return "unmatched"
+    return _route_paths(scope["app"]).get(scope["endpoint"], "unmatched")
+
+
+def record_usage(usage: Dict[str, int]):
+    """Count Claude tokens against the endpoint currently being served"""
+    endpoint = route_label(current_scope.get())
+    for kind, count in usage.items():
+        if count:
+            TOKENS.inc(endpoint, kind.replace("_tokens", ""), amount=count)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every request, including streamed bodies"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        token = current_scope.set(scope)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_scope.reset(token)
+            route = route_label(scope)
+            REQUEST_LATENCY.observe(time.perf_counter() - started, route, scope["method"])
+            REQUESTS.inc(route, str(status))
+
+
+def instrument_engine(engine):
+    """Time every SQL statement as the 'db' upstream, and track pool checkouts"""
+
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        Gauge("db_pool_checked_out", "Connections currently checked out", pool.checkedout)
+        Gauge("db_pool_size", "Configured pool size", pool.size)
+        Gauge("db_pool_overflow", "Current overflow (negative while under pool size)", pool.overflow)
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        connection_record.info["created_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKOUTS.inc()
+        created_at = connection_record.info.get("created_at")
+        if created_at is not None:
+            CONNECTION_AGE.observe(time.monotonic() - created_at)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        UPSTREAM_LATENCY.observe(time.perf_counter() - conn.info["query_started"].pop(), "db")
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+        UPSTREAM_ERRORS.inc("db")
@@ -1,18 +1,37 @@
-from fastapi import FastAPI, HTTPException, Depends, File, UploadFile
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.datastructures import FormData, UploadFile as FormFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from datetime import date, datetime, timedelta
+from pydantic import BaseModel, Field
 from app.core.config import settings
-from app.core.database import get_db, engine, Base
+from app.core.database import get_db, create_tables
+from app.core.llm import llm_client
+from app.core import metrics
 from app.services.ai_service import ai_assistant
 from app.services.vision_service import vision_service
-from app.models.medication import User, Medication, MedicationLog, ApprovedContact
-import base64
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+from app.services.image_pipeline import ImageRejected, image_pipeline
+from app.services.vision_cache import vision_cache
+from app.services.interaction_index import interaction_index
+from app.services.conversation_store import conversation_store
+from app.services.answer_cache import answer_cache
+from app.services.notification_service import notification_service
+from app.services.context_service import context_service
+from app.services.schedule_index import schedule_index
+from app.services.adherence_service import adherence_service
+from app.services.medication_log_service import medication_log_service, to_utc_naive
+from app.services.medication_schedule_service import medication_schedule_service
+from app.services.reminder_scheduler import reminder_scheduler
+from app.services.location_store import location_store, parse_fix_time
+from app.services.geofence_service import geofence_service
+from app.services.location_history import location_history
+from app.models.medication import User, Medication, MedicationLog, ApprovedContact, Geofence
+import json
+import time
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -31,6 +50,34 @@ app.add_middleware(
 )
 
 
+# Request latency / status metrics for every route (served at /metrics)
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+@app.on_event("startup")
+async def startup():
+    """Create database tables (development only - production schema comes from migrations)"""
+    if settings.AUTO_CREATE_TABLES:
+        await create_tables()
+    if settings.REMINDERS_ENABLED:
+        reminder_scheduler.start()
+    location_store.start()
+    location_history.start()
+    adherence_service.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background work and release pooled upstream connections"""
+    await reminder_scheduler.stop()
+    await adherence_service.stop()
+    await location_history.stop()
+    await location_store.stop()
+    await llm_client.close()
+    await notification_service.close()
+    image_pipeline.close()
+
+
 # ============================================================================
 # REQUEST/RESPONSE MODELS
 # ============================================================================
@@ -39,6 +86,7 @@ app.add_middleware(
 class ChatRequest(BaseModel):
     message: str
     user_id: int
+    # Optional - omit to use the server-side conversation for this user
     conversation_history: Optional[List[dict]] = []
 
 
@@ -84,6 +132,20 @@ class MedicationResponse(BaseModel):
         from_attributes = True
 
 
+class MedicationLogEvent(BaseModel):
+    idempotency_key: str = Field(..., min_length=1, max_length=128)  # Generated by the client
+    medication_id: int
+    status: Literal["taken", "skipped"] = "taken"
+    taken_at: datetime  # Client time of the event (offset-aware or UTC)
+    confirmed_by: Optional[str] = "user"
+    notes: Optional[str] = None
+
+
+class MedicationLogBatch(BaseModel):
+    user_id: int
+    events: List[MedicationLogEvent] = Field(..., max_length=settings.MEDICATION_LOG_BATCH_MAX)
+
+
 class LocationUpdate(BaseModel):
     user_id: int
     latitude: float
@@ -92,6 +154,28 @@ class LocationUpdate(BaseModel):
     timestamp: Optional[str] = None
 
 
+class GeofenceCreate(BaseModel):
+    name: str
+    kind: Literal["home", "doctor", "pharmacy", "other"] = "other"
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    radius_m: float = Field(150.0, gt=0, le=5000)
+    notify_caregiver: bool = True
+
+
+class GeofenceResponse(BaseModel):
+    id: int
+    name: str
+    kind: str
+    latitude: float
+    longitude: float
+    radius_m: float
+    notify_caregiver: bool
+
+    class Config:
+        from_attributes = True
+
+
 # ============================================================================
 # HEALTH CHECK
 # ============================================================================
@@ -121,32 +205,114 @@ async def health_check():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/prompt-cache")
+async def prompt_cache_stats():
+    """Aggregate Claude prompt-cache hit rates since process start"""
+    return llm_client.cache_stats.snapshot()
+
+
+@app.get("/health/emergency")
+async def emergency_stats():
+    """Caregiver alert counts and request-to-dispatch latency"""
+    return notification_service.stats()
+
+
+@app.get("/health/context")
+async def context_provider_stats():
+    """Per-provider context fetch latency, timeouts and errors"""
+    return context_service.latency_stats()
+
+
+@app.get("/health/answer-cache")
+async def answer_cache_stats():
+    """Repeat-question answer cache hit rate since process start"""
+    return answer_cache.stats()
+
+
+@app.get("/health/vision")
+async def vision_stats():
+    """Image preprocessing (photos rejected, bytes saved) and result cache hit rate"""
+    return {**image_pipeline.stats(), "cache": vision_cache.stats()}
+
+
+@app.get("/health/interactions")
+async def interaction_stats():
+    """Interaction checks answered locally vs by Claude"""
+    return interaction_index.stats()
+
+
+@app.get("/health/reminders")
+async def reminder_stats():
+    """Reminder scheduler: doses armed, fired, and firing lag"""
+    return reminder_scheduler.stats()
+
+
+@app.get("/health/location")
+async def location_store_stats():
+    """Location fixes received, written in batches, still buffered, and compacted"""
+    return {**location_store.stats(), "history": location_history.stats()}
+
+
+@app.get("/health/geofences")
+async def geofence_stats():
+    """Geofence evaluations per location update and their cost"""
+    return geofence_service.stats()
+
+
 # ============================================================================
 # AI CHAT ENDPOINT (PRIMARY INTERFACE)
 # ============================================================================
 
 
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
     """
     Main AI chat endpoint
     Handles all user interactions through Claude
     """
+    started = time.perf_counter()
     try:
         # Get user
-        user = db.query(User).filter(User.id == request.user_id).first()
+        user = await db.get(User, request.user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
+        # Emergencies alert the caregiver before anything else happens
+        emergency = ai_assistant.detect_emergency(request.message)
+        if emergency:
+            notification_service.dispatch_emergency(user, request.message, started)
+
         # Gather context (calendar, medications, finances, etc.)
         context = await gather_user_context(user, db)
-
-        # Get AI response
-        ai_response = await ai_assistant.chat(
-            user_message=request.message,
-            conversation_history=request.conversation_history,
-            context=context,
-        )
+        history = resolve_history(request, context)
+
+        if emergency:
+            ai_response = await ai_assistant.emergency_chat(
+                user_message=request.message,
+                conversation_history=history,
+                context=context,
+            )
+        else:
+            # Repeated questions are answered from the cache once enough phrasings exist
+            ai_response = answer_cache.get(request.user_id, request.message, history, context)
+
+            if ai_response is None:
+                # Get AI response
+                ai_response = await ai_assistant.chat(
+                    user_message=request.message,
+                    conversation_history=history,
+                    context=context,
+                )
+                answer_cache.put(request.user_id, request.message, history, context, ai_response)
+
+        if not ai_response.get("error"):
+            conversation_store.append(request.user_id, request.message, ai_response["response"])
 
         return ChatResponse(
             response=ai_response["response"],
@@ -157,46 +323,103 @@ async def chat(request: ChatRequest, db: Session = Depends(get_db)):
 
     except Exception as e:
         print(f"Error in chat endpoint: {e}")
+        metrics.ERRORS.inc("chat")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def gather_user_context(user: User, db: Session) -> dict:
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest, db: AsyncSession = Depends(get_db)):
     """
-    Gather all relevant context for the AI
-    This is what makes the system "aware" of the user's situation
+    Streaming AI chat endpoint (Server-Sent Events)
+    Sends tokens as they arrive and speech-ready sentences as they complete,
+    so the voice front-end can start speaking before the full reply is done
     """
-    from datetime import datetime
-
-    context = {
-        "user_name": user.name,
-        "current_time": datetime.now().strftime("%I:%M %p"),
-    }
+    started = time.perf_counter()
+    user = await db.get(User, request.user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    # Get today's medications
-    current_hour = datetime.now().strftime("%H:00")
-    medications = (
-        db.query(Medication)
-        .filter(
-            Medication.user_id == user.id,
-            Medication.active == True,
-        )
-        .all()
+    emergency = ai_assistant.detect_emergency(request.message)
+    if emergency:
+        # Pages the caregiver unless they were already paged within the alert cooldown
+        notification_service.dispatch_emergency(user, request.message, started)
+
+    context = await gather_user_context(user, db)
+    history = resolve_history(request, context)
+
+    cached = None if emergency else answer_cache.get(request.user_id, request.message, history, context)
+
+    async def event_stream():
+        if emergency:
+            # Tell the front-end straight away that help is on the way
+            yield _sse("emergency", {"alert_dispatched": True})
+
+        if emergency:
+            # Deadline-bounded, with a fixed reply and the alert action as in /api/chat
+            events = ai_assistant.emergency_chat_stream(
+                user_message=request.message,
+                conversation_history=history,
+                context=context,
+            )
+        elif cached is not None:
+            events = ai_assistant.replay_stream(cached)
+        else:
+            events = ai_assistant.chat_stream(
+                user_message=request.message,
+                conversation_history=history,
+                context=context,
+            )
+
+        async for event in events:
+            if event["type"] == "done":
+                if cached is None:
+                    answer_cache.put(request.user_id, request.message, history, context, event)
+                if not event.get("error"):
+                    conversation_store.append(request.user_id, request.message, event["response"])
+            yield _sse(event.pop("type"), event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    medications_due = [
-        {"name": med.name, "dosage": med.dosage}
-        for med in medications
-        if current_hour in (med.times or [])
-    ]
 
-    if medications_due:
-        context["medications_due"] = medications_due
+def resolve_history(request: ChatRequest, context: dict) -> List[dict]:
+    """
+    Pick the history to send to Claude
+    Older clients upload the full transcript; otherwise the server-side store supplies
+    recent turns within the token budget and a summary of anything older
+    """
+    if request.conversation_history:
+        return request.conversation_history
+
+    summary = conversation_store.get_summary(request.user_id)
+    if summary:
+        context["conversation_summary"] = summary
 
-    # TODO: Add calendar integration
-    # TODO: Add banking integration
-    # TODO: Add messaging integration
+    return conversation_store.get_history(request.user_id)
 
-    return context
+
+@app.delete("/api/chat/history/{user_id}")
+async def clear_chat_history(user_id: int):
+    """Start a fresh conversation for a user"""
+    conversation_store.clear(user_id)
+    return {"status": "cleared", "user_id": user_id}
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def gather_user_context(user: User, db: AsyncSession) -> dict:
+    """
+    Gather all relevant context for the AI
+    This is what makes the system "aware" of the user's situation
+    Providers (medications, calendar, banking) are fetched concurrently with deadlines
+    """
+    return await context_service.gather(user, db)
 
 
 # ============================================================================
@@ -205,55 +428,126 @@ async def gather_user_context(user: User, db: Session) -> dict:
 
 
 @app.post("/api/vision/analyze", response_model=VisionAnalysisResponse)
-async def analyze_image(request: VisionAnalysisRequest, db: Session = Depends(get_db)):
+async def analyze_image(request: VisionAnalysisRequest, db: AsyncSession = Depends(get_db)):
     """
     Analyze image using Claude Vision API
     Extracts information from prescriptions, medication labels, food labels, etc.
     """
     try:
         # Get user's current medications for interaction checking
-        medications = (
-            db.query(Medication)
-            .filter(Medication.user_id == request.user_id, Medication.active == True)
-            .all()
-        )
-
-        user_meds = [
-            {"name": med.name, "dosage": med.dosage, "frequency": med.frequency}
-            for med in medications
-        ]
+        user_meds = await medications_for_vision(request.user_id, db)
 
         # Analyze image
         result = await vision_service.analyze_image(
             image_data=request.image_data,
             analysis_type=request.analysis_type,
             user_medications=user_meds,
+            user_id=request.user_id,
         )
 
         return VisionAnalysisResponse(**result)
 
+    except ImageRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         print(f"Error in vision analysis: {e}")
+        metrics.ERRORS.inc("vision")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/vision/analyze/upload", response_model=VisionAnalysisResponse)
+async def analyze_image_upload(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Analyze an image sent as multipart/form-data (fields: image, analysis_type, user_id)
+    The photo is streamed to a spooled temp file (on disk past 1MB) under a size cap
+    and passed on as raw bytes - no base64 inflation or JSON parsing of the image
+    """
+    max_bytes = settings.VISION_UPLOAD_MAX_BYTES
+    # Room for the multipart framing and the two small fields
+    body_limit = max_bytes + 64 * 1024
+
+    # Reject oversized bodies before reading them
+    try:
+        content_length = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    if content_length > body_limit:
+        raise HTTPException(status_code=413, detail=f"Image must be under {max_bytes} bytes")
+
+    form = await parse_upload(request, body_limit)
+    try:
+        image = form.get("image")
+        if not isinstance(image, FormFile):
+            raise HTTPException(status_code=422, detail="Missing 'image' file field")
+        if image.size is not None and image.size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Image must be under {max_bytes} bytes")
+        try:
+            user_id = int(form.get("user_id", ""))
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Missing or invalid 'user_id' field")
+        analysis_type = str(form.get("analysis_type") or "general")
+
+        user_meds = await medications_for_vision(user_id, db)
+        raw = await image.read()
+        result = await vision_service.analyze_image_bytes(raw, analysis_type, user_meds, user_id)
+        return VisionAnalysisResponse(**result)
+
+    except HTTPException:
+        raise
+    except ImageRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except Exception as e:
+        print(f"Error in vision analysis: {e}")
+        metrics.ERRORS.inc("vision")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await form.close()
+
+
+async def parse_upload(request: Request, body_limit: int) -> FormData:
+    """
+    Parse a multipart body, counting bytes as chunks arrive
+    Chunked uploads carry no Content-Length, so the cap is enforced on the stream
+    itself - the request fails with 413 as soon as it is exceeded, before the rest
+    of the body is read or spooled
+    """
+
+    async def capped_stream():
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_limit:
+                raise HTTPException(status_code=413, detail="Upload too large")
+            yield chunk
+
+    parser = MultiPartParser(request.headers, capped_stream(), max_files=1, max_fields=2)
+    try:
+        return await parser.parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+
+async def medications_for_vision(user_id: int, db: AsyncSession) -> List[dict]:
+    """User's active medications, as passed to vision analysis for interaction checks"""
+    medications = (
+        await db.execute(
+            select(Medication).where(Medication.user_id == user_id, Medication.active == True)
+        )
+    ).scalars().all()
+    return [
+        {"name": med.name, "dosage": med.dosage, "frequency": med.frequency}
+        for med in medications
+    ]
+
+
 @app.post("/api/vision/check-interactions")
 async def check_medication_interactions(
-    medication: str, user_id: int, db: Session = Depends(get_db)
+    medication: str, user_id: int, db: AsyncSession = Depends(get_db)
 ):
     """Check if a new medication has interactions with current medications"""
     try:
         # Get current medications
-        medications = (
-            db.query(Medication)
-            .filter(Medication.user_id == user_id, Medication.active == True)
-            .all()
-        )
-
-        user_meds = [
-            {"name": med.name, "dosage": med.dosage, "frequency": med.frequency}
-            for med in medications
-        ]
+        user_meds = await medications_for_vision(user_id, db)
 
         # Check interactions
         result = await vision_service.check_medication_interactions(
@@ -264,6 +558,7 @@ async def check_medication_interactions(
 
     except Exception as e:
         print(f"Error checking interactions: {e}")
+        metrics.ERRORS.inc("interactions")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -273,54 +568,144 @@ async def check_medication_interactions(
 
 
 @app.post("/api/location/update")
-async def update_location(location: LocationUpdate, db: Session = Depends(get_db)):
+async def update_location(location: LocationUpdate, db: AsyncSession = Depends(get_db)):
     """
     Update user's current location
     Triggers geofencing checks and caregiver notifications if needed
+    The fix is buffered in memory and written to the database in batches
     """
     try:
         # Get user
-        user = db.query(User).filter(User.id == location.user_id).first()
+        user = await db.get(User, location.user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        # TODO: Store location in database
-        # TODO: Check geofences (home, doctor, pharmacy)
-        # TODO: Notify caregivers if leaving/arriving
+        fix = location_store.record(
+            user.id,
+            location.latitude,
+            location.longitude,
+            location.accuracy,
+            parse_fix_time(location.timestamp),
+        )
+
+        # Check geofences (home, doctor, pharmacy) and notify caregivers on arrival/departure
+        events = await geofence_service.evaluate(
+            user, db, location.latitude, location.longitude, location.accuracy, fix["recorded_at"]
+        )
+        # Persist the fences' inside/outside state before notifying anyone
+        await db.commit()
+        for event in events:
+            if event["notify_caregiver"]:
+                verb = "arrived at" if event["type"] == "enter" else "left"
+                notification_service.dispatch_sms(
+                    user.caregiver_phone or settings.CAREGIVER_PHONE,
+                    f"Care Companion: {user.name} {verb} {event['name']}",
+                )
 
-        # For now, just acknowledge
         return {
             "status": "location_updated",
             "latitude": location.latitude,
             "longitude": location.longitude,
-            "timestamp": location.timestamp,
+            "timestamp": fix["recorded_at"].isoformat(),
+            "geofence_events": events,
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error updating location: {e}")
+        metrics.ERRORS.inc("location")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/location/{user_id}")
-async def get_location(user_id: int, db: Session = Depends(get_db)):
-    """Get user's current location (for caregivers)"""
+async def get_location(user_id: int):
+    """Get user's current location (for caregivers) - served from memory"""
     try:
-        # TODO: Retrieve latest location from database
-        # For now, return placeholder
+        fix = await location_store.get_latest(user_id)
+        if fix is None:
+            raise HTTPException(status_code=404, detail="No location reported yet")
 
         return {
             "user_id": user_id,
-            "latitude": 0.0,
-            "longitude": 0.0,
-            "last_updated": None,
-            "message": "Location tracking not yet implemented",
+            "latitude": fix["latitude"],
+            "longitude": fix["longitude"],
+            "accuracy": fix["accuracy"],
+            "last_updated": fix["recorded_at"].isoformat(),
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting location: {e}")
+        metrics.ERRORS.inc("location")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/location/{user_id}/history")
+async def get_location_history(
+    user_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_points: int = 500,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    User's track over a time range (default: the last 24 hours), for caregivers
+    Downsampled to at most max_points, keeping the turns that matter
+    """
+    end = to_utc_naive(end) if end else datetime.utcnow()
+    start = to_utc_naive(start) if start else end - timedelta(hours=24)
+    if end <= start or end - start > timedelta(days=31):
+        raise HTTPException(status_code=400, detail="Time range must be 0-31 days")
+    if not 2 <= max_points <= settings.LOCATION_HISTORY_MAX_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"max_points must be 2-{settings.LOCATION_HISTORY_MAX_POINTS}",
+        )
+
+    points = await location_history.track(db, user_id, start, end, max_points)
+    return {"user_id": user_id, "start": start.isoformat(), "end": end.isoformat(), "points": points}
+
+
+@app.post("/api/geofences", response_model=GeofenceResponse)
+async def create_geofence(
+    geofence: GeofenceCreate, user_id: int, db: AsyncSession = Depends(get_db)
+):
+    """Add a place (home, doctor, pharmacy...) to watch for arrivals and departures"""
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    db_geofence = Geofence(user_id=user_id, **geofence.model_dump())
+    db.add(db_geofence)
+    await db.commit()
+    await db.refresh(db_geofence)
+    geofence_service.invalidate(user_id)
+    return db_geofence
+
+
+@app.get("/api/geofences/{user_id}", response_model=List[GeofenceResponse])
+async def get_geofences(user_id: int, db: AsyncSession = Depends(get_db)):
+    """Places watched for a user"""
+    return (
+        await db.execute(select(Geofence).where(Geofence.user_id == user_id))
+    ).scalars().all()
+
+
+@app.delete("/api/geofences/{geofence_id}")
+async def delete_geofence(geofence_id: int, db: AsyncSession = Depends(get_db)):
+    """Stop watching a place"""
+    geofence = await db.get(Geofence, geofence_id)
+    if not geofence:
+        raise HTTPException(status_code=404, detail="Geofence not found")
+
+    await db.delete(geofence)
+    await db.commit()
+    geofence_service.invalidate(geofence.user_id)
+    return {"status": "deleted", "geofence_id": geofence_id}
+
+
 # ============================================================================
 # MEDICATIONS ENDPOINTS
 # ============================================================================
@@ -328,9 +713,13 @@ async def get_location(user_id: int, db: Session = Depends(get_db)):
 
 @app.post("/api/medications", response_model=MedicationResponse)
 async def create_medication(
-    medication: MedicationCreate, user_id: int, db: Session = Depends(get_db)
+    medication: MedicationCreate, user_id: int, db: AsyncSession = Depends(get_db)
 ):
     """Add a new medication to user's schedule"""
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
     db_medication = Medication(
         user_id=user_id,
         name=medication.name,
@@ -341,46 +730,152 @@ async def create_medication(
         notes=medication.notes,
     )
     db.add(db_medication)
-    db.commit()
-    db.refresh(db_medication)
+    await db.flush()
+    await medication_schedule_service.sync_medication(db, db_medication, user)
+    await adherence_service.schedule_today(db, user, db_medication)
+    await db.commit()
+    await db.refresh(db_medication)
+    schedule_index.invalidate(user_id)
+    reminder_scheduler.rearm(user_id)
+    answer_cache.invalidate(user_id)
     return db_medication
 
 
 @app.get("/api/medications/{user_id}", response_model=List[MedicationResponse])
-async def get_medications(user_id: int, db: Session = Depends(get_db)):
+async def get_medications(user_id: int, db: AsyncSession = Depends(get_db)):
     """Get all active medications for a user"""
     medications = (
-        db.query(Medication)
-        .filter(Medication.user_id == user_id, Medication.active == True)
-        .all()
-    )
+        await db.execute(
+            select(Medication).where(Medication.user_id == user_id, Medication.active == True)
+        )
+    ).scalars().all()
     return medications
 
 
+@app.post("/api/medications/{medication_id}/deactivate")
+async def deactivate_medication(medication_id: int, db: AsyncSession = Depends(get_db)):
+    """Stop a medication (kept for history, removed from the schedule)"""
+    medication = await db.get(Medication, medication_id)
+    if not medication:
+        raise HTTPException(status_code=404, detail="Medication not found")
+
+    medication.active = False
+    user = await db.get(User, medication.user_id)
+    await medication_schedule_service.sync_medication(db, medication, user)
+    await db.commit()
+    schedule_index.invalidate(medication.user_id)
+    reminder_scheduler.rearm(medication.user_id)
+    answer_cache.invalidate(medication.user_id)
+    return {"status": "deactivated", "medication_id": medication_id}
+
+
+@app.get("/api/medications/{user_id}/schedule")
+async def get_medication_schedule(user_id: int, db: AsyncSession = Depends(get_db)):
+    """Doses due now and next, in the user's timezone (for the dashboard)"""
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    schedule = await schedule_index.get(user, db)
+    return {
+        "timezone": str(schedule.timezone),
+        "due_now": schedule.due_now(),
+        "next": schedule.next_doses(),
+    }
+
+
+@app.get("/api/medications/{user_id}/reminders")
+async def collect_medication_reminders(user_id: int, db: AsyncSession = Depends(get_db)):
+    """Reminders fired since the app last asked (each is returned once)"""
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    schedule = await schedule_index.get(user, db)
+    names = {d["medication_id"]: d for d in schedule.doses}
+    reminders = [
+        {
+            **r,
+            "name": names.get(r["medication_id"], {}).get("name"),
+            "dosage": names.get(r["medication_id"], {}).get("dosage"),
+        }
+        for r in await reminder_scheduler.collect(db, user_id)
+    ]
+    await db.commit()
+    return {"user_id": user_id, "reminders": reminders}
+
+
+@app.get("/api/medications/{user_id}/adherence")
+async def get_medication_adherence(
+    user_id: int,
+    start: date,
+    end: date,
+    period: Literal["day", "week"] = "day",
+    db: AsyncSession = Depends(get_db),
+):
+    """Doses taken vs scheduled per day or week (for caregivers)"""
+    if end < start or (end - start).days > 366:
+        raise HTTPException(status_code=400, detail="Date range must be 0-366 days")
+
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    series = await adherence_service.get_series(db, user, start, end, period)
+    return {"user_id": user_id, "period": period, "series": series}
+
+
 @app.post("/api/medications/{medication_id}/taken")
 async def mark_medication_taken(
-    medication_id: int, user_id: int, db: Session = Depends(get_db)
+    medication_id: int, user_id: int, db: AsyncSession = Depends(get_db)
 ):
     """Record that a medication was taken"""
+    user = await db.get(User, user_id)
+    medication = await db.get(Medication, medication_id)
+    if not user or not medication or medication.user_id != user_id:
+        raise HTTPException(status_code=404, detail="User or medication not found")
+
     log = MedicationLog(
         user_id=user_id,
         medication_id=medication_id,
+        taken_at=datetime.utcnow(),
         confirmed_by="user",
     )
     db.add(log)
-    db.commit()
+    await adherence_service.record_doses(db, user, medication, [log.taken_at])
+    await db.commit()
+    answer_cache.invalidate(user_id)
     return {"status": "recorded", "medication_id": medication_id}
 
 
+@app.post("/api/medications/logs/batch")
+async def ingest_medication_logs(batch: MedicationLogBatch, db: AsyncSession = Depends(get_db)):
+    """
+    Record many taken/skipped events in one round trip (offline queue drain)
+    Safe to retry: events whose idempotency key was already recorded are skipped
+    """
+    user = await db.get(User, batch.user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    result = await medication_log_service.ingest(
+        db, user, [event.model_dump() for event in batch.events]
+    )
+    await db.commit()
+    if result["accepted"]:
+        answer_cache.invalidate(user.id)
+    return {"user_id": user.id, **result}
+
+
 # ============================================================================
 # USER ENDPOINTS
 # ============================================================================
 
 
 @app.get("/api/users/{user_id}")
-async def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
     """Get user information"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -396,9 +891,11 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/api/contacts/{user_id}")
-async def get_approved_contacts(user_id: int, db: Session = Depends(get_db)):
+async def get_approved_contacts(user_id: int, db: AsyncSession = Depends(get_db)):
     """Get approved contacts for communication"""
-    contacts = db.query(ApprovedContact).filter(ApprovedContact.user_id == user_id).all()
+    contacts = (
+        await db.execute(select(ApprovedContact).where(ApprovedContact.user_id == user_id))
+    ).scalars().all()
 
     return [
         {
@@ -421,7 +918,7 @@ async def get_approved_contacts(user_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/api/calendar/today/{user_id}")
-async def get_today_calendar(user_id: int, db: Session = Depends(get_db)):
+async def get_today_calendar(user_id: int, db: AsyncSession = Depends(get_db)):
     """Get today's calendar events"""
     # TODO: Implement Google Calendar integration
     return {
@@ -436,7 +933,7 @@ async def get_today_calendar(user_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/api/banking/balance/{user_id}")
-async def get_balance(user_id: int, db: Session = Depends(get_db)):
+async def get_balance(user_id: int, db: AsyncSession = Depends(get_db)):
     """Get account balance"""
     # TODO: Implement Plaid integration
     return {
@@ -454,6 +951,7 @@ async def get_balance(user_id: int, db: Session = Depends(get_db)):
 async def global_exception_handler(request, exc):
     """Global error handler"""
     print(f"Unhandled exception: {exc}")
+    metrics.ERRORS.inc("unhandled")
     return JSONResponse(
         status_code=500,
         content={
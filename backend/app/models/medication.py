@@ -1,4 +1,17 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON, ForeignKey
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Boolean,
+    Float,
+    LargeBinary,
+    Date,
+    DateTime,
+    JSON,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -8,9 +21,13 @@ class Medication(Base):
     """Medication model for tracking prescriptions"""
 
     __tablename__ = "medications"
+    __table_args__ = (
+        # Hot filter: a user's active medications
+        Index("ix_medications_user_id_active", "user_id", "active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, nullable=False)
     name = Column(String, nullable=False)
     dosage = Column(String)
     frequency = Column(String)  # 'daily', 'twice_daily', 'weekly', etc.
@@ -28,18 +45,88 @@ class MedicationLog(Base):
     """Log of when medications were taken"""
 
     __tablename__ = "medication_logs"
+    __table_args__ = (
+        # History per user and per medication, newest first
+        Index("ix_medication_logs_user_id_taken_at", "user_id", "taken_at"),
+        Index("ix_medication_logs_medication_id_taken_at", "medication_id", "taken_at"),
+        # Client retries of the same event are ignored
+        UniqueConstraint("user_id", "idempotency_key", name="uq_medication_logs_user_idempotency_key"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, nullable=False)
     medication_id = Column(Integer, ForeignKey("medications.id"), nullable=False)
     taken_at = Column(DateTime, default=datetime.utcnow, index=True)
     confirmed_by = Column(String)  # 'user', 'caregiver', 'auto'
+    status = Column(String, nullable=False, default="taken")  # 'taken', 'skipped'
+    idempotency_key = Column(String, nullable=True)  # Client-generated, for offline retries
     notes = Column(String, nullable=True)
 
     # Relationship back to medication
     medication = relationship("Medication", back_populates="logs")
 
 
+class MedicationAdherenceDaily(Base):
+    """Doses taken vs scheduled per medication per day, updated as logs are written"""
+
+    __tablename__ = "medication_adherence_daily"
+    __table_args__ = (
+        # One row per user/day/medication; also serves date-range reads per user
+        UniqueConstraint("user_id", "day", "medication_id", name="uq_adherence_user_day_medication"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    medication_id = Column(Integer, ForeignKey("medications.id"), nullable=False)
+    day = Column(Date, nullable=False)  # Local date in the user's timezone
+    scheduled = Column(Integer, nullable=False, default=0)  # Doses scheduled that day
+    taken = Column(Integer, nullable=False, default=0)
+
+
+class MedicationScheduleSlot(Base):
+    """One scheduled dose time of an active medication, normalized from Medication.times"""
+
+    __tablename__ = "medication_schedule"
+    __table_args__ = (
+        # Cross-user "due in the next N minutes" is a range scan on utc_minute
+        Index("ix_medication_schedule_utc_minute", "utc_minute"),
+        Index("ix_medication_schedule_medication_id", "medication_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    medication_id = Column(Integer, ForeignKey("medications.id"), nullable=False)
+    local_minute = Column(Integer, nullable=False)  # Minutes after local midnight
+    days_of_week = Column(Integer, nullable=False, default=127)  # Local weekdays, bit 0 = Monday
+    timezone = Column(String, nullable=False, default="UTC")
+    utc_offset = Column(Integer, nullable=False, default=0)  # Minutes, as of the last refresh
+    utc_minute = Column(Integer, nullable=False)  # (local_minute - utc_offset) mod 1440
+
+
+class MedicationReminder(Base):
+    """
+    A fired dose reminder, kept until the user's app collects it
+    The unique (medication_id, due_at) row is also the claim on the dose - whichever
+    worker inserts it fires the reminder, every other worker skips it
+    """
+
+    __tablename__ = "medication_reminders"
+    __table_args__ = (
+        UniqueConstraint("medication_id", "due_at", name="uq_medication_reminders_medication_due"),
+        # A user's uncollected reminders
+        Index("ix_medication_reminders_user_id_collected_at", "user_id", "collected_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    medication_id = Column(Integer, ForeignKey("medications.id"), nullable=False)
+    due_at = Column(DateTime, nullable=False)  # UTC
+    local_time = Column(String, nullable=False)  # "HH:MM" in the user's timezone
+    timezone = Column(String, nullable=False)
+    fired_at = Column(DateTime, nullable=False)  # UTC
+    collected_at = Column(DateTime, nullable=True)  # Set when the app polls it
+
+
 class User(Base):
     """User model for the patient"""
 
@@ -70,7 +157,7 @@ class ApprovedContact(Base):
     __tablename__ = "approved_contacts"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     phone = Column(String, nullable=True)
     email = Column(String, nullable=True)
@@ -79,3 +166,53 @@ class ApprovedContact(Base):
     can_receive_messages = Column(Boolean, default=True)
     can_receive_calls = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class LocationFix(Base):
+    """One GPS fix reported by the user's phone (written in batches by the location store)"""
+
+    __tablename__ = "location_fixes"
+    __table_args__ = (
+        # Track for one user over a time range
+        Index("ix_location_fixes_user_id_recorded_at", "user_id", "recorded_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    accuracy = Column(Float, nullable=True)  # Meters
+    recorded_at = Column(DateTime, nullable=False)  # Device time, UTC
+    received_at = Column(DateTime, default=datetime.utcnow)
+
+
+class LocationSegment(Base):
+    """An hour (or less) of one user's compacted track - simplified, delta/varint encoded"""
+
+    __tablename__ = "location_segments"
+    __table_args__ = (Index("ix_location_segments_user_id_start_at", "user_id", "start_at"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    start_at = Column(DateTime, nullable=False)  # UTC; point times are seconds after this
+    end_at = Column(DateTime, nullable=False)
+    point_count = Column(Integer, nullable=False)  # Points kept after simplification
+    raw_count = Column(Integer, nullable=False)  # Fixes compacted into the segment
+    data = Column(LargeBinary, nullable=False)  # app.core.geo.encode_track
+
+
+class Geofence(Base):
+    """A place caregivers care about (home, doctor, pharmacy) - arrivals/departures are tracked"""
+
+    __tablename__ = "geofences"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    kind = Column(String, default="other")  # 'home', 'doctor', 'pharmacy', 'other'
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    radius_m = Column(Float, nullable=False, default=150.0)
+    notify_caregiver = Column(Boolean, default=True)
+    inside = Column(Boolean, nullable=True)  # User inside at the last accepted fix (None until evaluated)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,199 @@
+from collections import Counter
+from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta, timezone
+import asyncio
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.medication import MedicationAdherenceDaily, Medication, User
+from app.services.schedule_index import days_of_week, user_zone
+
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def scheduled_doses(medication: Medication, day: date, zone_name: str) -> int:
+    """Doses due on a local day - none before the medication was added or off its weekday"""
+    if medication.created_at:
+        added = medication.created_at.replace(tzinfo=timezone.utc)
+        if day < added.astimezone(user_zone(zone_name)).date():
+            return 0
+    if not days_of_week(medication, zone_name) & (1 << day.weekday()):
+        return 0
+    return len(medication.times or [])
+
+
+class AdherenceService:
+    """
+    Incrementally maintained "doses taken vs scheduled" rollups
+    Each logged dose bumps one (user, day, medication) row, and every active
+    medication gets its row for the day up front (materialize), so dashboards read
+    only rollup rows - including days nothing was taken and since-deactivated medications
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        days_back = settings.ADHERENCE_BACKFILL_DAYS  # Catch up on days missed while down
+        while True:
+            try:
+                async with SessionLocal() as db:
+                    await self.materialize(db, days_back=days_back)
+                    await db.commit()
+                days_back = 1  # Yesterday too, for users whose day ended since the last run
+            except Exception as e:
+                print(f"Error materializing adherence rollups: {e}")
+            await asyncio.sleep(settings.ADHERENCE_MATERIALIZE_INTERVAL)
+
+    async def materialize(self, db: AsyncSession, now: Optional[datetime] = None, days_back: int = 0) -> int:
+        """
+        Upsert the scheduled count of every active medication for each user's local today
+        (and days_back days before it), leaving taken counts alone (the caller commits)
+        """
+        now = now or datetime.now(timezone.utc)
+        medications = (
+            await db.execute(
+                select(Medication, User.timezone)
+                .join(User, User.id == Medication.user_id)
+                .where(Medication.active == True)
+            )
+        ).all()
+
+        rows = []
+        for medication, zone_name in medications:
+            today = now.astimezone(user_zone(zone_name)).date()
+            for back in range(days_back + 1):
+                day = today - timedelta(days=back)
+                scheduled = scheduled_doses(medication, day, zone_name)
+                if scheduled:
+                    rows.append(
+                        {
+                            "user_id": medication.user_id,
+                            "medication_id": medication.id,
+                            "day": day,
+                            "scheduled": scheduled,
+                            "taken": 0,
+                        }
+                    )
+
+        await self._upsert_scheduled(db, rows)
+        return len(rows)
+
+    async def schedule_today(self, db: AsyncSession, user: User, medication: Medication):
+        """Rollup row for a medication added today, so it counts before the next materialize run"""
+        day = datetime.now(timezone.utc).astimezone(user_zone(user.timezone)).date()
+        scheduled = scheduled_doses(medication, day, user.timezone)
+        if scheduled:
+            await self._upsert_scheduled(
+                db,
+                [
+                    {
+                        "user_id": user.id,
+                        "medication_id": medication.id,
+                        "day": day,
+                        "scheduled": scheduled,
+                        "taken": 0,
+                    }
+                ],
+            )
+
+    async def _upsert_scheduled(self, db: AsyncSession, rows: List[Dict]):
+        insert = UPSERT_DIALECTS[db.get_bind().dialect.name]
+        table = MedicationAdherenceDaily.__table__
+        for offset in range(0, len(rows), 1000):
+            statement = insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=["user_id", "day", "medication_id"],
+                set_={"scheduled": statement.excluded.scheduled},
+            )
+            await db.execute(statement, rows[offset : offset + 1000])
+
+    async def record_doses(
+        self, db: AsyncSession, user: User, medication: Medication, taken_at: List[datetime]
+    ):
+        """
+        Add taken doses to the daily rollup (same transaction as the log insert)
+        taken_at values are naive UTC, as stored in MedicationLog
+        """
+        zone = user_zone(user.timezone)
+        per_day = Counter(
+            t.replace(tzinfo=timezone.utc).astimezone(zone).date() for t in taken_at
+        )
+        if not per_day:
+            return
+
+        insert = UPSERT_DIALECTS[db.get_bind().dialect.name]
+        table = MedicationAdherenceDaily.__table__
+
+        for day, count in per_day.items():
+            statement = insert(table).values(
+                user_id=user.id,
+                medication_id=medication.id,
+                day=day,
+                scheduled=scheduled_doses(medication, day, user.timezone),
+                taken=count,
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=["user_id", "day", "medication_id"],
+                set_={"taken": table.c.taken + statement.excluded.taken},
+            )
+            await db.execute(statement)
+
+    async def get_series(
+        self, db: AsyncSession, user: User, start: date, end: date, period: str = "day"
+    ) -> List[Dict]:
+        """Taken vs scheduled per day (or ISO week) between start and end, inclusive"""
+        table = MedicationAdherenceDaily
+        rows = (
+            await db.execute(
+                select(table.day, func.sum(table.scheduled), func.sum(table.taken))
+                .where(table.user_id == user.id, table.day >= start, table.day <= end)
+                .group_by(table.day)
+            )
+        ).all()
+        logged = {day: (scheduled, taken) for day, scheduled, taken in rows}
+
+        buckets: Dict[str, Dict] = {}
+        day = start
+        while day <= end:
+            # Days without rollup rows had nothing scheduled (or predate the rollups)
+            scheduled, taken = logged.get(day, (0, 0))
+
+            if period == "week":
+                iso = day.isocalendar()
+                key = f"{iso[0]}-W{iso[1]:02d}"
+            else:
+                key = day.isoformat()
+
+            bucket = buckets.setdefault(key, {"period": key, "scheduled": 0, "taken": 0})
+            bucket["scheduled"] += scheduled
+            bucket["taken"] += taken
+            day += timedelta(days=1)
+
+        for bucket in buckets.values():
+            bucket["adherence"] = (
+                min(bucket["taken"], bucket["scheduled"]) / bucket["scheduled"]
+                if bucket["scheduled"]
+                else None
+            )
+
+        return list(buckets.values())
+
+
+# Singleton instance
+adherence_service = AdherenceService()
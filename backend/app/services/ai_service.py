@@ -1,6 +1,38 @@
-from anthropic import Anthropic
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+import asyncio
+import re
+import time
 from app.core.config import settings
+from app.core.intents import ACTION_INTENTS, URGENT_PHRASES, load_matcher
+from app.core.llm import (
+    PROMPT_CACHE_MIN_TOKENS,
+    llm_client,
+    cached_text,
+    mark_cached_prefix,
+    usage_to_dict,
+)
+from app.services.conversation_store import estimate_tokens
+
+# How each detected intent is acted on
+ACTIONS = {
+    "send_message": {"requires_approval": "caregiver", "confirmation_needed": True},
+    "make_call": {"requires_approval": "user", "confirmation_needed": True},
+    "create_reminder": {"requires_approval": "user", "confirmation_needed": True},
+    "emergency_alert": {"requires_approval": None, "confirmation_needed": False},  # Auto-execute
+}
+# For intents added through INTENTS_FILE
+DEFAULT_ACTION = {"requires_approval": "user", "confirmation_needed": True}
+
+FALLBACK_RESPONSE = "I'm sorry, I'm having trouble right now. Can you try asking again in a moment?"
+
+EMERGENCY_RESPONSE = (
+    "I'm here with you. You're not alone. "
+    "I'm letting your caregiver know right now so they can help you. "
+    "Stay where you are if you can, and try to stay calm."
+)
+
+# Sentence terminator followed by whitespace (the terminator stays with its sentence)
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
 
 
 class AIAssistant:
@@ -10,8 +42,17 @@ class AIAssistant:
     """
 
     def __init__(self):
-        self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+        self.llm = llm_client
+        self.action_matcher = load_matcher("actions", ACTION_INTENTS)
+        self.urgent_matcher = load_matcher("urgent", URGENT_PHRASES)
         self.system_prompt = self._build_system_prompt()
+        # Static system prompt, marked for prompt caching only if it reaches the minimum on its own
+        # (shorter prefixes are never cached); otherwise the history breakpoint in
+        # _build_messages caches the system prompt together with the transcript
+        if estimate_tokens(self.system_prompt) >= PROMPT_CACHE_MIN_TOKENS:
+            self.system_blocks = [cached_text(self.system_prompt)]
+        else:
+            self.system_blocks = [{"type": "text", "text": self.system_prompt}]
 
     def _build_system_prompt(self) -> str:
         """Build the system prompt for Claude"""
@@ -81,30 +122,11 @@ Remember: This person may be confused, scared, or forgetful. Your job is to prov
             Dict with response text and any suggested actions
         """
 
-        # Build context prompt if provided
-        context_info = ""
-        if context:
-            context_info = self._format_context(context)
-
-        # Prepare messages for Claude
-        messages = conversation_history.copy()
-
-        # Add current message with context
-        current_message = user_message
-        if context_info:
-            current_message = f"{context_info}\n\nUser says: {user_message}"
-
-        messages.append({"role": "user", "content": current_message})
+        messages = self._build_messages(user_message, conversation_history, context)
 
         # Call Claude API
         try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-5-20250929",
-                max_tokens=1024,
-                temperature=0.7,
-                system=self.system_prompt,
-                messages=messages,
-            )
+            response = await self.llm.create_message(**self._request_params(messages))
 
             assistant_message = response.content[0].text
 
@@ -115,21 +137,232 @@ Remember: This person may be confused, scared, or forgetful. Your job is to prov
                 "response": assistant_message,
                 "suggested_action": suggested_action,
                 "needs_confirmation": suggested_action is not None,
-                "usage": {
-                    "input_tokens": response.usage.input_tokens,
-                    "output_tokens": response.usage.output_tokens,
-                },
+                "usage": usage_to_dict(response.usage),
             }
 
         except Exception as e:
             print(f"Error calling Claude API: {e}")
             return {
-                "response": "I'm sorry, I'm having trouble right now. Can you try asking again in a moment?",
+                "response": FALLBACK_RESPONSE,
                 "error": str(e),
                 "suggested_action": None,
                 "needs_confirmation": False,
             }
 
+    async def emergency_chat(
+        self,
+        user_message: str,
+        conversation_history: List[Dict],
+        context: Optional[Dict] = None,
+    ) -> Dict:
+        """
+        Chat for a message already classified as an emergency
+        The caregiver alert is dispatched by the caller; here Claude gets a short
+        deadline and a comforting fixed reply is used if it is slow or down
+        """
+        try:
+            result = await asyncio.wait_for(
+                self.chat(user_message, conversation_history, context),
+                timeout=settings.EMERGENCY_RESPONSE_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            result = {"error": "timeout"}
+
+        if result.get("error"):
+            result = {"response": EMERGENCY_RESPONSE}
+
+        result["suggested_action"] = self._emergency_action()
+        result["needs_confirmation"] = False
+        return result
+
+    async def emergency_chat_stream(
+        self,
+        user_message: str,
+        conversation_history: List[Dict],
+        context: Optional[Dict] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Streaming counterpart of emergency_chat
+        Claude gets EMERGENCY_RESPONSE_TIMEOUT to produce its first sentence; if it is slow
+        or down, the comforting fixed reply is spoken instead. The done event always
+        carries the emergency action
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.EMERGENCY_RESPONSE_TIMEOUT
+        events = self.chat_stream(
+            user_message, conversation_history, context, fallback=EMERGENCY_RESPONSE
+        )
+        spoken = False
+        done = None
+
+        try:
+            while done is None:
+                if spoken:
+                    event = await events.__anext__()
+                else:
+                    event = await asyncio.wait_for(
+                        events.__anext__(), timeout=max(deadline - loop.time(), 0)
+                    )
+
+                if event["type"] == "done":
+                    done = event
+                else:
+                    spoken = spoken or event["type"] == "sentence"
+                    yield event
+        except (asyncio.TimeoutError, StopAsyncIteration):
+            yield self._sentence_event(EMERGENCY_RESPONSE)
+            done = {"type": "done", "error": "timeout", "first_token_ms": None}
+        finally:
+            await events.aclose()
+
+        if done.get("error"):
+            # The fallback sentence has already been spoken by chat_stream or above
+            done = {
+                "type": "done",
+                "response": EMERGENCY_RESPONSE,
+                "first_token_ms": done["first_token_ms"],
+            }
+
+        done["suggested_action"] = self._emergency_action()
+        done["needs_confirmation"] = False
+        yield done
+
+    def detect_emergency(self, user_message: str) -> bool:
+        """
+        Classify the user's message before calling Claude - True only for urgent phrases
+        (a fall, chest pain, 911), which page the caregiver without asking
+        Checked on its own - a message that also asks for a call or text is still an emergency
+        """
+        return self.urgent_matcher.search(user_message)
+
+    async def chat_stream(
+        self,
+        user_message: str,
+        conversation_history: List[Dict],
+        context: Optional[Dict] = None,
+        fallback: str = FALLBACK_RESPONSE,
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream a response as it is generated
+
+        Yields events in order:
+            {"type": "token", "text": ...} for every text delta
+            {"type": "sentence", "text": ..., "speech": ...} per completed sentence
+            {"type": "done", "response": ..., "suggested_action": ..., ...} once at the end
+        The voice front-end can start speaking on the first "sentence" event.
+        If Claude fails, `fallback` is spoken and returned instead.
+        """
+        messages = self._build_messages(user_message, conversation_history, context)
+        started = time.perf_counter()
+        first_token_ms = None
+        buffer = ""
+        full_text = []
+
+        try:
+            async with self.llm.stream_message(**self._request_params(messages)) as stream:
+                async for text in stream.text_stream:
+                    if first_token_ms is None:
+                        first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+
+                    full_text.append(text)
+                    yield {"type": "token", "text": text}
+
+                    buffer += text
+                    sentences, buffer = self._split_sentences(buffer)
+                    for sentence in sentences:
+                        yield self._sentence_event(sentence)
+
+                final_message = await stream.get_final_message()
+
+            if buffer.strip():
+                yield self._sentence_event(buffer)
+
+            assistant_message = "".join(full_text)
+            suggested_action = self._extract_action(assistant_message, user_message)
+
+            yield {
+                "type": "done",
+                "response": assistant_message,
+                "suggested_action": suggested_action,
+                "needs_confirmation": suggested_action is not None,
+                "usage": usage_to_dict(final_message.usage),
+                "first_token_ms": first_token_ms,
+            }
+
+        except Exception as e:
+            print(f"Error streaming from Claude API: {e}")
+            yield self._sentence_event(fallback)
+            yield {
+                "type": "done",
+                "response": fallback,
+                "error": str(e),
+                "suggested_action": None,
+                "needs_confirmation": False,
+                "first_token_ms": first_token_ms,
+            }
+
+    async def replay_stream(self, response: Dict) -> AsyncIterator[Dict]:
+        """Stream events for an already-known response (e.g. from the answer cache)"""
+        yield {"type": "token", "text": response["response"]}
+
+        sentences, rest = self._split_sentences(response["response"])
+        for sentence in sentences + [rest]:
+            if sentence.strip():
+                yield self._sentence_event(sentence)
+
+        yield {"type": "done", **response, "first_token_ms": 0.0}
+
+    def _build_messages(
+        self,
+        user_message: str,
+        conversation_history: List[Dict],
+        context: Optional[Dict],
+    ) -> List[Dict]:
+        """Prepare the messages list for Claude"""
+
+        # Build context prompt if provided
+        context_info = ""
+        if context:
+            context_info = self._format_context(context)
+
+        # Prepare messages for Claude - the prior transcript only changes when the
+        # conversation store rolls older turns into the summary, so it is marked for
+        # prompt caching (the summary itself goes in the current message, after it)
+        messages = mark_cached_prefix(conversation_history or [])
+
+        # Add current message with context
+        current_message = user_message
+        if context_info:
+            current_message = f"{context_info}\n\nUser says: {user_message}"
+
+        messages.append({"role": "user", "content": current_message})
+
+        return messages
+
+    def _request_params(self, messages: List[Dict]) -> Dict:
+        """Keyword arguments shared by chat and chat_stream"""
+        return {
+            "model": "claude-sonnet-4-5-20250929",
+            "max_tokens": 1024,
+            "temperature": 0.7,
+            "system": self.system_blocks,
+            "messages": messages,
+        }
+
+    def _split_sentences(self, buffer: str) -> Tuple[List[str], str]:
+        """Split completed sentences off the front of a streaming buffer"""
+        parts = SENTENCE_END.split(buffer)
+        # The last part has no terminator yet - keep it buffered
+        return [p for p in parts[:-1] if p.strip()], parts[-1]
+
+    def _sentence_event(self, sentence: str) -> Dict:
+        sentence = sentence.strip()
+        return {
+            "type": "sentence",
+            "text": sentence,
+            "speech": self.format_for_speech(sentence),
+        }
+
     def _format_context(self, context: Dict) -> str:
         """Format context information for Claude"""
         parts = ["[CONTEXT - Information available to help the user]"]
@@ -157,6 +390,9 @@ Remember: This person may be confused, scared, or forgetful. Your job is to prov
             count = context["unread_messages"]
             parts.append(f"Unread messages: {count}")
 
+        if context.get("conversation_summary"):
+            parts.append(f"Earlier in this conversation: {context['conversation_summary']}")
+
         if context.get("user_name"):
             parts.append(f"User's name: {context['user_name']}")
 
@@ -173,43 +409,19 @@ Remember: This person may be confused, scared, or forgetful. Your job is to prov
 
         Returns structured action if detected, None otherwise
         """
-        response_lower = response.lower()
-        user_lower = user_message.lower()
-
-        # Detect communication actions
-        if any(word in user_lower for word in ["text", "send message", "message"]):
-            return {
-                "type": "send_message",
-                "requires_approval": "caregiver",
-                "confirmation_needed": True,
-            }
-
-        if any(word in user_lower for word in ["call", "phone"]):
-            return {
-                "type": "make_call",
-                "requires_approval": "user",
-                "confirmation_needed": True,
-            }
+        intent = self.action_matcher.first(user_message)
+        if intent is None:
+            return None
 
-        # Detect scheduling actions
-        if any(word in user_lower for word in ["schedule", "appointment", "remind me"]):
-            return {
-                "type": "create_reminder",
-                "requires_approval": "user",
-                "confirmation_needed": True,
-            }
+        if intent == "emergency_alert":
+            # Distress words without an urgent phrase ("help", "scared") - offer to contact
+            # the caregiver rather than paging them
+            return {"type": intent, **DEFAULT_ACTION}
 
-        # Detect emergency situations
-        if any(
-            word in user_lower for word in ["help", "emergency", "hurt", "fell", "scared"]
-        ):
-            return {
-                "type": "emergency_alert",
-                "requires_approval": None,  # Auto-execute
-                "confirmation_needed": False,
-            }
+        return {"type": intent, **ACTIONS.get(intent, DEFAULT_ACTION)}
 
-        return None
+    def _emergency_action(self) -> Dict:
+        return {"type": "emergency_alert", **ACTIONS["emergency_alert"]}
 
     def format_for_speech(self, text: str) -> str:
         """
@@ -0,0 +1,185 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import hashlib
+import json
+import random
+import re
+import time
+from app.core.config import settings
+
+# Context keys that change every turn without changing the answer
+VOLATILE_CONTEXT_KEYS = {"current_time", "conversation_summary"}
+
+FILLER_WORDS = {"um", "uh", "so", "hey", "oh", "well", "please", "again", "ok", "okay"}
+
+# Questions whose answer depends on the clock - current_time is not part of the key
+TIME_QUESTION = re.compile(
+    r"\b(time|clock|day|date|today|tonight|tomorrow|yesterday|now|morning|afternoon|evening"
+    r"|week|month|year|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b"
+)
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and filler words so repeats of a question match"""
+    words = re.sub(r"[^a-z0-9' ]+", " ", message.lower()).split()
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+
+def is_cacheable(normalized: str) -> bool:
+    """
+    Only substantive questions are cached - short replies ("okay", "yes please") mean
+    different things at different points in a conversation, and time/date answers go stale
+    """
+    return len(normalized.split()) >= settings.ANSWER_CACHE_MIN_WORDS and not TIME_QUESTION.search(normalized)
+
+
+def _text(content) -> str:
+    return content if isinstance(content, str) else json.dumps(content, sort_keys=True)
+
+
+def prompting_turn(history: Optional[List[Dict]], normalized: str) -> str:
+    """
+    The assistant turn the question replies to - skipping back over earlier asks of the
+    same question, so back-to-back repeats share a key
+    """
+    messages = history or []
+    end = len(messages)
+    while (
+        end >= 2
+        and messages[end - 2].get("role") == "user"
+        and normalize_message(_text(messages[end - 2].get("content"))) == normalized
+    ):
+        end -= 2
+
+    for message in reversed(messages[:end]):
+        if message.get("role") == "assistant":
+            return _text(message.get("content"))
+    return ""
+
+
+def context_fingerprint(context: Optional[Dict]) -> str:
+    """Stable hash of the parts of the context that affect the answer"""
+    stable = {k: v for k, v in (context or {}).items() if k not in VOLATILE_CONTEXT_KEYS}
+    encoded = json.dumps(stable, sort_keys=True, default=str).encode()
+    return hashlib.sha1(encoded).hexdigest()
+
+
+class CachedAnswer:
+    """Up to N phrasings of the answer to one question in one context"""
+
+    def __init__(self):
+        self.responses: List[Dict] = []
+        self.created = time.monotonic()
+
+
+class AnswerCache:
+    """
+    Per-user cache of answers to repeated questions
+    Keyed on the normalized message, the assistant turn it replies to and a context
+    fingerprint. The first few asks each go to Claude and are kept as alternate
+    phrasings; after that repeats are answered from the cache, picking a phrasing at random.
+    """
+
+    def __init__(self):
+        self.ttl = settings.ANSWER_CACHE_TTL
+        self.phrasings = settings.ANSWER_CACHE_PHRASINGS
+        self.max_entries = settings.ANSWER_CACHE_MAX_ENTRIES_PER_USER
+        self.max_users = settings.ANSWER_CACHE_MAX_USERS
+        self.users: "OrderedDict[int, OrderedDict[str, CachedAnswer]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def _key(self, message: str, history: Optional[List[Dict]], context: Optional[Dict]) -> Optional[str]:
+        """Cache key, or None if the message should never be answered from the cache"""
+        normalized = normalize_message(message)
+        if not is_cacheable(normalized):
+            return None
+        previous = hashlib.sha1(prompting_turn(history, normalized).encode()).hexdigest()
+        return f"{normalized}|{previous}|{context_fingerprint(context)}"
+
+    def get(
+        self, user_id: int, message: str, history: Optional[List[Dict]], context: Optional[Dict]
+    ) -> Optional[Dict]:
+        """Cached response, or None if Claude should be asked (again)"""
+        key = self._key(message, history, context)
+        if key is None:
+            self.skipped += 1
+            return None
+
+        entries = self.users.get(user_id)
+        entry = entries.get(key) if entries else None
+
+        if entry and time.monotonic() - entry.created > self.ttl:
+            del entries[key]
+            entry = None
+
+        # Keep collecting phrasings until there are enough to vary the wording
+        if not entry or len(entry.responses) < self.phrasings:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        entries.move_to_end(key)
+        self.users.move_to_end(user_id)
+        return dict(random.choice(entry.responses), cached=True)
+
+    def put(
+        self,
+        user_id: int,
+        message: str,
+        history: Optional[List[Dict]],
+        context: Optional[Dict],
+        response: Dict,
+    ):
+        """Store one phrasing of an answer"""
+        action = response.get("suggested_action") or {}
+        if response.get("error") or action.get("type") == "emergency_alert":
+            return
+
+        key = self._key(message, history, context)
+        if key is None:
+            return
+
+        entries = self.users.get(user_id)
+        if entries is None:
+            entries = self.users[user_id] = OrderedDict()
+        self.users.move_to_end(user_id)
+        # Bound memory - drop the least recently active users
+        while len(self.users) > self.max_users:
+            self.users.popitem(last=False)
+
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = CachedAnswer()
+
+        if len(entry.responses) < self.phrasings:
+            entry.responses.append(
+                {
+                    "response": response["response"],
+                    "suggested_action": response.get("suggested_action"),
+                    "needs_confirmation": response.get("needs_confirmation", False),
+                }
+            )
+
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        """Drop a user's cached answers (their medications, logs or calendar changed)"""
+        self.users.pop(user_id, None)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "skipped": self.skipped,
+            "users": len(self.users),
+        }
+
+
+# Singleton instance
+answer_cache = AnswerCache()
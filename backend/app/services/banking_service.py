@@ -11,7 +11,8 @@ from plaid.model.country_code import CountryCode
 from plaid.configuration import Configuration
 from plaid.api_client import ApiClient
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+import asyncio
+from typing import List, Dict
 from app.core.config import settings
 
 
@@ -84,7 +85,8 @@ class BankingService:
         """
         try:
             request = AccountsBalanceGetRequest(access_token=access_token)
-            response = self.client.accounts_balance_get(request)
+            # Plaid client is blocking - keep it off the event loop
+            response = await asyncio.to_thread(self.client.accounts_balance_get, request)
 
             accounts = []
             for account in response.accounts:
@@ -124,7 +126,7 @@ class BankingService:
                 end_date=end_date,
             )
 
-            response = self.client.transactions_get(request)
+            response = await asyncio.to_thread(self.client.transactions_get, request)
 
             transactions = []
             for txn in response.transactions:
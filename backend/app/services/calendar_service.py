@@ -1,6 +1,7 @@
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from datetime import datetime, timedelta
+import asyncio
 from typing import List, Dict, Optional
 
 
@@ -20,7 +21,7 @@ class CalendarService:
             start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
             end_of_day = start_of_day + timedelta(days=1)
 
-            events_result = (
+            request = (
                 self.service.events()
                 .list(
                     calendarId="primary",
@@ -29,8 +30,9 @@ class CalendarService:
                     singleEvents=True,
                     orderBy="startTime",
                 )
-                .execute()
             )
+            # googleapiclient is blocking - keep it off the event loop
+            events_result = await asyncio.to_thread(request.execute)
 
             events = events_result.get("items", [])
 
@@ -55,7 +57,7 @@ class CalendarService:
             now = datetime.utcnow()
             future = now + timedelta(days=days)
 
-            events_result = (
+            request = (
                 self.service.events()
                 .list(
                     calendarId="primary",
@@ -65,8 +67,9 @@ class CalendarService:
                     singleEvents=True,
                     orderBy="startTime",
                 )
-                .execute()
             )
+            # googleapiclient is blocking - keep it off the event loop
+            events_result = await asyncio.to_thread(request.execute)
 
             events = events_result.get("items", [])
 
@@ -111,9 +114,8 @@ class CalendarService:
                 },
             }
 
-            created_event = (
-                self.service.events().insert(calendarId="primary", body=event).execute()
-            )
+            request = self.service.events().insert(calendarId="primary", body=event)
+            created_event = await asyncio.to_thread(request.execute)
 
             return {
                 "id": created_event["id"],
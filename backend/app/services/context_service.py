@@ -0,0 +1,176 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncio
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY
+from app.models.medication import User
+from app.services.schedule_index import schedule_index, user_zone
+
+
+class ContextProvider:
+    """
+    One source of context for the AI (medications, calendar, bank, ...)
+    fetch() returns the keys it contributes, or None if it has nothing to add
+    Providers run concurrently, so at most one of them may use the db session
+    """
+
+    name = "base"
+
+    @property
+    def timeout(self) -> float:
+        return settings.CONTEXT_PROVIDER_TIMEOUTS.get(
+            self.name, settings.CONTEXT_DEFAULT_TIMEOUT
+        )
+
+    async def fetch(self, user: User, db: AsyncSession) -> Optional[Dict]:
+        raise NotImplementedError
+
+
+class MedicationsProvider(ContextProvider):
+    """Medications due this hour"""
+
+    name = "medications"
+
+    async def fetch(self, user: User, db: AsyncSession) -> Optional[Dict]:
+        medications_due = [
+            {"name": dose["name"], "dosage": dose["dosage"]}
+            for dose in (await schedule_index.get(user, db)).due_now()
+        ]
+
+        if medications_due:
+            return {"medications_due": medications_due}
+        return None
+
+
+class CalendarProvider(ContextProvider):
+    """Today's Google Calendar events"""
+
+    name = "calendar"
+
+    async def fetch(self, user: User, db: AsyncSession) -> Optional[Dict]:
+        if not user.google_access_token:
+            return None
+
+        from google.oauth2.credentials import Credentials
+        from app.services.calendar_service import CalendarService
+
+        credentials = Credentials(
+            token=user.google_access_token,
+            refresh_token=user.google_refresh_token,
+            token_uri="https://oauth2.googleapis.com/token",
+            client_id=settings.GOOGLE_CLIENT_ID,
+            client_secret=settings.GOOGLE_CLIENT_SECRET,
+        )
+        calendar = await asyncio.to_thread(CalendarService, credentials)
+        return {"calendar_today": await calendar.get_today_events()}
+
+
+class BankingProvider(ContextProvider):
+    """Checking (or total) account balance"""
+
+    name = "banking"
+
+    def __init__(self):
+        self._service = None
+
+    async def fetch(self, user: User, db: AsyncSession) -> Optional[Dict]:
+        if not user.plaid_access_token:
+            return None
+
+        if self._service is None:
+            from app.services.banking_service import BankingService
+
+            self._service = BankingService()
+
+        accounts = await self._service.get_balances(user.plaid_access_token)
+        if not accounts:
+            return None
+
+        checking = next((a for a in accounts if a["subtype"] == "checking"), None)
+        balance = checking["balance"] if checking else sum(a["balance"] for a in accounts)
+        return {"account_balance": balance}
+
+
+class MessagesProvider(ContextProvider):
+    """
+    Unread message count (the "unread_messages" context key)
+    No messaging integration is connected yet, so this contributes nothing; a real
+    source only needs to fill in fetch() and runs under the same per-provider deadline
+    """
+
+    name = "messages"
+
+    async def fetch(self, user: User, db: AsyncSession) -> Optional[Dict]:
+        return None
+
+
+class ContextService:
+    """
+    Fetches context from every provider concurrently
+    Each provider has its own deadline; a slow or failing provider is left out
+    of the context instead of delaying the chat turn
+    """
+
+    def __init__(self, providers: List[ContextProvider]):
+        self.providers = providers
+        self.stats: Dict[str, Dict] = {
+            p.name: {"calls": 0, "timeouts": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            for p in providers
+        }
+
+    async def gather(self, user: User, db: AsyncSession) -> Dict:
+        """Build the context dict; per-provider latency is recorded in self.stats"""
+        context = {
+            "user_name": user.name,
+            "current_time": datetime.now(user_zone(user.timezone)).strftime("%I:%M %p"),
+        }
+
+        results = await asyncio.gather(
+            *(self._fetch(provider, user, db) for provider in self.providers)
+        )
+        for result in results:
+            if result:
+                context.update(result)
+
+        return context
+
+    async def _fetch(self, provider: ContextProvider, user: User, db: AsyncSession) -> Optional[Dict]:
+        stats = self.stats[provider.name]
+        stats["calls"] += 1
+        started = time.perf_counter()
+
+        try:
+            return await asyncio.wait_for(provider.fetch(user, db), timeout=provider.timeout)
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+            UPSTREAM_ERRORS.inc(provider.name)
+            print(f"Context provider '{provider.name}' timed out after {provider.timeout}s")
+            return None
+        except Exception as e:
+            stats["errors"] += 1
+            UPSTREAM_ERRORS.inc(provider.name)
+            print(f"Error in context provider '{provider.name}': {e}")
+            return None
+        finally:
+            elapsed = time.perf_counter() - started
+            UPSTREAM_LATENCY.observe(elapsed, provider.name)
+            elapsed_ms = elapsed * 1000
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def latency_stats(self) -> Dict:
+        return {
+            name: {
+                **stats,
+                "avg_ms": stats["total_ms"] / stats["calls"] if stats["calls"] else 0.0,
+            }
+            for name, stats in self.stats.items()
+        }
+
+
+# Singleton instance
+context_service = ContextService(
+    [MedicationsProvider(), CalendarProvider(), BankingProvider(), MessagesProvider()]
+)
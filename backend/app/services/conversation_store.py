@@ -0,0 +1,148 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+import asyncio
+import time
+from app.core.config import settings
+from app.core.llm import llm_client
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) - good enough for budgeting"""
+    return len(text) // 4 + 1
+
+
+class ConversationSession:
+    """One user's running conversation: a compact summary plus recent turns verbatim"""
+
+    def __init__(self):
+        self.summary = ""
+        self.turns: List[Dict] = []  # Alternating user/assistant messages
+        self.pending: List[Dict] = []  # Evicted turns not yet folded into the summary
+        self.summarizing = False
+        self.last_active = time.monotonic()
+
+
+class ConversationStore:
+    """
+    Server-side conversation history keyed by user
+    Keeps the last few turns verbatim, rolls older turns into a running summary,
+    and caps what is sent to Claude at a token budget
+    """
+
+    def __init__(self):
+        self.sessions: "OrderedDict[int, ConversationSession]" = OrderedDict()
+        self.recent_turns = settings.CONVERSATION_RECENT_TURNS
+        self.token_budget = settings.CONVERSATION_TOKEN_BUDGET
+        self.session_ttl = settings.CONVERSATION_SESSION_TTL
+        self.max_sessions = settings.CONVERSATION_MAX_SESSIONS
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _get(self, user_id: int) -> ConversationSession:
+        session = self.sessions.get(user_id)
+        now = time.monotonic()
+
+        if session is None or now - session.last_active > self.session_ttl:
+            session = ConversationSession()
+            self.sessions[user_id] = session
+
+        session.last_active = now
+        self.sessions.move_to_end(user_id)
+
+        # Bound memory - drop the least recently active sessions
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+
+        return session
+
+    def get_history(self, user_id: int) -> List[Dict]:
+        """Recent turns that fit the token budget (oldest dropped first, whole exchanges)"""
+        session = self._get(user_id)
+        budget = self.token_budget - estimate_tokens(session.summary)
+
+        history: List[Dict] = []
+        used = 0
+        # Walk backwards one user/assistant exchange at a time so history starts with a user turn
+        for i in range(len(session.turns) - 2, -1, -2):
+            exchange = session.turns[i : i + 2]
+            cost = sum(estimate_tokens(m["content"]) for m in exchange)
+            if used + cost > budget:
+                break
+            history[:0] = exchange
+            used += cost
+
+        return history
+
+    def get_summary(self, user_id: int) -> Optional[str]:
+        """Running summary of older turns, if any"""
+        return self._get(user_id).summary or None
+
+    def append(self, user_id: int, user_message: str, assistant_message: str):
+        """Record a completed exchange and roll old turns into the summary"""
+        session = self._get(user_id)
+        session.turns.append({"role": "user", "content": user_message})
+        session.turns.append({"role": "assistant", "content": assistant_message})
+
+        # Once full, roll the older half into the summary at once rather than one exchange
+        # per turn - the verbatim turns are a prompt-cache prefix, and sliding them every
+        # turn would change that prefix (and miss the cache) on every call
+        if len(session.turns) > self.recent_turns * 2:
+            overflow = len(session.turns) - max(self.recent_turns // 2, 1) * 2
+            session.pending.extend(session.turns[:overflow])
+            del session.turns[:overflow]
+
+        if session.pending and not session.summarizing:
+            session.summarizing = True
+            task = asyncio.create_task(self._summarize(session))
+            # Hold a reference so the task is not garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def clear(self, user_id: int):
+        """Forget a user's conversation"""
+        self.sessions.pop(user_id, None)
+
+    async def _summarize(self, session: ConversationSession):
+        """Fold evicted turns into the running summary (runs in the background)"""
+        try:
+            while session.pending:
+                turns = session.pending
+                session.pending = []
+                session.summary = await self._summarize_turns(session.summary, turns)
+        except Exception as e:
+            print(f"Error summarizing conversation: {e}")
+        finally:
+            session.summarizing = False
+
+    async def _summarize_turns(self, summary: str, turns: List[Dict]) -> str:
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in turns)
+
+        prompt = f"""Update this running summary of a conversation with an elderly person with dementia.
+Keep it under {settings.CONVERSATION_SUMMARY_MAX_TOKENS} tokens. Keep facts, questions asked
+(and how often), promises made, and anything the assistant should follow up on.
+
+CURRENT SUMMARY:
+{summary or "(none)"}
+
+NEW TURNS:
+{transcript}
+
+Reply with the updated summary only."""
+
+        try:
+            response = await llm_client.create_message(
+                model=settings.CONVERSATION_SUMMARY_MODEL,
+                max_tokens=settings.CONVERSATION_SUMMARY_MAX_TOKENS,
+                messages=[{"role": "user", "content": prompt}],
+            )
+            return response.content[0].text.strip()
+
+        except Exception as e:
+            print(f"Error summarizing conversation: {e}")
+            # Fall back to keeping the user's questions, truncated to the summary budget
+            questions = [m["content"] for m in turns if m["role"] == "user"]
+            fallback = " ".join(filter(None, [summary, "Earlier the user asked: " + "; ".join(questions)]))
+            return fallback[-settings.CONVERSATION_SUMMARY_MAX_TOKENS * 4 :]
+
+
+# Singleton instance
+conversation_store = ConversationStore()
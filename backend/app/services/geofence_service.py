@@ -0,0 +1,190 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+from datetime import datetime
+import time
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.geo import GridIndex, haversine_m
+from app.models.medication import Geofence, User
+
+
+class UserGeofences:
+    """
+    One user's geofences in a grid index, plus which ones they are inside
+    A fence is entered within its radius and only exited beyond radius + hysteresis,
+    so GPS jitter at the boundary doesn't produce enter/exit flapping. A fence whose
+    state is unknown (never evaluated) is only primed by the next fix - no event for
+    where the user already is
+    """
+
+    def __init__(
+        self,
+        fences: List[Dict],
+        hysteresis_m: float,
+        cell_degrees: float,
+        inside: Optional[Set[int]] = None,
+        unknown: Optional[Set[int]] = None,
+    ):
+        self.fences = {f["id"]: f for f in fences}
+        self.hysteresis_m = hysteresis_m
+        self.index: GridIndex[int] = GridIndex(cell_degrees)
+        for fence in fences:
+            self.index.insert(
+                fence["id"], fence["latitude"], fence["longitude"], fence["radius_m"] + hysteresis_m
+            )
+
+        self.inside: Set[int] = set(inside or ())
+        self.unknown: Set[int] = set(self.fences) if unknown is None else set(unknown)
+        self.loaded = time.monotonic()
+
+    def update(
+        self, latitude: float, longitude: float, accuracy: Optional[float], at: datetime
+    ) -> List[Dict]:
+        """Enter/exit events caused by one fix"""
+        if accuracy is not None and accuracy > settings.GEOFENCE_MAX_ACCURACY_M:
+            return []
+
+        inside = set()
+        for fence_id in set(self.index.candidates(latitude, longitude)) | self.inside:
+            fence = self.fences[fence_id]
+            distance = haversine_m(latitude, longitude, fence["latitude"], fence["longitude"])
+            limit = fence["radius_m"] + (self.hysteresis_m if fence_id in self.inside else 0)
+            if distance <= limit:
+                inside.add(fence_id)
+
+        events = [self._event("enter", i, at) for i in inside - self.inside - self.unknown] + [
+            self._event("exit", i, at) for i in self.inside - inside - self.unknown
+        ]
+        self.inside = inside
+        # Fences outside the candidate cells are known to be outside too
+        self.unknown = set()
+        return events
+
+    def _event(self, kind: str, fence_id: int, at: datetime) -> Dict:
+        fence = self.fences[fence_id]
+        return {
+            "type": kind,
+            "geofence_id": fence_id,
+            "name": fence["name"],
+            "kind": fence["kind"],
+            "notify_caregiver": fence["notify_caregiver"],
+            "at": at.isoformat(),
+        }
+
+
+class GeofenceService:
+    """
+    Arrival/departure detection against caregiver-defined places
+    Per-user fences are loaded into a grid index (LRU across users) and rebuilt after
+    invalidate() or GEOFENCE_STATE_TTL. The inside/outside state is persisted per fence,
+    so a restart, eviction or another worker picks up where the last fix left off; a
+    transition is only reported by the worker whose compare-and-set update records it
+    """
+
+    def __init__(self):
+        self.users: "OrderedDict[int, UserGeofences]" = OrderedDict()
+        self.stale: Set[int] = set()
+        self.max_users = settings.GEOFENCE_MAX_USERS
+
+        self.evaluations = 0
+        self.events = 0
+        self.total_eval_us = 0.0
+        self.max_eval_us = 0.0
+
+    async def evaluate(
+        self,
+        user: User,
+        db: AsyncSession,
+        latitude: float,
+        longitude: float,
+        accuracy: Optional[float],
+        at: datetime,
+    ) -> List[Dict]:
+        """Enter/exit events caused by one fix (state changes are written; the caller commits)"""
+        tracker = await self._get(user.id, db)
+        was_unknown = set(tracker.unknown)
+
+        started = time.perf_counter()
+        events = tracker.update(latitude, longitude, accuracy, at)
+        elapsed_us = (time.perf_counter() - started) * 1e6
+
+        # Record first-known state without overwriting state another worker already recorded
+        for fence_id in was_unknown - tracker.unknown:
+            await db.execute(
+                update(Geofence)
+                .where(Geofence.id == fence_id, Geofence.inside.is_(None))
+                .values(inside=fence_id in tracker.inside)
+            )
+
+        reported = []
+        for event in events:
+            now_inside = event["type"] == "enter"
+            result = await db.execute(
+                update(Geofence)
+                .where(Geofence.id == event["geofence_id"], Geofence.inside.is_not(now_inside))
+                .values(inside=now_inside)
+            )
+            # No row changed: another worker already reported this transition
+            if result.rowcount:
+                reported.append(event)
+
+        self.evaluations += 1
+        self.events += len(reported)
+        self.total_eval_us += elapsed_us
+        self.max_eval_us = max(self.max_eval_us, elapsed_us)
+        return reported
+
+    async def _get(self, user_id: int, db: AsyncSession) -> UserGeofences:
+        tracker = self.users.get(user_id)
+        if (
+            tracker is None
+            or user_id in self.stale
+            or time.monotonic() - tracker.loaded > settings.GEOFENCE_STATE_TTL
+        ):
+            fences = (
+                await db.execute(select(Geofence).where(Geofence.user_id == user_id))
+            ).scalars().all()
+            tracker = UserGeofences(
+                [
+                    {
+                        "id": f.id,
+                        "name": f.name,
+                        "kind": f.kind,
+                        "latitude": f.latitude,
+                        "longitude": f.longitude,
+                        "radius_m": f.radius_m,
+                        "notify_caregiver": f.notify_caregiver,
+                    }
+                    for f in fences
+                ],
+                settings.GEOFENCE_HYSTERESIS_M,
+                settings.GEOFENCE_CELL_DEGREES,
+                inside={f.id for f in fences if f.inside},
+                unknown={f.id for f in fences if f.inside is None},
+            )
+            self.users[user_id] = tracker
+            self.stale.discard(user_id)
+
+        self.users.move_to_end(user_id)
+        while len(self.users) > self.max_users:
+            self.users.popitem(last=False)
+        return tracker
+
+    def invalidate(self, user_id: int):
+        """Reload a user's fences on their next fix (after fences are added or removed)"""
+        if user_id in self.users:
+            self.stale.add(user_id)
+
+    def stats(self) -> Dict:
+        return {
+            "users_loaded": len(self.users),
+            "evaluations": self.evaluations,
+            "events": self.events,
+            "avg_eval_us": self.total_eval_us / self.evaluations if self.evaluations else 0.0,
+            "max_eval_us": self.max_eval_us,
+        }
+
+
+# Singleton instance
+geofence_service = GeofenceService()
@@ -0,0 +1,228 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+import asyncio
+import io
+import multiprocessing
+import time
+from PIL import Image, ImageFilter, ImageOps, ImageStat, UnidentifiedImageError
+from app.core.config import settings
+
+# Formats the vision API accepts as-is
+MEDIA_TYPES = {"jpeg": "image/jpeg", "png": "image/png", "gif": "image/gif", "webp": "image/webp"}
+
+# Laplacian edge kernel - low variance of the response means a blurry photo
+LAPLACIAN = ImageFilter.Kernel((3, 3), [0, 1, 0, 1, -4, 1, 0, 1, 0], scale=1, offset=128)
+
+# Size of the grayscale thumbnail used for the blur/lighting checks
+QUALITY_SAMPLE_EDGE = 512
+
+# Uploads that can't be processed at all (reason -> HTTP status, message); other
+# rejections (too dark, too blurry) are answered with a "try another photo" result
+UNPROCESSABLE = {
+    "unsupported_format": (415, "Send the photo as JPEG, PNG, GIF or WebP"),
+    "heic_unsupported": (415, "HEIC photos aren't supported - send the photo as JPEG"),
+    "too_large": (413, "Image dimensions are too large"),
+    "unreadable": (422, "The image file is damaged or incomplete"),
+    "processing_failed": (422, "The image could not be processed"),
+}
+
+
+class ImageRejected(ValueError):
+    """An upload that can't be processed at all - endpoints answer with a 4xx"""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+        self.status_code, self.message = UNPROCESSABLE[reason]
+        super().__init__(self.message)
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    """Image format from magic bytes, regardless of what the client claimed"""
+    if data[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data[4:8] == b"ftyp" and data[8:12] in (b"heic", b"heix", b"mif1", b"msf1"):
+        return "heic"
+    return None
+
+
+def dhash(gray: Image.Image) -> int:
+    """
+    64-bit difference hash: is each pixel brighter than its right neighbour (9x8 grid)
+    Gradients survive re-exposure and small reframing, so near-identical photos
+    of the same label land a few bits apart
+    """
+    pixels = list(gray.resize((9, 8), Image.Resampling.BILINEAR).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def preprocess_image(data: bytes) -> Dict:
+    """
+    Prepare a phone photo for the vision API (CPU-bound - runs in the process pool)
+    Upright (EXIF), downscaled to VISION_MAX_LONG_EDGE and re-encoded as JPEG, unless
+    the original is already small and supported; blurry or dark photos are rejected
+    """
+    started = time.perf_counter()
+    result = {"original_bytes": len(data), "format": sniff_format(data), "rejected": None}
+
+    if result["format"] is None:
+        result["rejected"] = "unsupported_format"
+        return result
+    if result["format"] == "heic":
+        # Recognised (iPhone default) but Pillow has no HEIC decoder
+        result["rejected"] = "heic_unsupported"
+        return result
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Image.DecompressionBombError:
+        result["rejected"] = "too_large"
+        return result
+    except (UnidentifiedImageError, OSError):
+        result["rejected"] = "unreadable"
+        return result
+
+    orientation = image.getexif().get(0x0112, 1)  # EXIF Orientation tag
+    image = ImageOps.exif_transpose(image)
+
+    # Lighting and focus, measured on a small grayscale copy
+    sample = image.convert("L")
+    sample.thumbnail((QUALITY_SAMPLE_EDGE, QUALITY_SAMPLE_EDGE))
+    brightness = ImageStat.Stat(sample).mean[0]
+    sharpness = ImageStat.Stat(sample.filter(LAPLACIAN)).var[0]
+    result.update(brightness=round(brightness, 1), sharpness=round(sharpness, 1))
+    if brightness < settings.VISION_MIN_BRIGHTNESS:
+        result["rejected"] = "too_dark"
+    elif sharpness < settings.VISION_MIN_SHARPNESS:
+        result["rejected"] = "too_blurry"
+    if result["rejected"]:
+        return result
+    result["phash"] = dhash(sample)
+
+    max_edge = settings.VISION_MAX_LONG_EDGE
+    needs_resize = max(image.size) > max_edge
+    if result["format"] in MEDIA_TYPES and not needs_resize and orientation == 1:
+        # Already small, upright and in a supported format - send the original bytes
+        output, media_type = data, MEDIA_TYPES[result["format"]]
+    else:
+        if needs_resize:
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.convert("RGB").save(
+            buffer, "JPEG", quality=settings.VISION_JPEG_QUALITY, optimize=True
+        )
+        output, media_type = buffer.getvalue(), "image/jpeg"
+
+    result.update(
+        data=output,
+        media_type=media_type,
+        width=image.size[0],
+        height=image.size[1],
+        bytes=len(output),
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
+    return result
+
+
+def read_label_text(data: bytes) -> Optional[str]:
+    """Printed text on a (prepared) label photo via Tesseract - None when OCR isn't available"""
+    try:
+        import pytesseract
+    except ImportError:
+        # OCR is optional - without it label photos only match the cache exactly
+        return None
+    try:
+        return pytesseract.image_to_string(Image.open(io.BytesIO(data)).convert("L"))
+    except (pytesseract.TesseractError, pytesseract.TesseractNotFoundError, OSError):
+        return None
+
+
+class ImagePipeline:
+    """
+    Runs preprocess_image in a process pool so decoding/resizing large photos
+    doesn't block the event loop or hold the GIL
+    Workers are spawned (not forked from the running server with its event loop,
+    threads and open connections); a pool broken by a dying worker is replaced
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        self.processed = 0
+        self.rejected = 0
+        self.pool_failures = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.total_ms = 0.0
+
+    async def prepare(self, data: bytes) -> Dict:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.VISION_PREPROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        started = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._pool, preprocess_image, data
+            )
+        except BrokenProcessPool as e:
+            # A worker died (e.g. out of memory on a huge image) - every later call would fail too
+            print(f"Error preprocessing image: {e}")
+            self.pool_failures += 1
+            self.close()
+            result = {"original_bytes": len(data), "format": None, "rejected": "processing_failed"}
+        self.total_ms += (time.perf_counter() - started) * 1000
+
+        self.processed += 1
+        self.bytes_in += result["original_bytes"]
+        if result["rejected"]:
+            self.rejected += 1
+        else:
+            self.bytes_out += result["bytes"]
+        return result
+
+    async def read_text(self, data: bytes) -> Optional[str]:
+        """OCR text of a prepared photo (in the pool), or None"""
+        if self._pool is None:
+            return None
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, read_label_text, data)
+        except BrokenProcessPool as e:
+            print(f"Error reading label text: {e}")
+            self.pool_failures += 1
+            self.close()
+            return None
+
+    def stats(self) -> Dict:
+        accepted = self.processed - self.rejected
+        return {
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "pool_failures": self.pool_failures,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "avg_ms": self.total_ms / self.processed if self.processed else 0.0,
+            "bytes_saved_per_image": (self.bytes_in - self.bytes_out) / accepted if accepted else 0.0,
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Singleton instance
+image_pipeline = ImagePipeline()
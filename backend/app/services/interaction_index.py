@@ -0,0 +1,238 @@
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import json
+import os
+import re
+from app.core.config import settings
+from app.core.llm import llm_client
+
+DEFAULT_INTERACTIONS_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "data", "drug_interactions.json"
+)
+
+SEVERITIES = ("none", "minor", "moderate", "major", "contraindicated")
+SEVERE = {"major", "contraindicated"}
+
+# Strength, units and dosage-form words dropped before matching a drug name
+NOISE_WORDS = re.compile(
+    r"\b(\d+(\.\d+)?\s*(mg|mcg|g|ml|meq|iu|units?|%)?|tablets?|tabs?|capsules?|caps?|oral|"
+    r"er|xr|sr|dr|hcl|extended|delayed|release|daily|chewable|liquid|solution)\b"
+)
+
+# Salt/counter-ion words - 'warfarin sodium' is warfarin, but on their own they never
+# identify a drug ('losartan potassium' is not potassium chloride)
+SALT_WORDS = {
+    "potassium",
+    "sodium",
+    "calcium",
+    "magnesium",
+    "chloride",
+    "citrate",
+    "sulfate",
+    "phosphate",
+    "acetate",
+    "hydrochloride",
+}
+
+Pair = FrozenSet[str]
+
+
+def normalize_name(name: str) -> str:
+    """'Zocor 20mg tablet' -> 'zocor' (synonyms are resolved by the index)"""
+    cleaned = NOISE_WORDS.sub(" ", (name or "").lower())
+    return " ".join(re.sub(r"[^a-z0-9\- ]+", " ", cleaned).split())
+
+
+class InteractionIndex:
+    """
+    Drug-drug interaction checks answered locally where possible
+    Known pairs come from a data file (canonical names, brand/synonym names and
+    pairwise records with severity); model verdicts for unseen pairs are memoized
+    per normalized pair, so each pair costs at most one Claude call per process
+    """
+
+    def __init__(self):
+        self.llm = llm_client
+        path = settings.DRUG_INTERACTIONS_FILE or DEFAULT_INTERACTIONS_FILE
+        with open(path) as f:
+            data = json.load(f)
+
+        self.synonyms: Dict[str, str] = {}
+        for canonical, aliases in data.get("drugs", {}).items():
+            for alias in [canonical, *aliases]:
+                self.synonyms[normalize_name(alias)] = canonical
+
+        self.pairs: Dict[Pair, Dict] = {}
+        for record in data.get("interactions", []):
+            pair = frozenset(self.canonical(d) for d in record["drugs"])
+            self.pairs[pair] = {
+                "severity": record["severity"],
+                "description": record["description"],
+                "source": "index",
+            }
+
+        self.verdicts: "OrderedDict[Pair, Dict]" = OrderedDict()
+        self.max_verdicts = settings.INTERACTION_MEMO_MAX
+
+        self.index_hits = 0
+        self.memo_hits = 0
+        self.model_pairs = 0
+        self.model_calls = 0
+
+    def canonical(self, name: str) -> str:
+        """
+        Canonical drug name when the whole name (less dose and salt words) is one known
+        drug; anything else - 'Advil PM', 'losartan potassium' - stays as its normalized
+        name, so combination products are never collapsed into one of their ingredients
+        """
+        normalized = normalize_name(name)
+        if normalized in self.synonyms:
+            return self.synonyms[normalized]
+
+        base = " ".join(w for w in normalized.split() if w not in SALT_WORDS)
+        return self.synonyms.get(base, normalized)
+
+    def lookup(self, pair: Pair) -> Optional[Dict]:
+        """Local answer for a pair (data file, then memoized model verdicts)"""
+        record = self.pairs.get(pair)
+        if record is not None:
+            self.index_hits += 1
+            return record
+
+        record = self.verdicts.get(pair)
+        if record is not None:
+            self.memo_hits += 1
+            self.verdicts.move_to_end(pair)
+        return record
+
+    async def check(self, new_medication: str, current_medications: List[Dict]) -> Dict:
+        """Interactions between a new medication and the user's current ones"""
+        new_name = self.canonical(new_medication)
+
+        found: List[Tuple[str, Dict]] = []
+        unknown: Dict[Pair, str] = {}
+        for med in current_medications:
+            current_name = self.canonical(med.get("name", ""))
+            if not current_name:
+                continue
+            if current_name == new_name:
+                found.append(
+                    (
+                        med["name"],
+                        {
+                            "severity": "major",
+                            "description": "This is the same medicine the person already takes - taking both could be a double dose.",
+                            "source": "index",
+                        },
+                    )
+                )
+                continue
+
+            pair = frozenset((new_name, current_name))
+            record = self.lookup(pair)
+            if record is None:
+                unknown[pair] = med["name"]
+            else:
+                found.append((med["name"], record))
+
+        if unknown:
+            verdicts = await self._ask_model(new_medication, unknown)
+            for pair, current in unknown.items():
+                record = verdicts.get(pair) or {
+                    "severity": "unknown",
+                    "description": "Could not check this combination.",
+                    "source": "model",
+                }
+                found.append((current, record))
+
+        return self._result(new_medication, found)
+
+    async def _ask_model(self, new_medication: str, unknown: Dict[Pair, str]) -> Dict[Pair, Dict]:
+        """
+        One Claude call covering every unseen pair; parsed verdicts are memoized
+        The model sees the names as the user has them (e.g. 'losartan potassium 50mg'),
+        not our canonical names
+        """
+        listed = {normalize_name(current): pair for pair, current in unknown.items()}
+        prompt = f"""You are a medication safety assistant.
+
+For each medication below, state how it interacts with {new_medication}.
+
+MEDICATIONS: {", ".join(unknown.values())}
+
+Reply with only a JSON array, one object per medication:
+[{{"medication": "<name as listed>", "severity": "none|minor|moderate|major|contraindicated", "description": "<one plain sentence for an elderly person>"}}]"""
+
+        self.model_calls += 1
+        self.model_pairs += len(unknown)
+        try:
+            response = await self.llm.create_message(
+                provider="interactions",
+                model="claude-sonnet-4-5-20250929",
+                max_tokens=1024,
+                messages=[{"role": "user", "content": prompt}],
+            )
+            text = response.content[0].text
+            items = json.loads(text[text.index("[") : text.rindex("]") + 1])
+        except Exception as e:
+            print(f"Error checking interactions: {e}")
+            return {}
+
+        verdicts = {}
+        for item in items:
+            pair = listed.get(normalize_name(str(item.get("medication", ""))))
+            severity = str(item.get("severity", "")).lower()
+            if pair is None or severity not in SEVERITIES:
+                continue
+            verdicts[pair] = {
+                "severity": severity,
+                "description": str(item.get("description", "")),
+                "source": "model",
+            }
+            self.verdicts[pair] = verdicts[pair]
+
+        while len(self.verdicts) > self.max_verdicts:
+            self.verdicts.popitem(last=False)
+        return verdicts
+
+    def _result(self, new_medication: str, found: List[Tuple[str, Dict]]) -> Dict:
+        details = [
+            {"medications": [new_medication, current], **record}
+            for current, record in found
+            if record["severity"] != "none"
+        ]
+        severe = [d for d in details if d["severity"] in SEVERE]
+        unchecked = any(d["severity"] == "unknown" for d in details)
+
+        if severe:
+            recommendation = "Please consult with your doctor before taking this medication."
+        elif unchecked:
+            recommendation = "Some combinations could not be checked. Please ask your pharmacist."
+        else:
+            recommendation = "This appears safe, but verify with your pharmacist."
+
+        return {
+            "interactions": [
+                f"{d['medications'][0]} + {d['medications'][1]} ({d['severity']}): {d['description']}"
+                for d in details
+            ],
+            "details": details,
+            "warnings": [f"{d['medications'][1]}: {d['description']}" for d in severe],
+            # Err on the side of caution when a pair couldn't be checked
+            "safe": not severe and not unchecked,
+            "recommendation": recommendation,
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "known_pairs": len(self.pairs),
+            "index_hits": self.index_hits,
+            "memo_hits": self.memo_hits,
+            "memoized_verdicts": len(self.verdicts),
+            "model_calls": self.model_calls,
+            "model_pairs": self.model_pairs,
+        }
+
+
+# Singleton instance
+interaction_index = InteractionIndex()
@@ -0,0 +1,166 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+from sqlalchemy import Row, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.geo import TrackPoint, decode_track, douglas_peucker, encode_track, simplify_to_budget
+from app.models.medication import LocationFix, LocationSegment
+
+SEGMENT_SPAN = timedelta(hours=1)
+
+
+class LocationHistoryService:
+    """
+    Compact, queryable location history
+    Raw fixes older than LOCATION_COMPACT_AFTER are simplified (Douglas-Peucker)
+    and packed into hourly delta/varint segments; track queries merge segments
+    with recent raw fixes and downsample to the caller's point budget
+    Every worker runs compaction: a batch is claimed by deleting its fixes (locked
+    rows are skipped), so concurrent compactors never pack the same fix twice
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.compacted_fixes = 0
+        self.segments_written = 0
+        self.points_kept = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                while await self.compact() >= settings.LOCATION_COMPACT_BATCH:
+                    pass  # Backlog - keep going until a partial batch
+            except Exception as e:
+                print(f"Error compacting location history: {e}")
+            await asyncio.sleep(settings.LOCATION_COMPACT_INTERVAL)
+
+    async def compact(self, now: Optional[datetime] = None) -> int:
+        """Pack one batch of old raw fixes into segments; returns fixes compacted"""
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=settings.LOCATION_COMPACT_AFTER)
+        table = LocationFix.__table__
+        batch = (
+            select(table.c.id)
+            .where(table.c.recorded_at < cutoff)
+            .order_by(table.c.user_id, table.c.recorded_at)
+            .limit(settings.LOCATION_COMPACT_BATCH)
+            .with_for_update(skip_locked=True)
+        )
+        async with SessionLocal() as db:
+            # Claim and read the batch in one statement; the insert below commits with it
+            fixes = (
+                await db.execute(
+                    delete(table)
+                    .where(table.c.id.in_(batch.scalar_subquery()))
+                    .returning(table.c.user_id, table.c.latitude, table.c.longitude, table.c.recorded_at)
+                )
+            ).all()
+            if not fixes:
+                return 0
+            fixes.sort(key=lambda f: (f.user_id, f.recorded_at))
+
+            groups: Dict[Tuple[int, datetime], List[Row]] = defaultdict(list)
+            for fix in fixes:
+                hour = fix.recorded_at.replace(minute=0, second=0, microsecond=0)
+                groups[(fix.user_id, hour)].append(fix)
+
+            segments = []
+            for (user_id, _), group in groups.items():
+                start_at = group[0].recorded_at.replace(microsecond=0)
+                points = [
+                    ((f.recorded_at - start_at).total_seconds(), f.latitude, f.longitude)
+                    for f in group
+                ]
+                kept = douglas_peucker(points, settings.LOCATION_SIMPLIFY_TOLERANCE_M)
+                segments.append(
+                    {
+                        "user_id": user_id,
+                        "start_at": start_at,
+                        "end_at": group[-1].recorded_at,
+                        "point_count": len(kept),
+                        "raw_count": len(group),
+                        "data": encode_track(kept),
+                    }
+                )
+                self.points_kept += len(kept)
+
+            await db.execute(LocationSegment.__table__.insert(), segments)
+            await db.commit()
+
+        self.compacted_fixes += len(fixes)
+        self.segments_written += len(segments)
+        return len(fixes)
+
+    async def track(
+        self, db: AsyncSession, user_id: int, start: datetime, end: datetime, max_points: int
+    ) -> List[Dict]:
+        """A user's path between start and end (naive UTC), at most max_points points"""
+        segments = (
+            await db.execute(
+                select(LocationSegment).where(
+                    LocationSegment.user_id == user_id,
+                    # Segments never span more than an hour, so this stays a range scan
+                    LocationSegment.start_at >= start - SEGMENT_SPAN,
+                    LocationSegment.start_at <= end,
+                )
+            )
+        ).scalars().all()
+        fixes = (
+            await db.execute(
+                select(LocationFix).where(
+                    LocationFix.user_id == user_id,
+                    LocationFix.recorded_at >= start,
+                    LocationFix.recorded_at <= end,
+                )
+            )
+        ).scalars().all()
+
+        # Work in seconds from start so segments and raw fixes share one timeline
+        points: List[TrackPoint] = []
+        for segment in segments:
+            offset = (segment.start_at - start).total_seconds()
+            points.extend(
+                (offset + seconds, latitude, longitude)
+                for seconds, latitude, longitude in decode_track(segment.data)
+            )
+        points.extend(
+            ((f.recorded_at - start).total_seconds(), f.latitude, f.longitude) for f in fixes
+        )
+
+        span = (end - start).total_seconds()
+        points = sorted(p for p in points if 0 <= p[0] <= span)
+        return [
+            {
+                "timestamp": (start + timedelta(seconds=seconds)).isoformat(),
+                "latitude": latitude,
+                "longitude": longitude,
+            }
+            for seconds, latitude, longitude in simplify_to_budget(points, max_points)
+        ]
+
+    def stats(self) -> Dict:
+        return {
+            "compacted_fixes": self.compacted_fixes,
+            "segments_written": self.segments_written,
+            "points_kept": self.points_kept,
+            "compression_ratio": self.compacted_fixes / self.points_kept if self.points_kept else 0.0,
+        }
+
+
+# Singleton instance
+location_history = LocationHistoryService()
@@ -0,0 +1,197 @@
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import time
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.medication import LocationFix
+from app.services.medication_log_service import to_utc_naive
+
+
+def parse_fix_time(value: Optional[str]) -> datetime:
+    """Device timestamp (ISO 8601, 'Z' allowed) as naive UTC; server time if missing or malformed"""
+    if value:
+        try:
+            return to_utc_naive(datetime.fromisoformat(value.replace("Z", "+00:00")))
+        except ValueError:
+            pass
+    return datetime.utcnow()
+
+
+class LocationStore:
+    """
+    Location fixes from users' phones, without a database transaction per fix
+    Each user has a ring buffer of recent fixes and a cached latest position;
+    fixes are written behind in bulk inserts once LOCATION_FLUSH_BATCH are
+    buffered or LOCATION_FLUSH_INTERVAL seconds pass. The cached position is
+    served for at most LOCATION_FLUSH_INTERVAL - after that the database is read
+    again, since the phone may have reported newer fixes to another worker
+    """
+
+    def __init__(self):
+        self.recent_fixes: "OrderedDict[int, Deque[Dict]]" = OrderedDict()
+        self.latest: Dict[int, Dict] = {}
+        self.latest_checked: Dict[int, float] = {}  # user id -> monotonic time latest was known current
+        self.buffer: List[Dict] = []
+
+        self._flush_now = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.received = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def record(
+        self,
+        user_id: int,
+        latitude: float,
+        longitude: float,
+        accuracy: Optional[float],
+        recorded_at: datetime,
+    ) -> Dict:
+        """Buffer one fix (recorded_at is naive UTC) and update the user's latest position"""
+        fix = {
+            "user_id": user_id,
+            "latitude": latitude,
+            "longitude": longitude,
+            "accuracy": accuracy,
+            "recorded_at": recorded_at,
+            "received_at": datetime.utcnow(),
+        }
+        self.received += 1
+
+        self._ring(user_id).append(fix)
+
+        # Phones may deliver queued fixes out of order - keep the newest
+        latest = self.latest.get(user_id)
+        if latest is None or recorded_at >= latest["recorded_at"]:
+            self.latest[user_id] = fix
+            self.latest_checked[user_id] = time.monotonic()
+
+        self.buffer.append(fix)
+        if len(self.buffer) >= settings.LOCATION_FLUSH_BATCH:
+            self._flush_now.set()
+        return fix
+
+    async def get_latest(self, user_id: int) -> Optional[Dict]:
+        """
+        Latest fix - from memory if it was known current within LOCATION_FLUSH_INTERVAL,
+        otherwise the newer of the database row and this worker's unflushed fix
+        """
+        fix = self.latest.get(user_id)
+        checked = self.latest_checked.get(user_id)
+        if fix is not None and checked is not None and time.monotonic() - checked <= settings.LOCATION_FLUSH_INTERVAL:
+            return fix
+
+        started = time.monotonic()
+        async with SessionLocal() as db:
+            row = (
+                await db.execute(
+                    select(LocationFix)
+                    .where(LocationFix.user_id == user_id)
+                    .order_by(LocationFix.recorded_at.desc())
+                    .limit(1)
+                )
+            ).scalars().first()
+
+        # A fix may have been recorded here while reading
+        fix = self.latest.get(user_id)
+        if row is not None and (fix is None or row.recorded_at > fix["recorded_at"]):
+            fix = {
+                "user_id": user_id,
+                "latitude": row.latitude,
+                "longitude": row.longitude,
+                "accuracy": row.accuracy,
+                "recorded_at": row.recorded_at,
+                "received_at": row.received_at,
+            }
+        if fix is None:
+            return None
+
+        self._ring(user_id)
+        self.latest[user_id] = fix
+        self.latest_checked[user_id] = max(started, self.latest_checked.get(user_id, started))
+        return fix
+
+    def _ring(self, user_id: int) -> Deque[Dict]:
+        """User's recent-fix buffer, evicting the least recently active user when full"""
+        ring = self.recent_fixes.get(user_id)
+        if ring is None:
+            ring = self.recent_fixes[user_id] = deque(maxlen=settings.LOCATION_RING_SIZE)
+        self.recent_fixes.move_to_end(user_id)
+        while len(self.recent_fixes) > settings.LOCATION_MAX_USERS:
+            evicted, _ = self.recent_fixes.popitem(last=False)
+            self.latest.pop(evicted, None)
+            self.latest_checked.pop(evicted, None)
+        return ring
+
+    def recent(self, user_id: int) -> List[Dict]:
+        """Fixes still held in memory for a user, oldest first"""
+        return list(self.recent_fixes.get(user_id, ()))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_now.wait(), timeout=settings.LOCATION_FLUSH_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write buffered fixes in bulk inserts of up to LOCATION_FLUSH_BATCH rows"""
+        while self.buffer:
+            batch = self.buffer[: settings.LOCATION_FLUSH_BATCH]
+            del self.buffer[: len(batch)]
+            try:
+                async with SessionLocal() as db:
+                    await db.execute(LocationFix.__table__.insert(), batch)
+                    await db.commit()
+                self.written += len(batch)
+                self.flushes += 1
+            except Exception as e:
+                print(f"Error flushing location fixes: {e}")
+                self.flush_errors += 1
+                # Put the batch back for the next flush, dropping the oldest if over the cap
+                self.buffer[:0] = batch
+                overflow = len(self.buffer) - settings.LOCATION_MAX_BUFFERED
+                if overflow > 0:
+                    del self.buffer[:overflow]
+                    self.dropped += overflow
+                return
+
+    def stats(self) -> Dict:
+        return {
+            "received": self.received,
+            "written": self.written,
+            "buffered": len(self.buffer),
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "users_in_memory": len(self.recent_fixes),
+        }
+
+
+# Singleton instance
+location_store = LocationStore()
@@ -0,0 +1,95 @@
+from collections import defaultdict
+from typing import Dict, List
+from datetime import datetime, timezone
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.medication import Medication, MedicationLog, User
+from app.services.adherence_service import UPSERT_DIALECTS, adherence_service
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """Client timestamps may carry an offset; logs are stored as naive UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class MedicationLogService:
+    """
+    Batched, idempotent ingestion of taken/skipped dose events
+    Built for offline queues: one multi-row insert per batch, and events the
+    server has already seen (same user + idempotency key) are silently skipped
+    """
+
+    async def ingest(self, db: AsyncSession, user: User, events: List[Dict]) -> Dict:
+        """
+        Insert events and update adherence rollups in the session's transaction
+
+        Each event has idempotency_key, medication_id, status, taken_at and
+        optionally notes and confirmed_by. Returns accepted/duplicate counts and
+        the keys rejected for naming a medication the user doesn't have
+        The caller commits
+        """
+        # Last copy of a key within the batch wins
+        unique_events = list({e["idempotency_key"]: e for e in events}.values())
+
+        medication_ids = {e["medication_id"] for e in unique_events}
+        medications = {
+            m.id: m
+            for m in (
+                await db.execute(
+                    select(Medication).where(
+                        Medication.id.in_(medication_ids), Medication.user_id == user.id
+                    )
+                )
+            ).scalars()
+        }
+
+        rejected = [e["idempotency_key"] for e in unique_events if e["medication_id"] not in medications]
+        rows = [
+            {
+                "user_id": user.id,
+                "medication_id": e["medication_id"],
+                "taken_at": to_utc_naive(e["taken_at"]),
+                "status": e["status"],
+                "idempotency_key": e["idempotency_key"],
+                "confirmed_by": e.get("confirmed_by") or "user",
+                "notes": e.get("notes"),
+            }
+            for e in unique_events
+            if e["medication_id"] in medications
+        ]
+
+        inserted = []
+        if rows:
+            insert = UPSERT_DIALECTS[db.get_bind().dialect.name]
+            statement = (
+                insert(MedicationLog.__table__)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["user_id", "idempotency_key"])
+                .returning(
+                    MedicationLog.__table__.c.medication_id,
+                    MedicationLog.__table__.c.taken_at,
+                    MedicationLog.__table__.c.status,
+                )
+            )
+            inserted = (await db.execute(statement)).all()
+
+        # Only newly inserted doses count toward adherence
+        taken_by_medication: Dict[int, List[datetime]] = defaultdict(list)
+        for medication_id, taken_at, status in inserted:
+            if status == "taken":
+                taken_by_medication[medication_id].append(taken_at)
+
+        for medication_id, taken_at in taken_by_medication.items():
+            await adherence_service.record_doses(db, user, medications[medication_id], taken_at)
+
+        return {
+            "accepted": len(inserted),
+            "duplicates": len(rows) - len(inserted) + (len(events) - len(unique_events)),
+            "rejected": rejected,
+        }
+
+
+# Singleton instance
+medication_log_service = MedicationLogService()
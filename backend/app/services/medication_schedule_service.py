@@ -0,0 +1,124 @@
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.medication import Medication, MedicationScheduleSlot, User
+from app.services.schedule_index import days_of_week, parse_time_of_day, user_zone
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def utc_offset_minutes(zone_name: str, at: datetime) -> int:
+    """Offset of a timezone from UTC at the given (aware) instant, in minutes"""
+    return int(at.astimezone(user_zone(zone_name)).utcoffset().total_seconds() // 60)
+
+
+class MedicationScheduleService:
+    """
+    Normalized dose schedule (medication_schedule) for set-based queries across users
+    Kept in sync with Medication.times on create/deactivate; utc_minute is resolved
+    from each row's timezone and re-resolved by refresh_offsets() when DST changes
+    """
+
+    def build_slots(self, medication: Medication, user: User, now: Optional[datetime] = None) -> List[Dict]:
+        """Schedule rows for one medication (none if it is inactive)"""
+        if not medication.active:
+            return []
+
+        zone_name = user.timezone or "UTC"
+        offset = utc_offset_minutes(zone_name, now or datetime.now(timezone.utc))
+        days = days_of_week(medication, zone_name)
+
+        slots = []
+        for local_minute in sorted({parse_time_of_day(t) for t in medication.times or []} - {None}):
+            slots.append(
+                {
+                    "user_id": medication.user_id,
+                    "medication_id": medication.id,
+                    "local_minute": local_minute,
+                    "days_of_week": days,
+                    "timezone": zone_name,
+                    "utc_offset": offset,
+                    "utc_minute": (local_minute - offset) % MINUTES_PER_DAY,
+                }
+            )
+        return slots
+
+    async def sync_medication(self, db: AsyncSession, medication: Medication, user: User):
+        """Replace a medication's schedule rows (the caller commits)"""
+        await db.execute(
+            delete(MedicationScheduleSlot).where(MedicationScheduleSlot.medication_id == medication.id)
+        )
+        slots = self.build_slots(medication, user)
+        if slots:
+            await db.execute(MedicationScheduleSlot.__table__.insert(), slots)
+
+    async def due_between(
+        self, db: AsyncSession, start: datetime, minutes: int = 15, user_id: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Doses across all users (or one user) due in [start, start + minutes)
+        One range scan on utc_minute (two if the window crosses UTC midnight);
+        the weekday mask is checked per row in the user's local time
+        """
+        start = start.astimezone(timezone.utc).replace(second=0, microsecond=0)
+        first = start.hour * 60 + start.minute
+        last = first + min(minutes, MINUTES_PER_DAY)
+
+        column = MedicationScheduleSlot.utc_minute
+        if last <= MINUTES_PER_DAY:
+            window = (column >= first) & (column < last)
+        else:
+            window = or_(column >= first, column < last - MINUTES_PER_DAY)
+
+        query = select(MedicationScheduleSlot).where(window)
+        if user_id is not None:
+            query = query.where(MedicationScheduleSlot.user_id == user_id)
+        slots = (await db.execute(query)).scalars().all()
+
+        due = []
+        for slot in slots:
+            # Minutes from start until this slot, wrapping past UTC midnight
+            delay = (slot.utc_minute - first) % MINUTES_PER_DAY
+            due_at = start + timedelta(minutes=delay)
+            local = due_at.astimezone(user_zone(slot.timezone))
+            if slot.days_of_week & (1 << local.weekday()):
+                due.append(
+                    {
+                        "user_id": slot.user_id,
+                        "medication_id": slot.medication_id,
+                        "due_at": due_at,
+                        "local_time": f"{slot.local_minute // 60:02d}:{slot.local_minute % 60:02d}",
+                        "timezone": slot.timezone,
+                    }
+                )
+        return due
+
+    async def refresh_offsets(self, db: AsyncSession, now: Optional[datetime] = None) -> int:
+        """Re-resolve utc_minute for timezones whose offset changed (DST); returns rows updated"""
+        now = now or datetime.now(timezone.utc)
+        zones = (
+            await db.execute(select(MedicationScheduleSlot.timezone).distinct())
+        ).scalars().all()
+
+        updated = 0
+        for zone_name in zones:
+            offset = utc_offset_minutes(zone_name, now)
+            result = await db.execute(
+                update(MedicationScheduleSlot)
+                .where(
+                    MedicationScheduleSlot.timezone == zone_name,
+                    MedicationScheduleSlot.utc_offset != offset,
+                )
+                .values(
+                    utc_offset=offset,
+                    utc_minute=(MedicationScheduleSlot.local_minute - offset + MINUTES_PER_DAY)
+                    % MINUTES_PER_DAY,
+                )
+            )
+            updated += result.rowcount or 0
+        return updated
+
+
+# Singleton instance
+medication_schedule_service = MedicationScheduleService()
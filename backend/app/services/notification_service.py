@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+import asyncio
+import time
+import httpx
+from app.core.config import settings
+from app.core.metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY
+
+
+class NotificationService:
+    """
+    Caregiver notifications (SMS via Twilio)
+    Emergency alerts are dispatched in the background so the user's reply is never held up
+    """
+
+    def __init__(self):
+        self.http_client = httpx.AsyncClient(timeout=httpx.Timeout(10.0, connect=3.0))
+        self._tasks: Set[asyncio.Task] = set()
+        # user id -> when their caregiver was last paged (oldest first)
+        self.last_alert: "OrderedDict[int, float]" = OrderedDict()
+
+        # Request -> alert-dispatched latency
+        self.alerts_sent = 0
+        self.alerts_failed = 0
+        self.alerts_suppressed = 0
+        self.total_dispatch_ms = 0.0
+        self.max_dispatch_ms = 0.0
+
+    def dispatch_emergency(self, user, message: str, request_started: float) -> Optional[asyncio.Task]:
+        """
+        Start a caregiver alert in the background and return immediately
+        Returns None without paging if this user's caregiver was alerted within
+        EMERGENCY_ALERT_COOLDOWN (repeated or follow-up messages about the same emergency)
+        """
+        now = time.monotonic()
+        cooldown = settings.EMERGENCY_ALERT_COOLDOWN
+        while self.last_alert and now - next(iter(self.last_alert.values())) > cooldown:
+            self.last_alert.popitem(last=False)
+
+        if user.id in self.last_alert:
+            self.alerts_suppressed += 1
+            return None
+
+        self.last_alert[user.id] = now
+        return self._spawn(self._send_emergency(user, message, request_started))
+
+    def dispatch_sms(self, to_number: Optional[str], body: str) -> asyncio.Task:
+        """Send a non-urgent SMS in the background (e.g. geofence arrivals)"""
+        return self._spawn(self.send_sms(to_number, body))
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        # Hold a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _send_emergency(self, user, message: str, request_started: float) -> bool:
+        to_number = user.caregiver_phone or settings.CAREGIVER_PHONE
+        body = f"Care Companion alert: {user.name} may need help. They said: \"{message}\""
+
+        sent = await self.send_sms(to_number, body)
+        elapsed_ms = (time.perf_counter() - request_started) * 1000
+
+        if sent:
+            self.alerts_sent += 1
+            self.total_dispatch_ms += elapsed_ms
+            self.max_dispatch_ms = max(self.max_dispatch_ms, elapsed_ms)
+        else:
+            self.alerts_failed += 1
+            # Let the next message try again instead of waiting out the cooldown
+            self.last_alert.pop(user.id, None)
+
+        print(f"Emergency alert for user {user.id}: sent={sent} after {elapsed_ms:.0f}ms")
+        return sent
+
+    async def send_sms(self, to_number: Optional[str], body: str) -> bool:
+        """Send an SMS through the Twilio REST API"""
+        if not (
+            to_number
+            and settings.TWILIO_ACCOUNT_SID
+            and settings.TWILIO_AUTH_TOKEN
+            and settings.TWILIO_PHONE_NUMBER
+        ):
+            print("SMS not sent: Twilio or caregiver phone not configured")
+            return False
+
+        started = time.perf_counter()
+        try:
+            response = await self.http_client.post(
+                f"https://api.twilio.com/2010-04-01/Accounts/{settings.TWILIO_ACCOUNT_SID}/Messages.json",
+                auth=(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN),
+                data={"To": to_number, "From": settings.TWILIO_PHONE_NUMBER, "Body": body},
+            )
+            response.raise_for_status()
+            return True
+
+        except Exception as e:
+            print(f"Error sending SMS: {e}")
+            UPSTREAM_ERRORS.inc("twilio")
+            return False
+
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, "twilio")
+
+    def stats(self) -> Dict:
+        return {
+            "alerts_sent": self.alerts_sent,
+            "alerts_failed": self.alerts_failed,
+            "alerts_suppressed": self.alerts_suppressed,
+            "avg_dispatch_ms": self.total_dispatch_ms / self.alerts_sent
+            if self.alerts_sent
+            else 0.0,
+            "max_dispatch_ms": self.max_dispatch_ms,
+        }
+
+    async def close(self):
+        await self.http_client.aclose()
+
+
+# Singleton instance
+notification_service = NotificationService()
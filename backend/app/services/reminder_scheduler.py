@@ -0,0 +1,282 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta, timezone
+import asyncio
+import heapq
+import itertools
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.medication import MedicationReminder, MedicationScheduleSlot
+from app.services.adherence_service import UPSERT_DIALECTS
+from app.services.medication_log_service import to_utc_naive
+from app.services.medication_schedule_service import medication_schedule_service
+from app.services.schedule_index import parse_time_of_day
+
+ReminderHandler = Callable[[Dict], Awaitable[None]]
+
+
+class SystemClock:
+    """Wall clock (UTC) - tests pass a fake clock, or drive tick() with explicit times"""
+
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+
+class ReminderScheduler:
+    """
+    Fires medication reminders at each dose's local time, for all users
+    Only doses inside a rolling horizon (REMINDER_HORIZON_MINUTES) are held in a
+    min-heap, so memory tracks doses-per-horizon rather than total users. Sleeps
+    are recomputed from the clock every loop, so drift never accumulates
+
+    Every worker may run a scheduler: a dose fires only in the worker whose
+    medication_reminders insert claims it, and only if its schedule row still exists
+    (so a dose removed through another worker is not fired from a stale heap). Fired
+    reminders wait in that table until the app collects them, from any worker
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or SystemClock()
+        self.horizon = timedelta(minutes=settings.REMINDER_HORIZON_MINUTES)
+        self.late_grace = timedelta(seconds=settings.REMINDER_LATE_GRACE)
+
+        # (due_at, seq, generation, reminder)
+        self.heap: List[Tuple[datetime, int, int, Dict]] = []
+        self.seq = itertools.count()
+        # Bumped by rearm() - heap entries from an older generation are skipped
+        self.generations: Dict[int, int] = {}
+        self.loaded_until: Optional[datetime] = None
+        self.last_tick: Optional[datetime] = None
+        self.handlers: List[ReminderHandler] = []
+
+        self._rearm_users: Set[int] = set()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.fired = 0
+        self.claimed_elsewhere = 0
+        self.dropped_removed = 0
+        self.dropped_late = 0
+        self.total_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def add_handler(self, handler: ReminderHandler):
+        """Register a coroutine called with each fired reminder (e.g. push or SMS)"""
+        self.handlers.append(handler)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def rearm(self, user_id: int):
+        """
+        Reload a user's upcoming doses (call after their medications change)
+        Only this worker's heap is reloaded; other workers see added doses at their next
+        refill, and skip removed ones when the schedule-row check at fire time fails
+        """
+        self.generations[user_id] = self.generations.get(user_id, 0) + 1
+        self._rearm_users.add(user_id)
+        self._wake.set()
+
+    async def run(self):
+        while True:
+            try:
+                await self.tick(self.clock.now())
+            except Exception as e:
+                print(f"Error in reminder scheduler: {e}")
+
+            delay = self.seconds_until_next(self.clock.now())
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def seconds_until_next(self, now: datetime) -> float:
+        """Sleep until the next reminder or refill, capped at REMINDER_MAX_SLEEP"""
+        wake_at = [self.loaded_until - self.horizon / 2] if self.loaded_until else []
+        if self.heap:
+            wake_at.append(self.heap[0][0])
+        delay = min([(t - now).total_seconds() for t in wake_at] or [0])
+        return min(max(delay, 0.0), settings.REMINDER_MAX_SLEEP)
+
+    async def tick(self, now: datetime):
+        """Load doses up to now + horizon, then fire everything due at or before now"""
+        await self._load(now)
+
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            due_at, _, generation, reminder = heapq.heappop(self.heap)
+            if generation != self.generations.get(reminder["user_id"], 0):
+                continue  # Superseded by a rearm
+            if now - due_at > self.late_grace:
+                self.dropped_late += 1
+                continue
+            due.append(reminder)
+
+        if due:
+            async with SessionLocal() as db:
+                claimed = await self._claim(db, due, now)
+                await db.commit()
+            for reminder in claimed:
+                await self._fire(reminder, now)
+
+        self.last_tick = now
+
+    async def _load(self, now: datetime):
+        now = now.replace(second=0, microsecond=0)
+        users = self._rearm_users
+        self._rearm_users = set()
+
+        # Refill once half the horizon has been consumed
+        refill = self.loaded_until is None or self.loaded_until - now < self.horizon / 2
+        if not (refill or users):
+            return
+
+        loaded_until = self.loaded_until
+        async with SessionLocal() as db:
+            # Re-read rearmed users over the window already loaded for everyone else,
+            # skipping doses an earlier tick has already handled
+            if loaded_until is not None and loaded_until > now:
+                window = int((loaded_until - now).total_seconds() // 60)
+                for user_id in users:
+                    for reminder in await medication_schedule_service.due_between(
+                        db, now, window, user_id=user_id
+                    ):
+                        if self.last_tick is None or reminder["due_at"] > self.last_tick:
+                            self._push(reminder)
+
+            if refill:
+                # Pick up DST offset changes before reading the next window
+                await medication_schedule_service.refresh_offsets(db, now)
+                # Collected or not, reminders this old are no longer useful (or claimable)
+                await db.execute(
+                    delete(MedicationReminder).where(
+                        MedicationReminder.due_at < to_utc_naive(now - timedelta(hours=settings.REMINDER_RETENTION_HOURS))
+                    )
+                )
+                await db.commit()
+                start = max(loaded_until or now, now)
+                end = now + self.horizon
+                if end > start:
+                    minutes = int((end - start).total_seconds() // 60)
+                    for reminder in await medication_schedule_service.due_between(db, start, minutes):
+                        self._push(reminder)
+                self.loaded_until = max(end, start)
+
+    def _push(self, reminder: Dict):
+        generation = self.generations.get(reminder["user_id"], 0)
+        heapq.heappush(self.heap, (reminder["due_at"], next(self.seq), generation, reminder))
+
+    async def _claim(self, db: AsyncSession, due: List[Dict], now: datetime) -> List[Dict]:
+        """
+        Reminders this worker may fire: their schedule row still exists and the
+        medication_reminders insert for (medication, due_at) was ours (the caller commits)
+        """
+        keys = {(r["medication_id"], parse_time_of_day(r["local_time"])) for r in due}
+        current = set(
+            (
+                await db.execute(
+                    select(MedicationScheduleSlot.medication_id, MedicationScheduleSlot.local_minute).where(
+                        tuple_(MedicationScheduleSlot.medication_id, MedicationScheduleSlot.local_minute).in_(keys)
+                    )
+                )
+            ).all()
+        )
+        scheduled = [r for r in due if (r["medication_id"], parse_time_of_day(r["local_time"])) in current]
+        self.dropped_removed += len(due) - len(scheduled)
+        if not scheduled:
+            return []
+
+        insert = UPSERT_DIALECTS[db.get_bind().dialect.name]
+        table = MedicationReminder.__table__
+        statement = (
+            insert(table)
+            .values(
+                [
+                    {
+                        "user_id": r["user_id"],
+                        "medication_id": r["medication_id"],
+                        "due_at": to_utc_naive(r["due_at"]),
+                        "local_time": r["local_time"],
+                        "timezone": r["timezone"],
+                        "fired_at": to_utc_naive(now),
+                    }
+                    for r in scheduled
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["medication_id", "due_at"])
+            .returning(table.c.medication_id, table.c.due_at)
+        )
+        ours = set((await db.execute(statement)).all())
+
+        claimed = [r for r in scheduled if (r["medication_id"], to_utc_naive(r["due_at"])) in ours]
+        self.claimed_elsewhere += len(scheduled) - len(claimed)
+        return claimed
+
+    async def _fire(self, reminder: Dict, now: datetime):
+        lag_ms = (now - reminder["due_at"]).total_seconds() * 1000
+        self.fired += 1
+        self.total_lag_ms += lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+        event = {**reminder, "due_at": reminder["due_at"].isoformat(), "fired_at": now.isoformat()}
+        for handler in self.handlers:
+            try:
+                await handler(event)
+            except Exception as e:
+                print(f"Error in reminder handler: {e}")
+
+    async def collect(self, db: AsyncSession, user_id: int, now: Optional[datetime] = None) -> List[Dict]:
+        """
+        Fired reminders the user's app hasn't collected yet (the most recent
+        REMINDER_PENDING_PER_USER), each returned once across all workers (the caller commits)
+        """
+        table = MedicationReminder
+        rows = (
+            await db.execute(
+                update(table)
+                .where(table.user_id == user_id, table.collected_at.is_(None))
+                .values(collected_at=to_utc_naive(now or self.clock.now()))
+                .returning(table.medication_id, table.due_at, table.local_time, table.timezone, table.fired_at)
+            )
+        ).all()
+
+        rows = sorted(rows, key=lambda row: row.due_at)[-settings.REMINDER_PENDING_PER_USER :]
+        return [
+            {
+                "user_id": user_id,
+                "medication_id": row.medication_id,
+                "due_at": row.due_at.replace(tzinfo=timezone.utc).isoformat(),
+                "local_time": row.local_time,
+                "timezone": row.timezone,
+                "fired_at": row.fired_at.replace(tzinfo=timezone.utc).isoformat(),
+            }
+            for row in rows
+        ]
+
+    def stats(self) -> Dict:
+        return {
+            "armed": len(self.heap),
+            "loaded_until": self.loaded_until.isoformat() if self.loaded_until else None,
+            "fired": self.fired,
+            "claimed_elsewhere": self.claimed_elsewhere,
+            "dropped_removed": self.dropped_removed,
+            "dropped_late": self.dropped_late,
+            "avg_lag_ms": self.total_lag_ms / self.fired if self.fired else 0.0,
+            "max_lag_ms": self.max_lag_ms,
+        }
+
+
+# Singleton instance
+reminder_scheduler = ReminderScheduler()
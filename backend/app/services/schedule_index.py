@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import bisect
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.medication import User, Medication
+
+EVERY_DAY = 0b1111111
+
+
+def user_zone(timezone: Optional[str]) -> ZoneInfo:
+    """User's timezone, falling back to UTC if unset or unknown"""
+    try:
+        return ZoneInfo(timezone or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        print(f"Unknown timezone '{timezone}', using UTC")
+        return ZoneInfo("UTC")
+
+
+def parse_time_of_day(value: str) -> Optional[int]:
+    """'08:30' -> minutes after midnight (None if malformed)"""
+    try:
+        hours, minutes = value.split(":")[:2]
+        minute_of_day = int(hours) * 60 + int(minutes)
+    except (AttributeError, ValueError):
+        return None
+    return minute_of_day if 0 <= minute_of_day < 24 * 60 else None
+
+
+def days_of_week(medication: Medication, zone_name: str) -> int:
+    """Weekday bitmask (bit 0 = Monday) - weekly doses repeat on the day they were added"""
+    if (medication.frequency or "").lower() == "weekly" and medication.created_at:
+        created = medication.created_at.replace(tzinfo=timezone.utc).astimezone(user_zone(zone_name))
+        return 1 << created.weekday()
+    return EVERY_DAY
+
+
+class UserSchedule:
+    """One user's active doses bucketed by local hour, plus a sorted list for 'next'"""
+
+    def __init__(self, zone: ZoneInfo, medications: List[Medication]):
+        self.timezone = zone
+        self.built = time.monotonic()
+        self.by_hour: List[List[Tuple[int, Dict]]] = [[] for _ in range(24)]
+        doses: List[Tuple[int, int, Dict]] = []
+
+        for med in medications:
+            days = days_of_week(med, zone.key)
+            for time_str in med.times or []:
+                minute_of_day = parse_time_of_day(time_str)
+                if minute_of_day is None:
+                    continue
+                dose = {
+                    "medication_id": med.id,
+                    "name": med.name,
+                    "dosage": med.dosage,
+                    "time": time_str,
+                }
+                self.by_hour[minute_of_day // 60].append((days, dose))
+                doses.append((minute_of_day, days, dose))
+
+        doses.sort(key=lambda d: d[0])
+        self.minutes = [minute for minute, _, _ in doses]
+        self.days = [days for _, days, _ in doses]
+        self.doses = [dose for _, _, dose in doses]
+
+    def local_now(self, now: Optional[datetime] = None) -> datetime:
+        return (now or datetime.now(self.timezone)).astimezone(self.timezone)
+
+    def due_now(self, now: Optional[datetime] = None) -> List[Dict]:
+        """Doses scheduled in the current local hour (on today's weekday)"""
+        local = self.local_now(now)
+        weekday = 1 << local.weekday()
+        return [dose for days, dose in self.by_hour[local.hour] if days & weekday]
+
+    def next_doses(self, now: Optional[datetime] = None) -> List[Dict]:
+        """Doses at the next scheduled time after now (looking ahead up to a week)"""
+        if not self.doses:
+            return []
+
+        local = self.local_now(now)
+        start = bisect.bisect_right(self.minutes, local.hour * 60 + local.minute)
+        for day_offset in range(8):
+            weekday = 1 << (local + timedelta(days=day_offset)).weekday()
+            todays = [i for i in range(start, len(self.doses)) if self.days[i] & weekday]
+            if todays:
+                next_minute = self.minutes[todays[0]]
+                return [self.doses[i] for i in todays if self.minutes[i] == next_minute]
+            start = 0  # Nothing left that day - look from midnight of the next
+        return []
+
+
+class ScheduleIndex:
+    """
+    In-process per-user medication schedule, built from Medication.times
+    Rebuilt lazily after invalidate() (called when medications are added or deactivated)
+    and after SCHEDULE_INDEX_TTL, so changes made through another worker - whose
+    invalidate() only clears its own copy - show up within the TTL
+    """
+
+    def __init__(self):
+        self.users: "OrderedDict[int, UserSchedule]" = OrderedDict()
+        self.max_users = settings.SCHEDULE_INDEX_MAX_USERS
+        self.ttl = settings.SCHEDULE_INDEX_TTL
+
+    async def get(self, user: User, db: AsyncSession) -> UserSchedule:
+        schedule = self.users.get(user.id)
+        if schedule is not None and (
+            time.monotonic() - schedule.built > self.ttl or schedule.timezone != user_zone(user.timezone)
+        ):
+            schedule = None
+        if schedule is None:
+            medications = (
+                await db.execute(
+                    select(Medication).where(
+                        Medication.user_id == user.id, Medication.active == True
+                    )
+                )
+            ).scalars().all()
+            schedule = UserSchedule(user_zone(user.timezone), medications)
+            self.users[user.id] = schedule
+
+        self.users.move_to_end(user.id)
+        while len(self.users) > self.max_users:
+            self.users.popitem(last=False)
+
+        return schedule
+
+    def invalidate(self, user_id: int):
+        self.users.pop(user_id, None)
+
+
+# Singleton instance
+schedule_index = ScheduleIndex()
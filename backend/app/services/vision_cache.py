@@ -0,0 +1,216 @@
+from collections import OrderedDict, defaultdict, deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import hashlib
+import itertools
+import re
+import time
+from app.core.config import settings
+
+HASH_BITS = 64
+
+# Photos that are mostly printed text: a 9x8 difference hash puts different labels and
+# documents only a few bits apart, so these use VISION_CACHE_TEXT_MAX_DISTANCE instead
+TEXT_ANALYSES = {
+    "prescription",
+    "medication",
+    "doctor_note",
+    "recipe",
+    "food_label",
+    "nutrition",
+    "sign",
+}
+
+# Medication labels and prescriptions: near matches (up to VISION_CACHE_LABEL_MAX_DISTANCE)
+# are only served when the new photo's OCR text names the cached drug and strength
+LABEL_ANALYSES = {"prescription", "medication"}
+
+
+def label_words(text: str) -> str:
+    """Lowercase words and numbers, space-separated ("Lisinopril 10MG" -> " lisinopril 10 mg ")"""
+    text = re.sub(r"(\d)(?=[a-z])|([a-z])(?=\d)", r"\1\2 ", text.lower())
+    return " " + " ".join(re.findall(r"[a-z]+|\d+(?:\.\d+)?", text)) + " "
+
+
+def names_same_drug(label_text: Optional[str], result: Dict) -> bool:
+    """Whether OCR text of a photo shows the drug name and strength of a cached analysis"""
+    medication = result.get("extracted_data") or {}
+    name = label_words(medication.get("name") or "")
+    if not label_text or not name.strip():
+        return False
+    words = label_words(label_text)
+    strengths = re.findall(r"\d+(?:\.\d+)?", medication.get("dosage") or "")
+    return name in words and all(f" {n} " in words for n in strengths)
+
+
+def medications_fingerprint(medications: Optional[List[Dict]]) -> str:
+    """Order-insensitive hash of the medications an analysis was checked against"""
+    entries = sorted(
+        f"{(m.get('name') or '').strip().lower()}|{(m.get('dosage') or '').strip().lower()}"
+        for m in medications or []
+    )
+    return hashlib.sha1("\n".join(entries).encode()).hexdigest()
+
+
+class CachedAnalysis:
+    def __init__(self, scope: str, phash: int, result: Dict):
+        self.scope = scope
+        self.phash = phash
+        self.result = result
+        self.created = time.monotonic()
+
+
+class VisionCache:
+    """
+    Vision results keyed on a perceptual hash of the photo, the user, the analysis
+    type and the user's medications, so re-photographing the same bottle skips the model
+    Near matches (up to VISION_CACHE_MAX_DISTANCE differing bits, fewer for text-heavy
+    types) are found via a band index: split the hash into max_distance + 1 bands - any
+    hash within the distance shares at least one band exactly, so only those are compared
+    A medication label near match also needs OCR text of the new photo (see needs_label_text)
+    """
+
+    def __init__(self):
+        self.ttl = settings.VISION_CACHE_TTL
+        self.max_entries = settings.VISION_CACHE_MAX_ENTRIES
+        self.max_distance = settings.VISION_CACHE_MAX_DISTANCE
+        self.text_max_distance = min(settings.VISION_CACHE_TEXT_MAX_DISTANCE, self.max_distance)
+        self.label_max_distance = min(settings.VISION_CACHE_LABEL_MAX_DISTANCE, self.max_distance)
+
+        bands = self.max_distance + 1
+        width = HASH_BITS // bands
+        # (shift, mask) per band; the last band takes any leftover bits
+        self.bands = [
+            (i * width, (1 << (width if i < bands - 1 else HASH_BITS - i * width)) - 1)
+            for i in range(bands)
+        ]
+
+        self.entries: "OrderedDict[int, CachedAnalysis]" = OrderedDict()
+        # Creation order, for dropping expired entries that are never looked up again
+        self.expiry: Deque[Tuple[float, int]] = deque()
+        self.index: Dict[Tuple[str, int, int], Set[int]] = defaultdict(set)
+        self.ids = itertools.count()
+
+        self.hits = 0
+        self.misses = 0
+        self.unconfirmed = 0  # Label near matches whose OCR text named a different drug/strength
+        self.total_distance = 0
+
+    def _band_keys(self, scope: str, phash: int):
+        for band, (shift, mask) in enumerate(self.bands):
+            yield (scope, band, (phash >> shift) & mask)
+
+    def _scope(self, user_id: int, analysis_type: str, medications: Optional[List[Dict]]) -> str:
+        return f"{user_id}|{analysis_type}|{medications_fingerprint(medications)}"
+
+    def _limit(self, analysis_type: str) -> int:
+        if analysis_type in LABEL_ANALYSES:
+            return self.label_max_distance
+        return self.text_max_distance if analysis_type in TEXT_ANALYSES else self.max_distance
+
+    def _nearest(self, scope: str, phash: int, limit: int) -> Tuple[Optional[int], int]:
+        """Closest unexpired entry within limit bits: (entry id or None, distance)"""
+        now = time.monotonic()
+        best_id, best_distance = None, limit + 1
+        for key in self._band_keys(scope, phash):
+            for entry_id in self.index.get(key, ()):
+                entry = self.entries[entry_id]
+                distance = bin(entry.phash ^ phash).count("1")
+                if distance < best_distance and now - entry.created <= self.ttl:
+                    best_id, best_distance = entry_id, distance
+        return best_id, best_distance
+
+    def needs_label_text(
+        self, user_id: int, phash: int, analysis_type: str, medications: Optional[List[Dict]]
+    ) -> bool:
+        """Whether get() could serve a label near match given the photo's OCR text"""
+        if analysis_type not in LABEL_ANALYSES:
+            return False
+        scope = self._scope(user_id, analysis_type, medications)
+        best_id, distance = self._nearest(scope, phash, self.label_max_distance)
+        return best_id is not None and distance > self.text_max_distance
+
+    def get(
+        self,
+        user_id: int,
+        phash: int,
+        analysis_type: str,
+        medications: Optional[List[Dict]],
+        label_text: Optional[str] = None,
+    ) -> Optional[Dict]:
+        scope = self._scope(user_id, analysis_type, medications)
+        best_id, best_distance = self._nearest(scope, phash, self._limit(analysis_type))
+
+        if (
+            best_id is not None
+            and analysis_type in LABEL_ANALYSES
+            and best_distance > self.text_max_distance
+            and not names_same_drug(label_text, self.entries[best_id].result)
+        ):
+            # Another label that happens to hash close - or no OCR text to tell
+            self.unconfirmed += 1
+            best_id = None
+
+        if best_id is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.total_distance += best_distance
+        self.entries.move_to_end(best_id)
+        return self.entries[best_id].result
+
+    def put(
+        self,
+        user_id: int,
+        phash: int,
+        analysis_type: str,
+        medications: Optional[List[Dict]],
+        result: Dict,
+    ):
+        if not result.get("success"):
+            return
+
+        scope = self._scope(user_id, analysis_type, medications)
+        entry_id = next(self.ids)
+        entry = self.entries[entry_id] = CachedAnalysis(scope, phash, result)
+        self.expiry.append((entry.created, entry_id))
+        for key in self._band_keys(scope, phash):
+            self.index[key].add(entry_id)
+
+        self._purge_expired(entry.created)
+        while len(self.entries) > self.max_entries:
+            self._evict(*self.entries.popitem(last=False))
+
+    def _purge_expired(self, now: float):
+        """Drop expired entries (and skip over ones already evicted as least recently used)"""
+        while self.expiry:
+            created, entry_id = self.expiry[0]
+            if entry_id in self.entries and now - created <= self.ttl:
+                break
+            self.expiry.popleft()
+            entry = self.entries.pop(entry_id, None)
+            if entry is not None:
+                self._evict(entry_id, entry)
+
+    def _evict(self, entry_id: int, entry: CachedAnalysis):
+        for key in self._band_keys(entry.scope, entry.phash):
+            ids = self.index.get(key)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self.index[key]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "unconfirmed": self.unconfirmed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "avg_hit_distance": self.total_distance / self.hits if self.hits else 0.0,
+            "entries": len(self.entries),
+        }
+
+
+# Singleton instance
+vision_cache = VisionCache()
@@ -1,8 +1,25 @@
-from anthropic import Anthropic
 from typing import Dict, List, Optional
 import base64
-import json
+import binascii
+from app.core.intents import (
+    MEDICATION_FIELDS,
+    SUGGESTION_PHRASES,
+    WARNING_PHRASES,
+    load_matcher,
+)
 from app.core.config import settings
+from app.core.llm import llm_client
+from app.services.image_pipeline import UNPROCESSABLE, ImageRejected, image_pipeline
+from app.services.vision_cache import vision_cache
+from app.services.interaction_index import interaction_index
+
+MEDICATION_ANALYSES = {"prescription", "medication"}
+
+ANALYSIS_TOOL_NAME = "record_analysis"
+
+RETRY_PHOTO_MESSAGE = (
+    "I had trouble reading this image. Please try again with better lighting or a clearer photo."
+)
 
 
 class VisionService:
@@ -12,13 +29,18 @@ class VisionService:
     """
 
     def __init__(self):
-        self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+        self.llm = llm_client
+        self.warning_matcher = load_matcher("warnings", WARNING_PHRASES)
+        self.suggestion_matcher = load_matcher("suggestions", SUGGESTION_PHRASES)
+        self.field_matcher = load_matcher("medication_fields", MEDICATION_FIELDS)
+        self.structured = settings.VISION_STRUCTURED_OUTPUT
 
     async def analyze_image(
         self,
         image_data: str,
         analysis_type: str,
         user_medications: Optional[List[Dict]] = None,
+        user_id: Optional[int] = None,
     ) -> Dict:
         """
         Analyze an image using Claude's vision capabilities
@@ -27,6 +49,7 @@ class VisionService:
             image_data: Base64 encoded image data (with data:image prefix)
             analysis_type: Type of analysis (prescription, medication, etc.)
             user_medications: Current medications for interaction checking
+            user_id: Owner of the photo - results are only cached per user
 
         Returns:
             Dict with analysis results, warnings, and suggestions
@@ -36,13 +59,67 @@ class VisionService:
         if "," in image_data:
             image_data = image_data.split(",")[1]
 
-        # Build prompt based on analysis type
-        prompt = self._build_prompt(analysis_type, user_medications)
+        try:
+            raw = base64.b64decode(image_data, validate=True)
+        except (binascii.Error, ValueError):
+            return self._retry_photo("invalid_base64")
+
+        return await self.analyze_image_bytes(raw, analysis_type, user_medications, user_id)
+
+    async def analyze_image_bytes(
+        self,
+        raw: bytes,
+        analysis_type: str,
+        user_medications: Optional[List[Dict]] = None,
+        user_id: Optional[int] = None,
+    ) -> Dict:
+        """
+        Analyze raw image bytes (multipart uploads skip the base64 round trip)
+        Raises ImageRejected for uploads that can't be processed at all
+        """
+
+        # Static instructions for this analysis type, plus the per-user medication list
+        # (tools + system come to a few hundred tokens, under PROMPT_CACHE_MIN_TOKENS,
+        # so they are not marked for prompt caching)
+        prompt = self._build_prompt(analysis_type)
+        medications_text = f"Current medications: {self._format_medications(user_medications)}"
+
+        # Ask for a schema-constrained result; the text parser is only a fallback
+        structured_params = {}
+        if self.structured:
+            structured_params = {
+                "tools": [self._analysis_tool(analysis_type)],
+                "tool_choice": {"type": "tool", "name": ANALYSIS_TOOL_NAME},
+            }
 
         try:
-            response = self.client.messages.create(
+            # Sniff the real format, fix orientation, downscale, and reject unusable photos
+            prepared = await image_pipeline.prepare(raw)
+            if prepared["rejected"] in UNPROCESSABLE:
+                raise ImageRejected(prepared["rejected"])
+            if prepared["rejected"]:
+                return self._retry_photo(prepared["rejected"])
+
+            # Same bottle photographed again by the same user, against the same medication list
+            # (a label that only hashes close must also read as the same drug and strength)
+            if user_id is not None:
+                label_text = None
+                if vision_cache.needs_label_text(
+                    user_id, prepared["phash"], analysis_type, user_medications
+                ):
+                    label_text = await image_pipeline.read_text(prepared["data"])
+                cached = vision_cache.get(
+                    user_id, prepared["phash"], analysis_type, user_medications, label_text
+                )
+                if cached is not None:
+                    return cached
+
+            response = await self.llm.create_message(
+                provider="vision",
                 model="claude-sonnet-4-5-20250929",
                 max_tokens=2048,
+                system=prompt,
+                **structured_params,
                 messages=[
                     {
                         "role": "user",
@@ -51,42 +128,50 @@ class VisionService:
                                 "type": "image",
                                 "source": {
                                     "type": "base64",
-                                    "media_type": "image/jpeg",
-                                    "data": image_data,
+                                    "media_type": prepared["media_type"],
+                                    "data": base64.b64encode(prepared["data"]).decode("ascii"),
                                 },
                             },
-                            {"type": "text", "text": prompt},
+                            {"type": "text", "text": medications_text},
                         ],
                     }
                 ],
             )
 
-            # Parse response
-            analysis_text = response.content[0].text
+            result = self._parse_tool_result(response.content, analysis_type)
+            if result is None:
+                # No (usable) tool call - scrape the text reply
+                analysis_text = "\n".join(
+                    b.text for b in response.content if getattr(b, "type", "") == "text"
+                )
+                result = self._parse_analysis(analysis_text, analysis_type, user_medications)
 
-            # Extract structured data based on type
-            result = self._parse_analysis(analysis_text, analysis_type, user_medications)
-
-            return {
+            analysis = {
                 "success": True,
                 "analysis": result["analysis"],
                 "warnings": result.get("warnings", []),
                 "suggestions": result.get("suggestions", []),
                 "extracted_data": result.get("extracted_data"),
             }
+            if user_id is not None:
+                vision_cache.put(user_id, prepared["phash"], analysis_type, user_medications, analysis)
+            return analysis
 
+        except ImageRejected:
+            raise
         except Exception as e:
             print(f"Error analyzing image: {e}")
-            return {
-                "success": False,
-                "analysis": "I had trouble reading this image. Please try again with better lighting or a clearer photo.",
-                "warnings": [str(e)],
-            }
+            return self._retry_photo(str(e))
 
-    def _build_prompt(
-        self, analysis_type: str, user_medications: Optional[List[Dict]]
-    ) -> str:
-        """Build appropriate prompt for the analysis type"""
+    def _retry_photo(self, reason: str) -> Dict:
+        """Failure result asking for a better photo"""
+        return {"success": False, "analysis": RETRY_PHOTO_MESSAGE, "warnings": [reason]}
+
+    def _build_prompt(self, analysis_type: str) -> str:
+        """
+        Build appropriate prompt for the analysis type
+        Prompts are static per type (medications are sent separately) so they can be prompt-cached
+        """
 
         base_instructions = """You are helping an elderly person with Alzheimer's disease.
 Your analysis should be:
@@ -107,7 +192,7 @@ This is a prescription. Please extract and explain:
 5. **Prescribing doctor**
 6. **Refill information**
 
-IMPORTANT: Check for interactions with current medications: {self._format_medications(user_medications)}
+IMPORTANT: Check for interactions with the current medications listed below.
 
 Format your response clearly with:
 - WHAT IT IS: [medication name and purpose]
@@ -125,7 +210,7 @@ This is a medication label. Please extract:
 5. **Expiration date**
 6. **Storage instructions**
 
-Check for interactions with: {self._format_medications(user_medications)}
+Check for interactions with the current medications listed below.
 
 Explain in simple terms what this medication is for and how to use it safely.""",
             "doctor_note": f"""{base_instructions}
@@ -149,7 +234,7 @@ This is a recipe. Please extract:
 4. **Cooking time**
 5. **Servings**
 
-IMPORTANT: Check ingredients against dietary restrictions or medication interactions: {self._format_medications(user_medications)}
+IMPORTANT: Check ingredients against dietary restrictions or interactions with the current medications listed below.
 
 Simplify the instructions and highlight any potential allergens or concerning ingredients.""",
             "food_label": f"""{base_instructions}
@@ -166,7 +251,7 @@ Check for:
 - Allergens
 - High sodium (concern for blood pressure)
 - High sugar (concern for diabetes)
-- Interactions with medications: {self._format_medications(user_medications)}
+- Interactions with the current medications listed below
 
 Explain if this food is safe to eat based on common elderly health concerns.""",
             "nutrition": f"""{base_instructions}
@@ -184,8 +269,6 @@ Check against common dietary restrictions for elderly:
 - Low sugar (diabetes)
 - Adequate protein
 
-Current medications: {self._format_medications(user_medications)}
-
 Explain in simple terms if this is a healthy choice.""",
             "sign": f"""{base_instructions}
 
@@ -215,47 +298,82 @@ Make it very clear what this sign is telling the person to do.""",
 
         return ", ".join(med_list)
 
+    def _analysis_tool(self, analysis_type: str) -> Dict:
+        """JSON schema the reply must fill in (medication fields only for labels/prescriptions)"""
+        properties = {
+            "summary": {
+                "type": "string",
+                "description": "The full explanation for the person, in the format requested above",
+            },
+            "warnings": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Safety warnings, interactions, allergens - one short sentence each",
+            },
+            "suggestions": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "What the person should do next - one short sentence each",
+            },
+        }
+        required = ["summary", "warnings", "suggestions"]
+
+        if analysis_type in MEDICATION_ANALYSES:
+            properties["medication"] = {
+                "type": "object",
+                "properties": {
+                    field: {"type": "string"}
+                    for field in ("name", "dosage", "frequency", "instructions")
+                },
+                "required": ["name"],
+            }
+            required.append("medication")
+
+        return {
+            "name": ANALYSIS_TOOL_NAME,
+            "description": "Record the analysis of the photo",
+            "input_schema": {"type": "object", "properties": properties, "required": required},
+        }
+
+    def _parse_tool_result(self, content: List, analysis_type: str) -> Optional[Dict]:
+        """Read the record_analysis tool call in one pass (None if there isn't a usable one)"""
+        data = next(
+            (
+                b.input
+                for b in content
+                if getattr(b, "type", "") == "tool_use" and b.name == ANALYSIS_TOOL_NAME
+            ),
+            None,
+        )
+        if not isinstance(data, dict) or not data.get("summary"):
+            return None
+
+        extracted_data = None
+        if analysis_type in MEDICATION_ANALYSES:
+            medication = data.get("medication") or {}
+            extracted_data = {
+                k: v.strip() for k, v in medication.items() if isinstance(v, str) and v.strip()
+            } or None
+
+        return {
+            "analysis": data["summary"],
+            "warnings": [w for w in data.get("warnings") or [] if w] or None,
+            "suggestions": [s for s in data.get("suggestions") or [] if s] or None,
+            "extracted_data": extracted_data,
+        }
+
     def _parse_analysis(
         self, analysis_text: str, analysis_type: str, user_medications: Optional[List[Dict]]
     ) -> Dict:
-        """Parse Claude's response into structured format"""
-
-        # Extract warnings (look for keywords)
-        warnings = []
-        warning_keywords = [
-            "WARNING",
-            "CAUTION",
-            "DO NOT",
-            "DANGER",
-            "interaction",
-            "contraindication",
-            "allergy",
-            "side effect",
-        ]
-
-        lines = analysis_text.split("\n")
-        for line in lines:
-            if any(keyword.lower() in line.lower() for keyword in warning_keywords):
-                warnings.append(line.strip("*- "))
-
-        # Extract suggestions
-        suggestions = []
-        suggestion_keywords = [
-            "WHAT TO DO",
-            "RECOMMEND",
-            "SUGGEST",
-            "SHOULD",
-            "CONSIDER",
-            "next step",
-        ]
-
-        for line in lines:
-            if any(keyword.lower() in line.lower() for keyword in suggestion_keywords):
-                suggestions.append(line.strip("*- "))
+        """Parse a free-text reply into structured format (fallback when there's no tool call)"""
+
+        # Lines flagged by the precompiled warning/suggestion matchers (one scan each)
+        warnings = [line.strip("*- ") for line in self.warning_matcher.lines(analysis_text)]
+        suggestions = [line.strip("*- ") for line in self.suggestion_matcher.lines(analysis_text)]
 
         # Try to extract structured data for medications
         extracted_data = None
-        if analysis_type in ["prescription", "medication"]:
+        if analysis_type in MEDICATION_ANALYSES:
             extracted_data = self._extract_medication_data(analysis_text)
 
         return {
@@ -272,23 +390,13 @@ Make it very clear what this sign is telling the person to do.""",
 
         data = {}
 
-        # Look for common patterns
-        patterns = {
-            "name": ["medication name", "drug name", "what it is"],
-            "dosage": ["dosage", "dose", "strength"],
-            "frequency": ["frequency", "how often", "take"],
-            "instructions": ["instructions", "how to take"],
-        }
-
-        lines = text.lower().split("\n")
-        for key, keywords in patterns.items():
-            for line in lines:
-                if any(kw in line for kw in keywords):
-                    # Extract value after colon if present
-                    if ":" in line:
-                        value = line.split(":", 1)[1].strip()
-                        data[key] = value
-                        break
+        # First "label: value" line mentioning each field wins
+        for line in text.lower().split("\n"):
+            if ":" not in line:
+                continue
+            for key in self.field_matcher.matches(line):
+                if key not in data:
+                    data[key] = line.split(":", 1)[1].strip()
 
         return data if data else None
 
@@ -313,50 +421,9 @@ Make it very clear what this sign is telling the person to do.""",
                 "safe": True,
             }
 
-        current_meds_str = self._format_medications(current_medications)
-
-        prompt = f"""You are a medication safety assistant.
-
-NEW MEDICATION: {new_medication}
-
-CURRENT MEDICATIONS: {current_meds_str}
-
-Please check for:
-1. Drug-drug interactions
-2. Duplicate medications (same class)
-3. Concerning combinations
-
-Provide:
-- List of interactions (if any)
-- Severity level (mild, moderate, severe)
-- What could happen
-- What to do (talk to doctor, etc.)
-
-Be clear and specific. This is for an elderly person with Alzheimer's, so explain simply."""
-
+        # Known pairs are answered from the local index; only unseen pairs reach Claude
         try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-5-20250929",
-                max_tokens=1024,
-                messages=[{"role": "user", "content": prompt}],
-            )
-
-            analysis = response.content[0].text
-
-            # Parse for severity
-            severe = any(
-                word in analysis.lower()
-                for word in ["severe", "dangerous", "contraindicated", "do not"]
-            )
-
-            return {
-                "interactions": [analysis],
-                "warnings": [analysis] if severe else [],
-                "safe": not severe,
-                "recommendation": "Please consult with your doctor before taking this medication."
-                if severe
-                else "This appears safe, but verify with your pharmacist.",
-            }
+            return await interaction_index.check(new_medication, current_medications)
 
         except Exception as e:
             print(f"Error checking interactions: {e}")
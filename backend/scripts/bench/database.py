@@ -0,0 +1,75 @@
+"""
+Benchmark: latency of chat-like requests (a 50ms upstream await each) while slow queries
+run - through a blocking sync engine (the old get_db) vs the async engine
+Run from backend/: python -m scripts.bench.database (uses DATABASE_URL, read-only)
+"""
+import asyncio
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.core.database import engine
+
+# Portable CPU-bound query (Postgres and SQLite); raise ROWS if it finishes too fast
+SLOW_QUERY = text(
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :rows) "
+    "SELECT count(*) FROM n"
+)
+ROWS = 1_000_000
+QUERIES = 4
+CHATS = 20
+UPSTREAM_DELAY = 0.05
+
+
+async def chat_request(latencies: list):
+    started = time.perf_counter()
+    await asyncio.sleep(UPSTREAM_DELAY)
+    latencies.append(time.perf_counter() - started)
+
+
+async def chats(latencies: list):
+    # Requests arrive every 10ms while the queries are running
+    tasks = []
+    for _ in range(CHATS):
+        tasks.append(asyncio.create_task(chat_request(latencies)))
+        await asyncio.sleep(0.01)
+    await asyncio.gather(*tasks)
+
+
+async def measure(query) -> list:
+    latencies = []
+    arrivals = asyncio.create_task(chats(latencies))
+    await asyncio.sleep(0)  # First request is in flight before the queries start
+    await asyncio.gather(*(query() for _ in range(QUERIES)))
+    await arrivals
+    return sorted(latencies)
+
+
+async def benchmark():
+    sync_engine = create_engine(settings.DATABASE_URL)
+
+    async def blocking_query():
+        with sync_engine.connect() as conn:
+            conn.execute(SLOW_QUERY, {"rows": ROWS}).scalar()
+
+    async def async_query():
+        async with engine.connect() as conn:
+            (await conn.execute(SLOW_QUERY, {"rows": ROWS})).scalar()
+
+    started = time.perf_counter()
+    await async_query()
+    print(f"slow query alone: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    for label, query in [("sync Session", blocking_query), ("async engine", async_query)]:
+        latencies = await measure(query)
+        print(
+            f"{label}: chat latency p50 {latencies[len(latencies) // 2] * 1000:6.0f} ms, "
+            f"max {latencies[-1] * 1000:6.0f} ms ({QUERIES} slow queries, {CHATS} chats)"
+        )
+    await engine.dispose()
+    sync_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
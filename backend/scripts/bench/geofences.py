@@ -0,0 +1,74 @@
+"""
+Benchmark: per-fix geofence evaluation cost, grid index vs brute-force haversine over every fence
+Run from backend/: python -m scripts.bench.geofences
+"""
+from datetime import datetime
+from typing import Set
+import random
+import time
+
+from app.core.config import settings
+from app.core.geo import haversine_m
+from app.services.geofence_service import UserGeofences
+
+
+def main():
+    random.seed(7)
+    center_lat, center_lon = 39.7392, -104.9903  # Denver
+    fences = [
+        {
+            "id": i,
+            "name": f"place {i}",
+            "kind": "other",
+            "latitude": center_lat + random.uniform(-0.2, 0.2),
+            "longitude": center_lon + random.uniform(-0.2, 0.2),
+            "radius_m": random.uniform(50, 300),
+            "notify_caregiver": False,
+        }
+        for i in range(1000)
+    ]
+
+    # Synthetic tracks: random walks with ~15m steps and GPS noise
+    tracks = []
+    for _ in range(20):
+        lat, lon = center_lat + random.uniform(-0.1, 0.1), center_lon + random.uniform(-0.1, 0.1)
+        track = []
+        for _ in range(2000):
+            lat += random.gauss(0, 0.00013)
+            lon += random.gauss(0, 0.00017)
+            track.append((lat + random.gauss(0, 0.00005), lon + random.gauss(0, 0.00005)))
+        tracks.append(track)
+    fixes = sum(len(t) for t in tracks)
+    now = datetime.utcnow()
+
+    def brute_force():
+        events = 0
+        for track in tracks:
+            inside: Set[int] = set()
+            for lat, lon in track:
+                current = {
+                    f["id"]
+                    for f in fences
+                    if haversine_m(lat, lon, f["latitude"], f["longitude"]) <= f["radius_m"]
+                }
+                events += len(current ^ inside)
+                inside = current
+        return events
+
+    def indexed():
+        events = 0
+        for track in tracks:
+            tracker = UserGeofences(fences, settings.GEOFENCE_HYSTERESIS_M, settings.GEOFENCE_CELL_DEGREES)
+            for lat, lon in track:
+                events += len(tracker.update(lat, lon, 10.0, now))
+        return events
+
+    for label, fn in (("brute force", brute_force), ("grid index", indexed)):
+        started = time.perf_counter()
+        events = fn()
+        elapsed = time.perf_counter() - started
+        print(f"{label:12s} {elapsed / fixes * 1e6:8.1f} us/fix  {events} events ({len(fences)} fences)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark: a synthetic 12MP phone photo (4032x3024 JPEG) before and after preprocessing
+Run from backend/: python -m scripts.bench.image_pipeline
+"""
+import io
+import time
+
+from PIL import Image
+
+from app.services.image_pipeline import preprocess_image
+
+
+def main():
+    photo = Image.new("RGB", (4032, 3024), (205, 200, 190))
+    texture = Image.effect_noise((1008, 756), 60).convert("RGB").resize((4032, 3024))
+    photo = Image.blend(photo, texture, 0.5)
+    buffer = io.BytesIO()
+    photo.save(buffer, "JPEG", quality=95)
+    original = buffer.getvalue()
+
+    runs = 5
+    started = time.perf_counter()
+    for _ in range(runs):
+        prepared = preprocess_image(original)
+    elapsed_ms = (time.perf_counter() - started) * 1000 / runs
+
+    # Upload size is what the phone would otherwise send: base64 inflates by a third
+    print(f"original:   {len(original) * 4 // 3 / 1024:8.0f} KiB base64  4032x3024")
+    if prepared["rejected"]:
+        print(f"rejected:   {prepared['rejected']}")
+    else:
+        w, h = prepared["width"], prepared["height"]
+        print(f"prepared:   {prepared['bytes'] * 4 // 3 / 1024:8.0f} KiB base64  {w}x{h}")
+        print(f"saved:      {(len(original) - prepared['bytes']) * 4 // 3 / 1024:8.0f} KiB per image")
+    print(f"preprocess: {elapsed_ms:8.1f} ms per image")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark: seed millions of medication logs in a scratch database and check that the hot
+queries are planned as index scans (EXPLAIN) and how long they take
+Run from backend/: python -m scripts.bench.indexes [DATABASE_URL]
+Without a URL a temporary SQLite file is used. A URL must point at an empty database -
+the script refuses to write into one that already has tables, and never drops anything
+"""
+from datetime import datetime, timedelta
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, inspect, text
+
+from app.core.database import Base
+from app.models.medication import ApprovedContact, Medication, MedicationLog, User
+
+USERS, MEDS_PER_USER, CHUNK = 2000, 3, 50000
+
+# (label, SQL, extra params, index the plan must use)
+HOT_QUERIES = [
+    (
+        "active medications",
+        "SELECT * FROM medications WHERE user_id = :key AND active = :active",
+        {"active": True},
+        "ix_medications_user_id_active",
+    ),
+    (
+        "recent logs per user",
+        "SELECT * FROM medication_logs WHERE user_id = :key AND taken_at >= :since "
+        "ORDER BY taken_at DESC",
+        {"since": None},
+        "ix_medication_logs_user_id_taken_at",
+    ),
+    (
+        "recent logs per medication",
+        "SELECT * FROM medication_logs WHERE medication_id = :key AND taken_at >= :since "
+        "ORDER BY taken_at DESC",
+        {"since": None},
+        "ix_medication_logs_medication_id_taken_at",
+    ),
+    (
+        "approved contacts",
+        "SELECT * FROM approved_contacts WHERE user_id = :key",
+        {},
+        "ix_approved_contacts_user_id",
+    ),
+]
+
+
+def seed(engine, log_rows: int, now: datetime):
+    """Users, contacts, medications (one inactive per user) and random logs over a year"""
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": u, "email": f"user{u}@example.com"} for u in range(1, USERS + 1)])
+        conn.execute(
+            insert(ApprovedContact),
+            [{"user_id": u, "name": "Daughter"} for u in range(1, USERS + 1) for _ in range(2)],
+        )
+        conn.execute(
+            insert(Medication),
+            [
+                {"id": (u - 1) * MEDS_PER_USER + m + 1, "user_id": u, "name": f"Medication {m}", "active": m > 0}
+                for u in range(1, USERS + 1)
+                for m in range(MEDS_PER_USER)
+            ],
+        )
+        for offset in range(0, log_rows, CHUNK):
+            rows = []
+            for _ in range(offset, min(offset + CHUNK, log_rows)):
+                medication_id = random.randint(1, USERS * MEDS_PER_USER)
+                rows.append(
+                    {
+                        "user_id": (medication_id - 1) // MEDS_PER_USER + 1,
+                        "medication_id": medication_id,
+                        "taken_at": now - timedelta(minutes=random.randint(0, 365 * 24 * 60)),
+                        "status": "taken",
+                    }
+                )
+            conn.execute(insert(MedicationLog), rows)
+        conn.execute(text("ANALYZE"))
+
+
+def query_plan(conn, sql: str, params: dict) -> str:
+    if conn.dialect.name == "sqlite":
+        return "\n".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params))
+    return "\n".join(row[0] for row in conn.execute(text(f"EXPLAIN {sql}"), params))
+
+
+def main():
+    scratch = None
+    if len(sys.argv) > 1:
+        url = sys.argv[1]
+    else:
+        scratch = tempfile.mkdtemp(prefix="index-bench-")
+        url = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+
+    log_rows = int(os.environ.get("INDEX_BENCHMARK_LOG_ROWS", 2_000_000))
+    now = datetime.utcnow()
+
+    engine = create_engine(url)
+    if inspect(engine).get_table_names():
+        sys.exit(f"{engine.url!r} already has tables - point the benchmark at an empty database")
+    Base.metadata.create_all(engine)
+
+    started = time.perf_counter()
+    seed(engine, log_rows, now)
+    print(f"seeded {log_rows:,} medication logs in {time.perf_counter() - started:.0f}s ({engine.dialect.name})")
+
+    runs = 200
+    with engine.connect() as conn:
+        for label, sql, extra, index in HOT_QUERIES:
+            params = {"key": 1, **extra}
+            if "since" in params:
+                params["since"] = now - timedelta(days=7)
+            plan = query_plan(conn, sql, params)
+
+            started = time.perf_counter()
+            for _ in range(runs):
+                conn.execute(text(sql), {**params, "key": random.randint(1, USERS)}).fetchall()
+            elapsed_ms = (time.perf_counter() - started) * 1000 / runs
+
+            verdict = "ok" if index in plan else f"MISSING {index}"
+            print(f"{label:>26}: {elapsed_ms:6.2f} ms  {verdict}  {plan.splitlines()[0].strip()}")
+    engine.dispose()
+
+    if scratch:
+        shutil.rmtree(scratch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark: cost per message of plain keyword scans vs the compiled intent matchers
+Run from backend/: python -m scripts.bench.intents
+"""
+import timeit
+
+from app.core.intents import ACTION_INTENTS, WARNING_PHRASES, IntentMatcher
+
+MESSAGES = [
+    "When is my appointment today?",
+    "I think I fell in the kitchen and my arm hurts, can you help me please",
+]
+REPLY = "\n".join(
+    [
+        "- WHAT IT IS: Lisinopril 10mg, for blood pressure",
+        "- HOW TO TAKE IT: one tablet each morning with water",
+        "- WARNINGS: may cause dizziness. Do not take with potassium supplements.",
+        "- WHAT TO DO: tell your doctor about any side effects.",
+    ]
+    * 25
+)
+
+
+def main():
+    action_keywords = [[p.rstrip("*") for p in phrases] for _, phrases in ACTION_INTENTS]
+    warning_keywords = [p.rstrip("*") for p in WARNING_PHRASES]
+    action_matcher = IntentMatcher(ACTION_INTENTS)
+    warning_matcher = IntentMatcher([("warnings", WARNING_PHRASES)])
+
+    def old_actions():
+        for message in MESSAGES:
+            lowered = message.lower()
+            [any(w in lowered for w in words) for words in action_keywords]
+
+    def new_actions():
+        for message in MESSAGES:
+            action_matcher.first(message)
+
+    def old_warnings():
+        lines = REPLY.split("\n")
+        return [l for l in lines if any(k in l.lower() for k in warning_keywords)]
+
+    def new_warnings():
+        return warning_matcher.lines(REPLY)
+
+    cases = [
+        ("user messages", old_actions, new_actions, len(MESSAGES)),
+        (f"{len(REPLY)}-char reply", old_warnings, new_warnings, 1),
+    ]
+    runs = 2000
+    for label, old, new, per_run in cases:
+        old_us = timeit.timeit(old, number=runs) / runs / per_run * 1e6
+        new_us = timeit.timeit(new, number=runs) / runs / per_run * 1e6
+        print(f"{label:>18}: keyword scan {old_us:7.1f} us, compiled {new_us:7.1f} us per message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Micro-benchmark: local interaction answers for known pairs (normalize + lookup)
+Run from backend/: python -m scripts.bench.interaction_index
+"""
+import time
+
+from app.services.interaction_index import interaction_index
+
+
+def main():
+    medications = [{"name": "Coumadin 5mg"}, {"name": "Zestril 10 mg tablet"}, {"name": "Aricept"}]
+    runs = 20000
+    started = time.perf_counter()
+    for _ in range(runs):
+        for med in medications:
+            interaction_index.lookup(
+                frozenset((interaction_index.canonical("Advil 200mg"), interaction_index.canonical(med["name"])))
+            )
+    elapsed_us = (time.perf_counter() - started) * 1e6 / (runs * len(medications))
+    print(f"{elapsed_us:.2f} us per pair (normalize + lookup), {len(interaction_index.pairs)} known pairs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark on sample replies (app/data/vision_replies.json): text scraping vs the tool result
+Run from backend/: python -m scripts.bench.vision_parsers
+"""
+from types import SimpleNamespace
+import json
+import os
+import time
+
+from app.services.vision_service import ANALYSIS_TOOL_NAME, vision_service
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "app", "data", "vision_replies.json")
+
+
+def main():
+    with open(CORPUS_PATH) as f:
+        corpus = json.load(f)
+
+    def field_accuracy(parsed):
+        """(correct, expected) medication fields - case-insensitive exact match"""
+        correct = total = 0
+        for entry, result in zip(corpus, parsed):
+            extracted = result.get("extracted_data") or {}
+            for field, value in entry["expected"].items():
+                total += 1
+                correct += (extracted.get(field) or "").strip("*- ").lower() == value.lower()
+        return correct, total
+
+    replies = [
+        (
+            entry["analysis_type"],
+            entry["text"],
+            [SimpleNamespace(type="tool_use", name=ANALYSIS_TOOL_NAME, input=entry["tool_input"])],
+        )
+        for entry in corpus
+    ]
+    runs = 2000
+    cases = [
+        ("text parser", lambda t, text, blocks: vision_service._parse_analysis(text, t, None)),
+        ("tool result", lambda t, text, blocks: vision_service._parse_tool_result(blocks, t)),
+    ]
+    for label, parse in cases:
+        started = time.perf_counter()
+        for _ in range(runs):
+            parsed = [parse(*reply) for reply in replies]
+        elapsed_us = (time.perf_counter() - started) * 1e6 / (runs * len(replies))
+        correct, total = field_accuracy(parsed)
+        print(f"{label}: {elapsed_us:6.1f} us/reply, medication fields {correct}/{total} correct")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Shared test setup
+Settings are required at import time, so safe placeholders are put in the
+environment before any app module is imported (real values in .env still win)
+"""
+import os
+import tempfile
+
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="care-companion-tests-")
+
+for name, value in {
+    "DATABASE_URL": f"sqlite:///{os.path.join(TEST_DATA_DIR, 'app.db')}",
+    "SECRET_KEY": "test-secret",
+    "ANTHROPIC_API_KEY": "test-key",
+    "GOOGLE_CLIENT_ID": "test",
+    "GOOGLE_CLIENT_SECRET": "test",
+    "GOOGLE_REDIRECT_URI": "http://localhost/callback",
+    "PLAID_CLIENT_ID": "test",
+    "PLAID_SECRET": "test",
+    "REMINDERS_ENABLED": "false",
+}.items():
+    os.environ.setdefault(name, value)
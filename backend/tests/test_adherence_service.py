@@ -0,0 +1,69 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.medication import Medication, User
+from app.services.adherence_service import adherence_service
+
+NOW = datetime(2026, 3, 4, 18, 0, tzinfo=timezone.utc)  # Wednesday, 11am in Denver
+
+
+@pytest.fixture
+async def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'adherence.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+async def test_series_is_one_rollup_query_and_keeps_deactivated_days(db):
+    user = User(id=1, email="a@example.com", timezone="America/Denver")
+    daily = Medication(id=1, user_id=1, name="Lisinopril", times=["08:00", "20:00"], created_at=datetime(2026, 3, 1))
+    stopped = Medication(id=2, user_id=1, name="Aricept", times=["21:00"], created_at=datetime(2026, 3, 1))
+    db.add_all([user, daily, stopped])
+    await db.flush()
+
+    # Three days of scheduled rows; one dose taken on the 3rd
+    await adherence_service.materialize(db, now=NOW, days_back=2)
+    await adherence_service.record_doses(db, user, daily, [datetime(2026, 3, 3, 15)])
+    # Deactivated since - its past scheduled doses must still count
+    stopped.active = False
+    await db.commit()
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        series = await adherence_service.get_series(db, user, date(2026, 3, 2), date(2026, 3, 5))
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert [(b["period"], b["scheduled"], b["taken"]) for b in series] == [
+        ("2026-03-02", 3, 0),
+        ("2026-03-03", 3, 1),
+        ("2026-03-04", 3, 0),
+        ("2026-03-05", 0, 0),  # Not materialized yet
+    ]
+
+
+async def test_materialize_keeps_taken_counts(db):
+    user = User(id=1, email="a@example.com", timezone="America/Denver")
+    medication = Medication(id=1, user_id=1, name="Lisinopril", times=["08:00"], created_at=datetime(2026, 3, 1))
+    db.add_all([user, medication])
+    await db.flush()
+
+    await adherence_service.record_doses(db, user, medication, [datetime(2026, 3, 4, 15)])
+    await adherence_service.materialize(db, now=NOW)
+    await adherence_service.materialize(db, now=NOW)
+
+    series = await adherence_service.get_series(db, user, date(2026, 3, 4), date(2026, 3, 4))
+    assert (series[0]["scheduled"], series[0]["taken"]) == (1, 1)
@@ -0,0 +1,61 @@
+import pytest
+
+from app.services.answer_cache import AnswerCache
+
+CONTEXT = {"medications": [{"name": "Lisinopril", "times": ["08:00"]}]}
+QUESTION = "Where are my glasses?"
+
+
+def reply(text: str) -> dict:
+    return {"response": text, "suggested_action": None, "needs_confirmation": False}
+
+
+def ask_repeatedly(cache: AnswerCache, message: str, history: list, times: int):
+    """Ask the same question back to back, recording each answer as the store would"""
+    history = list(history)
+    for i in range(times):
+        answer = cache.get(1, message, history, CONTEXT)
+        if answer is None:
+            answer = reply(f"They are on the table ({i})")
+            cache.put(1, message, history, CONTEXT, answer)
+        history += [{"role": "user", "content": message}, {"role": "assistant", "content": answer["response"]}]
+    return history
+
+
+def test_back_to_back_repeats_are_served_from_cache():
+    cache = AnswerCache()
+    history = ask_repeatedly(cache, QUESTION, [], cache.phrasings)
+
+    cached = cache.get(1, QUESTION, history, CONTEXT)
+    assert cached and cached["cached"]
+
+
+def test_key_includes_the_turn_the_question_replies_to():
+    cache = AnswerCache()
+    ask_repeatedly(cache, QUESTION, [], cache.phrasings)
+
+    history = [
+        {"role": "user", "content": "I put something down"},
+        {"role": "assistant", "content": "Was it your glasses or your keys?"},
+    ]
+    assert cache.get(1, QUESTION, history, CONTEXT) is None
+
+
+@pytest.mark.parametrize(
+    "message",
+    ["Okay", "Please", "Yes please", "ok thanks", "What day is it?", "What time is my doctor visit?"],
+)
+def test_short_and_time_questions_are_never_cached(message):
+    cache = AnswerCache()
+    for _ in range(cache.phrasings + 1):
+        cache.put(1, message, [], CONTEXT, reply("Sure"))
+    assert cache.get(1, message, [], CONTEXT) is None
+    assert not cache.users
+
+
+def test_users_are_bounded(monkeypatch):
+    cache = AnswerCache()
+    monkeypatch.setattr(cache, "max_users", 3)
+    for user_id in range(10):
+        cache.put(user_id, QUESTION, [], CONTEXT, reply("On the table"))
+    assert list(cache.users) == [7, 8, 9]
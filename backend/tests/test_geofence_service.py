@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from app.core.database import SessionLocal, create_tables
+from app.models.medication import Geofence, User
+from app.services.geofence_service import GeofenceService
+
+HOME = (39.7000, -104.9000)
+AWAY = (39.7200, -104.9000)  # ~2.2 km north
+
+
+async def make_user(user_id: int) -> User:
+    await create_tables()
+    async with SessionLocal() as db:
+        user = await db.merge(User(id=user_id, email=f"user{user_id}@example.com", timezone="UTC"))
+        db.add(Geofence(user_id=user_id, name="Home", kind="home", latitude=HOME[0], longitude=HOME[1]))
+        await db.commit()
+        return user
+
+
+async def evaluate(service: GeofenceService, user: User, point, minute: int):
+    async with SessionLocal() as db:
+        events = await service.evaluate(user, db, point[0], point[1], 5.0, datetime(2026, 3, 4, 9, minute))
+        await db.commit()
+        return [event["type"] for event in events]
+
+
+async def test_exit_after_restart_is_reported():
+    user = await make_user(401)
+    before = GeofenceService()
+    assert await evaluate(before, user, HOME, 0) == []  # First fix only primes
+
+    # Restarted (or evicted / next request on another worker) - the first fix is outside
+    after = GeofenceService()
+    assert await evaluate(after, user, AWAY, 5) == ["exit"]
+    assert await evaluate(after, user, HOME, 10) == ["enter"]
+
+
+async def test_transition_is_reported_by_one_worker():
+    user = await make_user(402)
+    a, b = GeofenceService(), GeofenceService()
+    assert await evaluate(a, user, HOME, 0) == []
+    assert await evaluate(b, user, HOME, 1) == []
+
+    # Both workers still believe the user is home; only one reports the departure
+    assert await evaluate(a, user, AWAY, 5) == ["exit"]
+    assert await evaluate(b, user, AWAY, 6) == []
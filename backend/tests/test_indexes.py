@@ -0,0 +1,80 @@
+"""
+The hot medication queries should be planned as scans of their composite indexes
+(SQLite EXPLAIN QUERY PLAN on a small seeded database; scripts/bench/indexes.py times
+the same queries against millions of rows)
+"""
+from datetime import datetime, timedelta
+import random
+
+import pytest
+from sqlalchemy import create_engine, insert, text
+
+from app.core.database import Base
+from app.models.medication import ApprovedContact, Medication, MedicationLog, User
+
+USERS, MEDS_PER_USER, LOG_ROWS = 200, 3, 20000
+NOW = datetime(2026, 1, 1)
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('indexes') / 'indexes.db'}")
+    Base.metadata.create_all(engine)
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": u, "email": f"user{u}@example.com"} for u in range(1, USERS + 1)])
+        conn.execute(
+            insert(ApprovedContact),
+            [{"user_id": u, "name": "Daughter"} for u in range(1, USERS + 1) for _ in range(2)],
+        )
+        conn.execute(
+            insert(Medication),
+            [
+                {"id": (u - 1) * MEDS_PER_USER + m + 1, "user_id": u, "name": f"Medication {m}", "active": m > 0}
+                for u in range(1, USERS + 1)
+                for m in range(MEDS_PER_USER)
+            ],
+        )
+        logs = []
+        for _ in range(LOG_ROWS):
+            medication_id = rng.randint(1, USERS * MEDS_PER_USER)
+            logs.append(
+                {
+                    "user_id": (medication_id - 1) // MEDS_PER_USER + 1,
+                    "medication_id": medication_id,
+                    "taken_at": NOW - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+                    "status": "taken",
+                }
+            )
+        conn.execute(insert(MedicationLog), logs)
+        conn.execute(text("ANALYZE"))
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "sql,params,index",
+    [
+        (
+            "SELECT * FROM medications WHERE user_id = :key AND active = :active",
+            {"active": True},
+            "ix_medications_user_id_active",
+        ),
+        (
+            "SELECT * FROM medication_logs WHERE user_id = :key AND taken_at >= :since ORDER BY taken_at DESC",
+            {"since": NOW - timedelta(days=7)},
+            "ix_medication_logs_user_id_taken_at",
+        ),
+        (
+            "SELECT * FROM medication_logs WHERE medication_id = :key AND taken_at >= :since "
+            "ORDER BY taken_at DESC",
+            {"since": NOW - timedelta(days=7)},
+            "ix_medication_logs_medication_id_taken_at",
+        ),
+        ("SELECT * FROM approved_contacts WHERE user_id = :key", {}, "ix_approved_contacts_user_id"),
+    ],
+)
+def test_hot_query_uses_index(engine, sql, params, index):
+    with engine.connect() as conn:
+        plan = "\n".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), {"key": 1, **params}))
+    assert index in plan, plan
@@ -0,0 +1,52 @@
+import pytest
+
+from app.core.intents import ACTION_INTENTS, URGENT_PHRASES, IntentMatcher
+
+actions = IntentMatcher(ACTION_INTENTS)
+urgent = IntentMatcher([("urgent", URGENT_PHRASES)])
+
+
+# Everything the original substring check ("help", "emergency", "hurt", "fell", "scared")
+# caught, plus the inflections it missed once matching became whole-word
+@pytest.mark.parametrize(
+    "message",
+    [
+        "Help!",
+        "Can you help me",
+        "I need helping",
+        "I feel helpless",
+        "Nobody helped me",
+        "This is an emergency",
+        "My arm hurts",
+        "I'm hurting",
+        "It hurt when I stood up",
+        "I fell",
+        "I fell down the stairs",
+        "I've fallen",
+        "I am falling",
+        "I had a fall",
+        "I keep falling over",
+        "I'm scared",
+    ],
+)
+def test_emergency_words_and_inflections(message):
+    assert "emergency_alert" in actions.matches(message)
+
+
+@pytest.mark.parametrize("message", ["My fellow residents", "It's a helicopter", "I like the hurdles"])
+def test_emergency_words_need_a_word_start(message):
+    assert "emergency_alert" not in actions.matches(message)
+
+
+@pytest.mark.parametrize(
+    "message",
+    ["I fell", "I’ve fallen", "I am falling", "I can’t get up", "I have chest pain", "Call 911"],
+)
+def test_urgent_phrases(message):
+    assert urgent.search(message)
+
+
+def test_lines_with_typographic_apostrophes_keep_offsets():
+    matcher = IntentMatcher([("warnings", ["don't"])])
+    text = "Take with food\nDon’t mix with alcohol"
+    assert matcher.lines(text) == ["Don’t mix with alcohol"]
@@ -0,0 +1,75 @@
+import json
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.interaction_index import interaction_index, normalize_name
+
+
+# Salt-form names resolve to their own drug, not to the bare salt
+@pytest.mark.parametrize(
+    "name,canonical",
+    [
+        ("Losartan potassium 50mg", "losartan potassium"),
+        ("Diclofenac potassium", "diclofenac potassium"),
+        ("Penicillin V potassium 500 mg", "penicillin v potassium"),
+        ("Calcium citrate", "calcium citrate"),
+        ("Potassium chloride 20 mEq", "potassium chloride"),
+        ("Klor-Con M20", "potassium chloride"),
+        ("Tums", "calcium carbonate"),
+        ("Zocor 20mg tablet", "simvastatin"),
+        ("Warfarin sodium 5mg", "warfarin"),
+    ],
+)
+def test_canonical_salt_forms(name, canonical):
+    assert interaction_index.canonical(name) == canonical
+
+
+# Combination products are not collapsed into one ingredient
+@pytest.mark.parametrize("name", ["Advil PM", "Aleve PM", "Tylenol PM", "Zocor plus ezetimibe"])
+def test_canonical_keeps_combination_names(name):
+    assert interaction_index.canonical(name) == normalize_name(name)
+
+
+def test_salt_form_does_not_match_bare_salt_record():
+    # Lisinopril + losartan potassium is not the lisinopril + potassium chloride record
+    pair = frozenset(("lisinopril", interaction_index.canonical("Losartan potassium 50mg")))
+    assert interaction_index.lookup(pair) is None
+
+
+class StubLLM:
+    """Records the prompt and answers for every listed medication"""
+
+    async def create_message(self, **kwargs):
+        self.prompt = kwargs["messages"][0]["content"]
+        reply = [
+            {"medication": "Losartan potassium 50mg", "severity": "moderate", "description": ""},
+            {"medication": "calcium citrate", "severity": "none", "description": ""},
+        ]
+        return SimpleNamespace(content=[SimpleNamespace(text=json.dumps(reply))])
+
+
+async def test_model_is_asked_with_the_users_names(monkeypatch):
+    stub = StubLLM()
+    monkeypatch.setattr(interaction_index, "llm", stub)
+    monkeypatch.setattr(interaction_index, "verdicts", OrderedDict())
+
+    result = await interaction_index.check(
+        "Lisinopril 10mg", [{"name": "Losartan potassium 50mg"}, {"name": "Calcium citrate"}]
+    )
+
+    assert "MEDICATIONS: Losartan potassium 50mg, Calcium citrate" in stub.prompt
+    assert [d["severity"] for d in result["details"]] == ["moderate"]
+    assert frozenset(("lisinopril", "losartan potassium")) in interaction_index.verdicts
+
+
+async def test_combination_product_is_checked_as_itself(monkeypatch):
+    stub = StubLLM()
+    monkeypatch.setattr(interaction_index, "llm", stub)
+    monkeypatch.setattr(interaction_index, "verdicts", OrderedDict())
+
+    # Not answered from the warfarin + ibuprofen record, which would miss the diphenhydramine
+    await interaction_index.check("Advil PM", [{"name": "Coumadin"}])
+    assert "interacts with Advil PM" in stub.prompt
+    assert "MEDICATIONS: Coumadin" in stub.prompt
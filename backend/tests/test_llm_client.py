@@ -0,0 +1,97 @@
+"""
+Load test for the shared LLM client
+N concurrent chat calls against a local stub Claude server should overlap, taking
+about one upstream delay per concurrency wave instead of N of them
+"""
+import asyncio
+import json
+import time
+from typing import List
+
+import pytest
+
+from app.core.config import settings
+from app.core.llm import LLMClient
+from app.services import ai_service
+
+STUB_DELAY = 0.5  # Seconds the stub takes per completion
+CALLS = 20
+STUB_REPLY = json.dumps(
+    {
+        "id": "msg_stub",
+        "type": "message",
+        "role": "assistant",
+        "model": "stub",
+        "content": [{"type": "text", "text": "I understand. Let me help you."}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 500, "output_tokens": 8},
+    }
+).encode()
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Minimal keep-alive HTTP/1.1 server answering every POST with STUB_REPLY"""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.decode("latin-1").split("\r\n"):
+                if line.lower().startswith("content-length:"):
+                    length = int(line.split(":", 1)[1])
+            await reader.readexactly(length)
+            await asyncio.sleep(STUB_DELAY)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+                + f"content-length: {len(STUB_REPLY)}\r\n\r\n".encode()
+                + STUB_REPLY
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def heartbeat(stop: asyncio.Event, gaps: List[float]):
+    """Largest gap between 10ms ticks shows whether anything blocked the event loop"""
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+@pytest.fixture
+async def stub_client(monkeypatch):
+    """Assistant wired to a fresh LLMClient pointed at the stub server"""
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    monkeypatch.setattr(settings, "ANTHROPIC_BASE_URL", f"http://127.0.0.1:{port}")
+
+    client = LLMClient()
+    monkeypatch.setattr(ai_service.ai_assistant, "llm", client)
+    yield client
+
+    await client.close()
+    server.close()
+    await server.wait_closed()
+
+
+async def test_concurrent_chats_overlap(stub_client):
+    stop, gaps = asyncio.Event(), []
+    ticker = asyncio.create_task(heartbeat(stop, gaps))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(ai_service.ai_assistant.chat(f"What day is it? ({i})", []) for i in range(CALLS))
+    )
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+
+    assert not [r["error"] for r in results if r.get("error")]
+    assert elapsed < CALLS * STUB_DELAY / 2, f"calls were serialized ({elapsed:.2f}s)"
+    assert max(gaps) < STUB_DELAY, f"event loop stalled for {max(gaps) * 1000:.0f} ms"
@@ -0,0 +1,45 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal, create_tables
+from app.models.medication import LocationFix, LocationSegment
+from app.services.location_history import LocationHistoryService
+
+START = datetime(2026, 1, 1, 6, 0)
+NOW = datetime(2026, 1, 2, 0, 0)
+
+
+async def test_concurrent_compactors_pack_each_fix_once(monkeypatch):
+    await create_tables()
+    async with SessionLocal() as db:
+        db.add_all(
+            LocationFix(
+                user_id=501,
+                latitude=39.70 + i * 0.0005,
+                longitude=-104.90 + (i % 7) * 0.0003,
+                recorded_at=START + timedelta(minutes=i),
+            )
+            for i in range(600)
+        )
+        await db.commit()
+    monkeypatch.setattr(settings, "LOCATION_COMPACT_BATCH", 40)
+
+    async def drain(service: LocationHistoryService):
+        while await service.compact(NOW):
+            await asyncio.sleep(0)
+
+    # Two workers compacting at once, as every worker process runs the loop
+    workers = [LocationHistoryService(), LocationHistoryService()]
+    await asyncio.gather(*(drain(w) for w in workers))
+
+    async with SessionLocal() as db:
+        raw = await db.scalar(
+            select(func.sum(LocationSegment.raw_count)).where(LocationSegment.user_id == 501)
+        )
+        left = await db.scalar(select(func.count()).where(LocationFix.user_id == 501))
+    assert raw == 600
+    assert left == 0
+    assert sum(w.compacted_fixes for w in workers) == 600
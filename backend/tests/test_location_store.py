@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.core.database import create_tables
+from app.services.location_store import LocationStore
+
+
+@pytest.fixture
+async def workers():
+    """Two stores sharing the database, as two worker processes would"""
+    await create_tables()
+    stores = [LocationStore(), LocationStore()]
+    yield stores
+    for store in stores:
+        await store.flush()
+
+
+async def test_cached_latest_is_refreshed_after_the_flush_interval(workers, monkeypatch):
+    a, b = workers
+    a.record(301, 39.70, -104.90, 5.0, datetime(2026, 3, 4, 9, 0))
+    await a.flush()
+    assert (await b.get_latest(301))["latitude"] == 39.70
+
+    # The phone's next fix goes to the other worker
+    a.record(301, 39.75, -104.95, 5.0, datetime(2026, 3, 4, 9, 5))
+    await a.flush()
+
+    monkeypatch.setattr(settings, "LOCATION_FLUSH_INTERVAL", 0.0)
+    assert (await b.get_latest(301))["latitude"] == 39.75
+
+
+async def test_unflushed_local_fix_wins_over_older_row(workers, monkeypatch):
+    a, _ = workers
+    a.record(302, 39.70, -104.90, 5.0, datetime(2026, 3, 4, 9, 0))
+    await a.flush()
+    a.record(302, 39.80, -104.80, 5.0, datetime(2026, 3, 4, 9, 10))
+
+    monkeypatch.setattr(settings, "LOCATION_FLUSH_INTERVAL", 0.0)
+    assert (await a.get_latest(302))["latitude"] == 39.80
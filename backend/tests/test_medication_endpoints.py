@@ -0,0 +1,30 @@
+import httpx
+import pytest
+
+from app import main as api
+from app.core.database import SessionLocal, create_tables
+from app.models.medication import Medication, User
+
+
+@pytest.fixture
+async def client():
+    await create_tables()
+    async with SessionLocal() as db:
+        for user_id in (101, 102):
+            await db.merge(User(id=user_id, email=f"user{user_id}@example.com", timezone="UTC"))
+        await db.merge(Medication(id=101, user_id=101, name="Lisinopril", times=["08:00"]))
+        await db.commit()
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_cannot_mark_another_users_medication_taken(client):
+    response = await client.post("/api/medications/101/taken", params={"user_id": 102})
+    assert response.status_code == 404
+
+
+async def test_mark_own_medication_taken(client):
+    response = await client.post("/api/medications/101/taken", params={"user_id": 101})
+    assert response.status_code == 200
@@ -0,0 +1,52 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services.notification_service import NotificationService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """Notification service whose SMS sends are recorded instead of going to Twilio"""
+    service = NotificationService()
+    service.sent = []
+
+    async def send_sms(to_number, body):
+        service.sent.append(body)
+        return service.sms_ok
+
+    service.sms_ok = True
+    monkeypatch.setattr(service, "send_sms", send_sms)
+    return service
+
+
+def user(user_id: int):
+    return SimpleNamespace(id=user_id, name=f"User {user_id}", caregiver_phone="+15550100")
+
+
+async def test_repeat_alerts_within_cooldown_are_suppressed(service):
+    first = service.dispatch_emergency(user(1), "I fell", time.perf_counter())
+    await first
+    assert service.dispatch_emergency(user(1), "I fell, I can't get up", time.perf_counter()) is None
+
+    # Other users are not affected
+    await service.dispatch_emergency(user(2), "I fell", time.perf_counter())
+    assert len(service.sent) == 2
+    assert service.stats()["alerts_suppressed"] == 1
+
+
+async def test_alert_after_cooldown_is_sent(service, monkeypatch):
+    monkeypatch.setattr(settings, "EMERGENCY_ALERT_COOLDOWN", 0)
+    await service.dispatch_emergency(user(1), "I fell", time.perf_counter())
+    time.sleep(0.01)
+    await service.dispatch_emergency(user(1), "I fell again", time.perf_counter())
+    assert len(service.sent) == 2
+
+
+async def test_failed_alert_does_not_start_cooldown(service):
+    service.sms_ok = False
+    await service.dispatch_emergency(user(1), "I fell", time.perf_counter())
+    service.sms_ok = True
+    assert service.dispatch_emergency(user(1), "I fell", time.perf_counter()) is not None
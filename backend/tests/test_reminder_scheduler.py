@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.database import SessionLocal, create_tables
+from app.models.medication import Medication, User
+from app.services.medication_schedule_service import medication_schedule_service
+from app.services.reminder_scheduler import ReminderScheduler
+
+BEFORE = datetime(2026, 3, 4, 8, 50, tzinfo=timezone.utc)
+DUE = datetime(2026, 3, 4, 9, 0, tzinfo=timezone.utc)
+
+
+async def add_medication(user_id: int, medication_id: int, times):
+    async with SessionLocal() as db:
+        user = await db.merge(User(id=user_id, email=f"user{user_id}@example.com", timezone="UTC"))
+        medication = await db.merge(Medication(id=medication_id, user_id=user_id, name="Lisinopril", times=times))
+        await db.flush()
+        await medication_schedule_service.sync_medication(db, medication, user)
+        await db.commit()
+
+
+def worker() -> ReminderScheduler:
+    """A scheduler as one worker process would run it, recording what it fires"""
+    scheduler = ReminderScheduler()
+    scheduler.sent = []
+
+    async def handler(event):
+        scheduler.sent.append(event)
+
+    scheduler.add_handler(handler)
+    return scheduler
+
+
+@pytest.fixture(autouse=True)
+async def tables():
+    await create_tables()
+
+
+async def test_each_dose_fires_in_one_worker_and_is_collected_once():
+    await add_medication(201, 201, ["09:00"])
+    workers = [worker(), worker()]
+    for scheduler in workers:
+        await scheduler.tick(BEFORE)
+    for scheduler in workers:
+        await scheduler.tick(DUE)
+
+    fired = [event for scheduler in workers for event in scheduler.sent if event["user_id"] == 201]
+    assert len(fired) == 1
+    assert sum(s.claimed_elsewhere for s in workers) == 1
+
+    # Pending reminders live in the database, so any worker can answer the poll - once
+    async with SessionLocal() as db:
+        first = await workers[1].collect(db, 201)
+        await db.commit()
+    async with SessionLocal() as db:
+        second = await workers[0].collect(db, 201)
+        await db.commit()
+    assert [(r["medication_id"], r["local_time"]) for r in first] == [(201, "09:00")]
+    assert second == []
+
+
+async def test_dose_removed_through_another_worker_is_not_fired():
+    await add_medication(202, 202, ["09:00"])
+    scheduler = worker()
+    await scheduler.tick(BEFORE)
+
+    # Another worker moves the dose to the evening; this one never saw a rearm
+    await add_medication(202, 202, ["20:00"])
+    await scheduler.tick(DUE)
+
+    assert not [event for event in scheduler.sent if event["user_id"] == 202]
+    assert scheduler.dropped_removed == 1
@@ -0,0 +1,80 @@
+from datetime import datetime
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+from app.services.schedule_index import ScheduleIndex, UserSchedule
+
+ZONE = ZoneInfo("America/Denver")
+# A Monday in local time
+MONDAY_9AM = datetime(2026, 1, 5, 9, 0, tzinfo=ZONE)
+
+
+def medication(id: int, times, frequency="daily", created_at=datetime(2026, 1, 1, 12)):
+    return SimpleNamespace(
+        id=id, name=f"Medication {id}", dosage="10mg", times=times, frequency=frequency, created_at=created_at
+    )
+
+
+# Created Wednesday 2026-01-07 at noon Denver time (19:00 UTC)
+WEEKLY = medication(2, ["09:00"], frequency="weekly", created_at=datetime(2026, 1, 7, 19))
+
+
+def test_weekly_dose_is_only_due_on_its_weekday():
+    schedule = UserSchedule(ZONE, [medication(1, ["09:00"]), WEEKLY])
+
+    assert [d["medication_id"] for d in schedule.due_now(MONDAY_9AM)] == [1]
+    wednesday = MONDAY_9AM.replace(day=7)
+    assert [d["medication_id"] for d in schedule.due_now(wednesday)] == [1, 2]
+
+
+def test_next_dose_skips_to_the_weekly_day():
+    schedule = UserSchedule(ZONE, [WEEKLY])
+    assert [d["medication_id"] for d in schedule.next_doses(MONDAY_9AM)] == [2]
+    # Right after Wednesday's dose, the next one is a week later
+    assert schedule.next_doses(MONDAY_9AM.replace(day=7, minute=30)) == schedule.next_doses(MONDAY_9AM)
+
+
+def test_next_dose_wraps_to_tomorrow():
+    schedule = UserSchedule(ZONE, [medication(1, ["08:00", "20:00"])])
+    assert [d["time"] for d in schedule.next_doses(MONDAY_9AM)] == ["20:00"]
+    assert [d["time"] for d in schedule.next_doses(MONDAY_9AM.replace(hour=21))] == ["08:00"]
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Counts reads of the user's medications"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.reads = 0
+
+    async def execute(self, statement):
+        self.reads += 1
+        return FakeResult(self.rows)
+
+
+async def test_cached_schedule_expires_after_ttl(monkeypatch):
+    index = ScheduleIndex()
+    user = SimpleNamespace(id=1, timezone="America/Denver")
+    db = FakeSession([medication(1, ["09:00"])])
+
+    await index.get(user, db)
+    await index.get(user, db)
+    assert db.reads == 1
+
+    # Another worker added a medication - this one sees it once the TTL passes
+    db.rows = db.rows + [medication(3, ["10:00"])]
+    monkeypatch.setattr(index, "ttl", 0)
+    schedule = await index.get(user, db)
+    assert db.reads == 2
+    assert {d["medication_id"] for d in schedule.doses} == {1, 3}
@@ -0,0 +1,36 @@
+from app.services.vision_cache import VisionCache
+
+LISINOPRIL = {
+    "success": True,
+    "analysis": "Lisinopril 10mg",
+    "extracted_data": {"name": "Lisinopril", "dosage": "10mg"},
+}
+PHASH = 0x0F0F_3C3C_5A5A_A5A5
+NEAR = PHASH ^ 0b101  # Two bits off - the same bottle re-photographed, or another label
+
+
+def test_exact_label_match_needs_no_ocr():
+    cache = VisionCache()
+    cache.put(1, PHASH, "medication", [], LISINOPRIL)
+    assert not cache.needs_label_text(1, PHASH, "medication", [])
+    assert cache.get(1, PHASH, "medication", []) is LISINOPRIL
+
+
+def test_label_near_match_is_confirmed_by_ocr():
+    cache = VisionCache()
+    cache.put(1, PHASH, "medication", [], LISINOPRIL)
+    assert cache.needs_label_text(1, NEAR, "medication", [])
+
+    assert cache.get(1, NEAR, "medication", [], "LISINOPRIL 10MG TABLETS\nTake one daily") is LISINOPRIL
+    # Same drug, different strength; a different drug; no OCR available
+    assert cache.get(1, NEAR, "medication", [], "LISINOPRIL 20MG TABLETS") is None
+    assert cache.get(1, NEAR, "medication", [], "AMLODIPINE 10MG TABLETS") is None
+    assert cache.get(1, NEAR, "medication", [], None) is None
+    assert cache.stats()["unconfirmed"] == 3
+
+
+def test_documents_still_match_exactly_only():
+    cache = VisionCache()
+    cache.put(1, PHASH, "doctor_note", [], {"success": True, "analysis": "note"})
+    assert not cache.needs_label_text(1, NEAR, "doctor_note", [])
+    assert cache.get(1, NEAR, "doctor_note", [], "anything") is None
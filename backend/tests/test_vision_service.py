@@ -0,0 +1,160 @@
+import base64
+import io
+import json
+import os
+import tracemalloc
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+import httpx
+import pytest
+from PIL import Image
+
+from app import main as api
+from app.services.image_pipeline import image_pipeline, preprocess_image
+from app.services.vision_service import ANALYSIS_TOOL_NAME, vision_service
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "..", "app", "data", "vision_replies.json")
+
+
+@pytest.fixture(scope="module")
+def corpus() -> List[Dict]:
+    """Sample replies with the medication fields a reader would expect"""
+    with open(CORPUS_PATH) as f:
+        return json.load(f)
+
+
+def field_accuracy(corpus: List[Dict], parsed: List[Dict]) -> Tuple[int, int]:
+    """(correct, expected) medication fields - case-insensitive exact match"""
+    correct = total = 0
+    for entry, result in zip(corpus, parsed):
+        extracted = result.get("extracted_data") or {}
+        for field, value in entry["expected"].items():
+            total += 1
+            correct += (extracted.get(field) or "").strip("*- ").lower() == value.lower()
+    return correct, total
+
+
+def test_tool_result_extracts_every_field(corpus):
+    parsed = [
+        vision_service._parse_tool_result(
+            [SimpleNamespace(type="tool_use", name=ANALYSIS_TOOL_NAME, input=entry["tool_input"])],
+            entry["analysis_type"],
+        )
+        for entry in corpus
+    ]
+    correct, total = field_accuracy(corpus, parsed)
+    assert total and correct == total
+
+
+@pytest.fixture
+def no_medications(monkeypatch):
+    """Vision endpoints with the medication lookup stubbed out"""
+
+    async def lookup(user_id, db):
+        return []
+
+    monkeypatch.setattr(api, "medications_for_vision", lookup)
+
+
+@pytest.fixture
+def stub_endpoints(no_medications, monkeypatch):
+    """Upload endpoints with the medication lookup and the model call stubbed out"""
+
+    async def stub_analysis(raw, analysis_type, user_medications=None, user_id=None):
+        return {"success": True, "analysis": f"{len(raw)} bytes received"}
+
+    monkeypatch.setattr(api.vision_service, "analyze_image_bytes", stub_analysis)
+
+
+async def peak_memory(client: httpx.AsyncClient, request: httpx.Request) -> int:
+    """Peak bytes allocated while the app handles one request (client-side encoding excluded)"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        response = await client.send(request)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    assert response.status_code == 200, response.text
+    return peak
+
+
+async def test_multipart_upload_uses_less_memory_than_base64(stub_endpoints):
+    photo = os.urandom(8 * 1024 * 1024)
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        json_peak = await peak_memory(
+            client,
+            client.build_request(
+                "POST",
+                "/api/vision/analyze",
+                json={
+                    "image_data": base64.b64encode(photo).decode("ascii"),
+                    "analysis_type": "medication",
+                    "user_id": 1,
+                },
+            ),
+        )
+        multipart_peak = await peak_memory(
+            client,
+            client.build_request(
+                "POST",
+                "/api/vision/analyze/upload",
+                files={"image": ("photo.jpg", io.BytesIO(photo), "image/jpeg")},
+                data={"analysis_type": "medication", "user_id": "1"},
+            ),
+        )
+
+    # The JSON path holds the base64 text and the decoded bytes at once
+    assert multipart_peak < json_peak
+    assert multipart_peak < 2 * len(photo)
+
+
+class BrokenPool:
+    """Executor whose worker process has died"""
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("A process in the process pool was terminated abruptly")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+async def upload(photo: bytes) -> httpx.Response:
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post(
+            "/api/vision/analyze/upload",
+            files={"image": ("photo", io.BytesIO(photo), "application/octet-stream")},
+            data={"analysis_type": "medication", "user_id": "1"},
+        )
+
+
+@pytest.mark.parametrize(
+    "photo, status",
+    [
+        (b"\x00\x00\x00\x18ftypheic" + b"\x00" * 64, 415),  # iPhone HEIC
+        (b"not an image at all", 415),
+        (b"\x89PNG\r\n\x1a\n" + b"\x00" * 64, 422),  # Truncated PNG
+    ],
+)
+async def test_unprocessable_upload_is_a_client_error(no_medications, photo, status):
+    response = await upload(photo)
+    assert response.status_code == status, response.text
+
+
+def test_decompression_bomb_is_rejected(monkeypatch):
+    buffer = io.BytesIO()
+    Image.new("L", (100, 100)).save(buffer, "PNG")
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    assert preprocess_image(buffer.getvalue())["rejected"] == "too_large"
+
+
+async def test_broken_pool_is_a_client_error_and_replaced(no_medications, monkeypatch):
+    monkeypatch.setattr(image_pipeline, "_pool", BrokenPool())
+    response = await upload(b"\xff\xd8\xff" + b"\x00" * 64)
+    assert response.status_code == 422, response.text
+    assert image_pipeline._pool is None